@@ -4,25 +4,109 @@ from __future__ import annotations
 
 import queue
 import threading
+import time
+from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Optional
-
-import sounddevice as sd
-import soundfile as sf
+from typing import Callable, Optional
 
 from audit_logger import log
-from config import AUDIO_SUBTYPE, CHANNELS, RECORDINGS_DIR, SAMPLE_RATE
+from config import (
+    AUDIO_SUBTYPE,
+    CHANNELS,
+    RECORDER_CAPTURE,
+    RECORDER_DRAIN_SEC,
+    RECORDER_RING_SEC,
+    RECORDINGS_DIR,
+    SAMPLE_RATE,
+)
+from encrypted_storage import open_file
+from metrics import timed
+
+AudioBlockCallback = Optional[Callable[[object], None]]
+
+# How often the recording on disk is brought up to date, bounding what a crash loses
+FLUSH_INTERVAL_SEC = 1.0
+
+
+@dataclass
+class CaptureStats:
+    """Health counters for the current (or last) recording."""
+
+    overruns: int = 0  # Device blocks discarded because the ring buffer was full
+    dropped_frames: int = 0  # Frames lost to those overruns
+    dropouts: int = 0  # Input overflows reported by the audio device itself
+    peak_fill: float = 0.0  # Highest ring buffer occupancy seen, 0-1
+
+    @property
+    def lost_audio(self) -> bool:
+        return bool(self.overruns or self.dropouts)
+
+
+class FrameRingBuffer:
+    """
+    Preallocated single-producer, single-consumer ring of audio frames.
+
+    The audio callback ``write``s into reused memory; the writer thread reads
+    contiguous views with ``peek`` and releases them with ``consume``. Each
+    side only advances its own counter, so no lock is needed between them.
+    """
+
+    def __init__(self, capacity: int, channels: int, dtype: str = "float32") -> None:
+        import numpy as np
+
+        self.capacity = capacity
+        self._frames = np.zeros((capacity, channels), dtype=dtype)
+        self._written = 0  # Frames ever written; advanced by the producer only
+        self._read = 0  # Frames ever consumed; advanced by the consumer only
+
+    def available(self) -> int:
+        return self._written - self._read
+
+    def write(self, block) -> bool:
+        """Copy ``block`` in; returns False (writing nothing) if it does not fit."""
+        count = len(block)
+        if count > self.capacity - self.available():
+            return False
+        start = self._written % self.capacity
+        first = min(count, self.capacity - start)
+        self._frames[start : start + first] = block[:first]
+        if first < count:
+            self._frames[: count - first] = block[first:]
+        self._written += count
+        return True
+
+    def peek(self):
+        """Return a view of the longest contiguous run of unread frames (possibly empty)."""
+        start = self._read % self.capacity
+        count = min(self.available(), self.capacity - start)
+        return self._frames[start : start + count]
+
+    def consume(self, count: int) -> None:
+        self._read += count
 
 
 class AudioRecorder:
-    """Threaded WAV recorder that streams microphone audio to disk."""
+    """
+    Threaded WAV recorder that streams microphone audio to disk, encrypted at rest.
+
+    With RECORDER_CAPTURE = "ring" the device callback copies each block into
+    a preallocated FrameRingBuffer and the writer drains it in large batches.
+    Blocks passed to ``on_audio`` are then views into the ring that are only
+    valid during the call, so consumers must copy what they keep.
+    """
 
-    def __init__(self) -> None:
+    def __init__(self, capture: str = RECORDER_CAPTURE) -> None:
+        self.capture = capture
+        self.stats = CaptureStats()
         self._queue: queue.Queue = queue.Queue()
+        self._ring: Optional[FrameRingBuffer] = None
+        self._data_ready = threading.Event()
+        self._drain_frames = max(1, int(RECORDER_DRAIN_SEC * SAMPLE_RATE))
         self._thread: Optional[threading.Thread] = None
         self._recording = False
         self._current_file: Optional[Path] = None
+        self._on_audio: AudioBlockCallback = None
 
     @property
     def current_file(self) -> Optional[Path]:
@@ -33,16 +117,32 @@ class AudioRecorder:
         return self._recording
 
     def _callback(self, indata, frames, time_info, status):  # pragma: no cover - sounddevice callback
-        if status:
-            print(status)
+        if status.input_overflow:
+            self.stats.dropouts += 1
         self._queue.put(indata.copy())
 
-    def start(self) -> Path:
+    def _ring_callback(self, indata, frames, time_info, status):  # pragma: no cover - sounddevice callback
+        ring = self._ring
+        if status.input_overflow:
+            self.stats.dropouts += 1
+        if not ring.write(indata):
+            self.stats.overruns += 1
+            self.stats.dropped_frames += frames
+        buffered = ring.available()
+        self.stats.peak_fill = max(self.stats.peak_fill, buffered / ring.capacity)
+        if buffered >= self._drain_frames:
+            self._data_ready.set()
+
+    @timed("record_start")
+    def start(self, on_audio: AudioBlockCallback = None) -> Path:
+        """Start recording; ``on_audio`` also receives every block written to disk."""
         if self._recording:
             raise RuntimeError("Recording already in progress")
         RECORDINGS_DIR.mkdir(parents=True, exist_ok=True)
         timestamp = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
         self._current_file = RECORDINGS_DIR / f"recording_{timestamp}.wav"
+        self._on_audio = on_audio
+        self.stats = CaptureStats()
         self._recording = True
         self._thread = threading.Thread(target=self._record, daemon=True)
         self._thread.start()
@@ -50,31 +150,70 @@ class AudioRecorder:
         return self._current_file
 
     def _record(self) -> None:
+        # Imported here so PortAudio/libsndfile load on first recording, not at startup
+        import sounddevice as sd
+        import soundfile as sf
+
         assert self._current_file is not None
-        with sf.SoundFile(
-            self._current_file,
+        ring = self.capture == "ring"
+        if ring:
+            self._ring = FrameRingBuffer(int(RECORDER_RING_SEC * SAMPLE_RATE), CHANNELS)
+            self._data_ready.clear()
+        with open_file(self._current_file, "wb") as raw, sf.SoundFile(
+            raw,
             mode="w",
             samplerate=SAMPLE_RATE,
             channels=CHANNELS,
+            format="WAV",
             subtype=AUDIO_SUBTYPE,
         ) as destination:
             with sd.InputStream(
                 samplerate=SAMPLE_RATE,
                 channels=CHANNELS,
-                callback=self._callback,
+                callback=self._ring_callback if ring else self._callback,
             ):
+                flushed = time.monotonic()
                 while self._recording:
-                    try:
-                        data = self._queue.get(timeout=0.1)
-                        destination.write(data)
-                    except queue.Empty:
-                        continue
+                    if ring:
+                        self._data_ready.wait(RECORDER_DRAIN_SEC)
+                        self._data_ready.clear()
+                        self._drain(destination)
+                    else:
+                        try:
+                            data = self._queue.get(timeout=0.1)
+                            destination.write(data)
+                            if self._on_audio:
+                                self._on_audio(data)
+                        except queue.Empty:
+                            continue
+                    if time.monotonic() - flushed >= FLUSH_INTERVAL_SEC:
+                        raw.flush()
+                        flushed = time.monotonic()
+            if ring:
+                self._drain(destination)  # What arrived before the stream closed
+
+    def _drain(self, destination) -> None:
+        """Write everything buffered in the ring, one contiguous run at a time."""
+        while True:
+            block = self._ring.peek()
+            if not len(block):
+                return
+            destination.write(block)
+            if self._on_audio:
+                self._on_audio(block)
+            self._ring.consume(len(block))
 
+    @timed("record_stop")
     def stop(self) -> Optional[Path]:
         if not self._recording:
             return self._current_file
         self._recording = False
+        self._data_ready.set()
         if self._thread:
             self._thread.join()
-        log("record_stop", self._current_file or "", "", "Recording stopped")
+        stats = self.stats
+        details = "Recording stopped"
+        if stats.lost_audio:
+            details += f" ({stats.overruns} overruns, {stats.dropped_frames} frames dropped, {stats.dropouts} device dropouts)"
+        log("record_stop", self._current_file or "", "", details)
         return self._current_file
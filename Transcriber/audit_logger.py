@@ -2,30 +2,648 @@
 
 from __future__ import annotations
 
+import argparse
+import atexit
+import base64
 import csv
+import hashlib
+import hmac
+import io
+import json
+import os
+import sys
+import threading
+import warnings
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
+from functools import lru_cache
 from pathlib import Path
-from typing import Union
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
-from config import AUDIT_LOG_DIR
+from config import (
+    AUDIT_CHAIN_BYTES,
+    AUDIT_CHECKPOINT_ROWS,
+    AUDIT_FLUSH_BATCH,
+    AUDIT_FLUSH_INTERVAL_SEC,
+    AUDIT_FSYNC,
+    AUDIT_LOG_DIR,
+    AUDIT_ROTATE_BYTES,
+    AUDIT_ROTATE_DAILY,
+)
+from encrypted_storage import derive_key
 
 AUDIT_LOG_DIR.mkdir(parents=True, exist_ok=True)
 LOG_FILE = AUDIT_LOG_DIR / "audit_log.csv"
+INDEX_FILE = AUDIT_LOG_DIR / "audit_index.jsonl"
+CHECKPOINT_FILE = AUDIT_LOG_DIR / "audit_checkpoints.jsonl"
+VERIFIED_FILE = AUDIT_LOG_DIR / "audit_verified.json"
+HEADER = ["timestamp", "action", "file", "patient", "details", "chain"]
 
 
-def _ensure_header() -> None:
-    if LOG_FILE.exists():
-        return
-    with LOG_FILE.open("w", newline="", encoding="utf-8") as handle:
-        writer = csv.writer(handle)
-        writer.writerow(["timestamp", "action", "file", "patient", "details"])
+def _encode_row(row: List[str]) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(row)
+    return buffer.getvalue().encode("utf-8")
+
+
+def _iter_records(handle: BinaryIO) -> Iterator[Tuple[int, List[str]]]:
+    """Yield (end offset, fields) for each complete CSV record from the handle's position."""
+    pending = b""
+    for line in iter(handle.readline, b""):
+        pending += line
+        if pending.count(b'"') % 2 or not pending.endswith(b"\n"):
+            continue  # Quoted field spanning lines, or a torn final write
+        yield handle.tell(), next(csv.reader(io.StringIO(pending.decode("utf-8"), newline="")))
+        pending = b""
+
+
+def _read_header(handle: BinaryIO) -> List[str]:
+    line = handle.readline()
+    return next(csv.reader([line.decode("utf-8")]), [])
+
+
+# Hash chain ---------------------------------------------------------------------
+@lru_cache(maxsize=1)
+def _chain_key() -> bytes:
+    """
+    Return the HMAC key, derived from the keystore master key.
+
+    It is never written to AUDIT_LOG_DIR, so whoever can edit the log cannot
+    recompute the chain without also having the keystore (which is
+    DPAPI-protected on Windows).
+    """
+    return derive_key("audit-chain")
+
+
+def _chain(key: bytes, previous: str, fields: List[str]) -> str:
+    """MAC of a row's fields bound to the previous row's chain value."""
+    message = previous.encode("ascii") + b"\n" + json.dumps(fields, ensure_ascii=False).encode("utf-8")
+    return hmac.digest(key, message, "sha256")[:AUDIT_CHAIN_BYTES].hex()
+
+
+def _append_checkpoints(checkpoints: List[Dict[str, object]], sync: bool) -> None:
+    with CHECKPOINT_FILE.open("a", encoding="utf-8") as handle:
+        for checkpoint in checkpoints:
+            handle.write(json.dumps(checkpoint) + "\n")
+        handle.flush()
+        if sync:
+            os.fsync(handle.fileno())
+
+
+def _load_checkpoints() -> Dict[Tuple[int, int], Dict[str, object]]:
+    checkpoints: Dict[Tuple[int, int], Dict[str, object]] = {}
+    if CHECKPOINT_FILE.exists():
+        with CHECKPOINT_FILE.open("r", encoding="utf-8") as handle:
+            for line in handle:
+                try:
+                    checkpoint = json.loads(line)
+                    checkpoints[(int(checkpoint["seq"]), int(checkpoint["row"]))] = checkpoint
+                except (ValueError, KeyError):
+                    continue  # Torn write from an interrupted append
+    return checkpoints
+
+
+# Segment index ------------------------------------------------------------------
+class _BloomFilter:
+    """Compact set-membership sketch: no false negatives, ~1% false positives."""
+
+    HASHES = 7
+    BITS_PER_ITEM = 10
+
+    def __init__(self, bits: bytearray) -> None:
+        self.bits = bits
+        self.size = len(bits) * 8
+
+    @classmethod
+    def build(cls, values: Iterable[str]) -> "_BloomFilter":
+        values = set(values)
+        bloom = cls(bytearray(max(8, len(values) * cls.BITS_PER_ITEM // 8 + 1)))
+        for value in values:
+            for position in bloom._positions(value):
+                bloom.bits[position >> 3] |= 1 << (position & 7)
+        return bloom
+
+    def _positions(self, value: str) -> Iterator[int]:
+        digest = hashlib.blake2b(value.encode("utf-8"), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        step = int.from_bytes(digest[8:], "little") | 1
+        return ((first + index * step) % self.size for index in range(self.HASHES))
+
+    def __contains__(self, value: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+    def encode(self) -> str:
+        return base64.b64encode(bytes(self.bits)).decode("ascii")
+
+    @classmethod
+    def decode(cls, data: str) -> "_BloomFilter":
+        return cls(bytearray(base64.b64decode(data)))
+
+
+def _patient_key(patient: str) -> str:
+    return patient.strip().casefold()
+
+
+def _file_keys(file_path: str) -> List[str]:
+    """Rows are indexed by full path and by file name, since some actions log only the name."""
+    name = file_path.replace("\\", "/").rsplit("/", 1)[-1]
+    return [file_path, name] if name != file_path else [file_path]
+
+
+def _segment_path(seq: int) -> Path:
+    return AUDIT_LOG_DIR / f"audit_log-{seq:06d}.csv"
+
+
+def _read_rows(path: Path) -> Iterator[Dict[str, str]]:
+    with path.open("r", newline="", encoding="utf-8") as handle:
+        yield from csv.DictReader(handle)
+
+
+def _index_segment(path: Path, seq: int) -> Dict[str, object]:
+    """Summarize one rotated segment: time range, actions, patient/file sketches and last chain value."""
+    start = end = chain = ""
+    rows = 0
+    actions = set()
+    patients = set()
+    files = set()
+    for row in _read_rows(path):
+        rows += 1
+        timestamp = row["timestamp"]
+        start = min(start, timestamp) if start else timestamp
+        end = max(end, timestamp)
+        actions.add(row["action"])
+        patients.add(_patient_key(row["patient"]))
+        files.update(_file_keys(row["file"]))
+        chain = row.get("chain") or ""
+    return {
+        "seq": seq,
+        "file": path.name,
+        "start": start,
+        "end": end,
+        "rows": rows,
+        "actions": sorted(actions),
+        "patients": _BloomFilter.build(patients).encode(),
+        "files": _BloomFilter.build(files).encode(),
+        "chain": chain,
+    }
+
+
+def _append_index(entry: Dict[str, object]) -> None:
+    with INDEX_FILE.open("a", encoding="utf-8") as handle:
+        handle.write(json.dumps(entry) + "\n")
+        handle.flush()
+        os.fsync(handle.fileno())
+
+
+def load_index() -> List[Dict[str, object]]:
+    """Return index entries for all rotated segments, indexing any that were missed."""
+    entries: Dict[int, Dict[str, object]] = {}
+    if INDEX_FILE.exists():
+        with INDEX_FILE.open("r", encoding="utf-8") as handle:
+            for line in handle:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # Torn write from an interrupted append
+                entries[int(entry["seq"])] = entry
+    # A crash between rotating and indexing leaves an unindexed segment behind
+    for path in AUDIT_LOG_DIR.glob("audit_log-*.csv"):
+        seq = int(path.stem.rsplit("-", 1)[-1])
+        if seq not in entries:
+            entries[seq] = _index_segment(path, seq)
+            _append_index(entries[seq])
+    return [entries[seq] for seq in sorted(entries)]
+
+
+# Writer -------------------------------------------------------------------------
+class AuditWriter:
+    """
+    Buffered CSV writer with a long-lived handle and a background flush thread.
+
+    Rows are queued in memory and written in batches every ``flush_interval``
+    seconds, or as soon as ``batch_size`` rows are pending. ``fsync`` selects
+    durability: "always" writes and fsyncs each row before ``write`` returns,
+    "batch" fsyncs after every flush and "never" leaves it to the OS.
+
+    The active file is rotated into a numbered, indexed segment when a new UTC
+    day starts (AUDIT_ROTATE_DAILY) or it reaches AUDIT_ROTATE_BYTES.
+
+    A failed flush (disk full, file locked) keeps the rows pending, is
+    reported as a RuntimeWarning and in ``error``, and is retried on the next
+    interval. Should the flush thread ever stop, rows are written before
+    ``write`` returns, so errors reach the caller instead of rows piling up.
+
+    Each row's ``chain`` column is an HMAC over the row and the previous
+    row's chain value, continuing across segments, so edited, reordered or
+    removed rows break the chain. The chain position is checkpointed every
+    AUDIT_CHECKPOINT_ROWS rows and at rotation for ``verify``.
+    """
+
+    def __init__(
+        self,
+        path: Path = LOG_FILE,
+        flush_interval: float = AUDIT_FLUSH_INTERVAL_SEC,
+        batch_size: int = AUDIT_FLUSH_BATCH,
+        fsync: str = AUDIT_FSYNC,
+    ) -> None:
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = max(1, batch_size)
+        self.fsync = fsync
+        self._pending: List[List[str]] = []
+        self._lock = threading.Lock()  # Guards _pending and the thread state
+        self._io_lock = threading.Lock()  # Serializes file writes, keeping row and chain order
+        self._wake = threading.Event()
+        self._handle: Optional[BinaryIO] = None
+        self._segment_day = ""
+        self._seq = 0  # Segment number the active file will be rotated to
+        self._row = 0  # Data rows in the active file
+        self._chain = ""  # Chain value of the last written row
+        self._unchecked = 0  # Rows written since the last checkpoint
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self.error: Optional[Exception] = None  # Why the last background flush failed, until one succeeds
+
+    def write(self, row: List[str]) -> None:
+        with self._lock:
+            self._pending.append(row)
+            stopped = self._thread is not None and not self._thread.is_alive() and not self._closed
+            if stopped:
+                warnings.warn("Audit flush thread stopped; writing audit rows synchronously", RuntimeWarning)
+            if self.fsync != "always" and not self._closed and not stopped:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="audit-flush", daemon=True)
+                    self._thread.start()
+                if len(self._pending) >= self.batch_size:
+                    self._wake.set()
+                return
+        self.flush()
+
+    def flush(self) -> None:
+        """Write all pending rows now; on failure they stay pending and the error is raised."""
+        with self._io_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return
+            try:
+                self._write_locked(batch)
+            except BaseException:
+                with self._lock:
+                    self._pending[:0] = batch  # Rows not written, retried by the next flush
+                raise
+
+    def close(self) -> None:
+        """Stop the flush thread, write pending rows and close the file."""
+        with self._lock:
+            self._closed = True
+            thread = self._thread
+        self._wake.set()
+        if thread:
+            thread.join()
+        self.flush()
+        with self._io_lock:
+            if self._handle:
+                self._handle.close()
+                self._handle = None
+
+    def _write_locked(self, batch: List[List[str]]) -> None:
+        """Write rows in order, removing them from ``batch`` as they are written."""
+        # Rows start with an ISO timestamp; write each day's run separately so
+        # daily rotation never mixes days in one segment
+        while batch:
+            day = batch[0][0][:10]
+            count = next((index for index, row in enumerate(batch) if row[0][:10] != day), len(batch))
+            self._write_day_locked(batch, count, day)
+        if self._closed and self._handle:
+            self._handle.close()
+            self._handle = None
+
+    def _write_day_locked(self, batch: List[List[str]], count: int, day: str) -> None:
+        """Write the first ``count`` rows of ``batch`` (all from ``day``) and remove them from it."""
+        handle = self._open()
+        if AUDIT_ROTATE_DAILY and self._segment_day and day != self._segment_day:
+            handle = self._rotate_locked()
+        if not self._segment_day:
+            self._segment_day = day
+        key = _chain_key()
+        offset = start = handle.tell()
+        encoded: List[bytes] = []
+        checkpoints: List[Dict[str, object]] = []
+        for fields in batch[:count]:
+            self._chain = _chain(key, self._chain, fields)
+            data = _encode_row(fields + [self._chain])
+            encoded.append(data)
+            offset += len(data)
+            self._row += 1
+            self._unchecked += 1
+            if self._unchecked >= AUDIT_CHECKPOINT_ROWS:
+                checkpoints.append(self._checkpoint(offset))
+        try:
+            handle.write(b"".join(encoded))
+            handle.flush()
+            if self.fsync != "never":
+                os.fsync(handle.fileno())
+        except BaseException:
+            # None of these rows count as written; reopening re-reads the chain position
+            self._discard_locked(start)
+            raise
+        del batch[:count]
+        if checkpoints:
+            # Only after the rows they vouch for are on disk
+            _append_checkpoints(checkpoints, self.fsync != "never")
+        if handle.tell() >= AUDIT_ROTATE_BYTES:
+            self._rotate_locked()
+
+    def _discard_locked(self, offset: int) -> None:
+        """Close the active file after a failed write and cut it back to ``offset``."""
+        handle, self._handle = self._handle, None
+        try:
+            handle.close()
+        except OSError:
+            pass  # The buffered rows could not be written either
+        try:
+            with self.path.open("r+b") as raw:
+                raw.truncate(offset)
+        except OSError:
+            pass  # Reopening finds where the last complete row ends
+
+    def _checkpoint(self, offset: int) -> Dict[str, object]:
+        self._unchecked = 0
+        return {"seq": self._seq, "row": self._row, "offset": offset, "chain": self._chain}
+
+    def _open(self) -> BinaryIO:
+        if self._handle is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            entries = load_index()
+            self._seq = (int(entries[-1]["seq"]) if entries else 0) + 1
+            self._chain = str(entries[-1].get("chain", "")) if entries else ""
+            self._row = self._unchecked = 0
+            self._segment_day = ""
+            handle = self.path.open("a+b")
+            self._handle = handle
+            if handle.tell() == 0:
+                handle.write(_encode_row(HEADER))
+                handle.flush()
+            else:
+                handle.seek(0)
+                if _read_header(handle) != HEADER:
+                    # Written before rows were chained; keep it as a plain segment
+                    return self._rotate_locked()
+                end = handle.tell()
+                for end, fields in _iter_records(handle):
+                    if not self._segment_day:
+                        self._segment_day = fields[0][:10]
+                    self._chain = fields[-1]
+                    self._row += 1
+                if handle.seek(0, os.SEEK_END) > end:
+                    handle.truncate(end)  # Torn final row from a failed or interrupted write
+                    handle.seek(end)
+        return self._handle
+
+    def _rotate_locked(self) -> BinaryIO:
+        """Move the active file to the next numbered segment, index it and start afresh."""
+        if self._handle:
+            if self._unchecked:
+                _append_checkpoints([self._checkpoint(self._handle.seek(0, os.SEEK_END))], self.fsync != "never")
+            self._handle.close()
+            self._handle = None
+        entries = load_index()
+        seq = (int(entries[-1]["seq"]) if entries else 0) + 1
+        segment = _segment_path(seq)
+        os.replace(self.path, segment)
+        _append_index(_index_segment(segment, seq))
+        return self._open()
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+                self.error = None
+            except Exception as exc:  # Keep the rows and retry next interval
+                if self.error is None:
+                    warnings.warn(f"Audit log write failed, will retry: {exc}", RuntimeWarning)
+                self.error = exc
+            if self._closed:
+                return
+
+
+_writer = AuditWriter()
+atexit.register(_writer.close)
 
 
 def log(action: str, file_path: Union[str, Path], patient: str = "", details: str = "") -> None:
     """Append an audit row with UTC timestamp and metadata."""
-    _ensure_header()
     timestamp = datetime.now(timezone.utc).isoformat()
     normalized = str(file_path)
-    with LOG_FILE.open("a", newline="", encoding="utf-8") as handle:
-        writer = csv.writer(handle)
-        writer.writerow([timestamp, action, normalized, patient, details])
+    _writer.write([timestamp, action, normalized, patient, details])
+
+
+def flush() -> None:
+    """Write buffered audit rows to disk immediately."""
+    _writer.flush()
+
+
+def shutdown() -> None:
+    """Flush and close the audit log; later rows are written synchronously."""
+    _writer.close()
+
+
+# Queries ------------------------------------------------------------------------
+def _as_timestamp(value: Union[str, datetime, None]) -> str:
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.astimezone(timezone.utc).isoformat()
+    return value or ""
+
+
+def query(
+    patient: Optional[str] = None,
+    action: Optional[str] = None,
+    file: Optional[str] = None,
+    since: Union[str, datetime, None] = None,
+    until: Union[str, datetime, None] = None,
+) -> Iterator[Dict[str, str]]:
+    """
+    Yield audit rows matching every given filter, oldest first.
+
+    ``patient`` is matched case-insensitively, ``file`` against the full path
+    or the file name, ``since`` inclusively and ``until`` exclusively (ISO
+    strings such as "2026-07-01" or datetimes, UTC). Only rotated segments
+    whose index entry can contain a match are read, plus the active file.
+    """
+    flush()
+    start = _as_timestamp(since)
+    stop = _as_timestamp(until)
+    patient_key = _patient_key(patient) if patient is not None else None
+
+    def _row_matches(row: Dict[str, str]) -> bool:
+        timestamp = row["timestamp"]
+        return (
+            (not start or timestamp >= start)
+            and (not stop or timestamp < stop)
+            and (action is None or row["action"] == action)
+            and (patient_key is None or _patient_key(row["patient"]) == patient_key)
+            and (file is None or file in _file_keys(row["file"]))
+        )
+
+    segments: List[Path] = []
+    for entry in load_index():
+        if start and str(entry["end"]) < start:
+            continue
+        if stop and str(entry["start"]) >= stop:
+            continue
+        if action is not None and action not in entry["actions"]:
+            continue
+        if patient_key is not None and patient_key not in _BloomFilter.decode(str(entry["patients"])):
+            continue
+        if file is not None and file not in _BloomFilter.decode(str(entry["files"])):
+            continue
+        segments.append(AUDIT_LOG_DIR / str(entry["file"]))
+    if LOG_FILE.exists():
+        segments.append(LOG_FILE)
+
+    for path in segments:
+        for row in _read_rows(path):
+            if _row_matches(row):
+                yield row
+
+
+# Verification -------------------------------------------------------------------
+@dataclass
+class Verification:
+    """Outcome of ``verify``: rows checked, where checking resumed and any problems found."""
+
+    rows: int = 0
+    resumed_from: Optional[Dict[str, object]] = None
+    problems: List[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.problems
+
+
+def _state_mac(key: bytes, state: Dict[str, object]) -> str:
+    fields = {name: state[name] for name in ("seq", "row", "offset", "chain")}
+    return hmac.digest(key, json.dumps(fields, sort_keys=True).encode("utf-8"), "sha256").hex()
+
+
+def _load_verified(key: bytes, result: Verification) -> Optional[Dict[str, object]]:
+    if not VERIFIED_FILE.exists():
+        return None
+    try:
+        state = json.loads(VERIFIED_FILE.read_text(encoding="utf-8"))
+        valid = hmac.compare_digest(str(state["mac"]), _state_mac(key, state))
+    except (ValueError, KeyError):
+        valid = False
+    if not valid:
+        result.problems.append(f"{VERIFIED_FILE.name} was modified; verifying from the start")
+        return None
+    return state
+
+
+def _save_verified(key: bytes, state: Dict[str, object]) -> None:
+    state = dict(state, mac=_state_mac(key, state))
+    temp = VERIFIED_FILE.with_suffix(".tmp")
+    temp.write_text(json.dumps(state), encoding="utf-8")
+    os.replace(temp, VERIFIED_FILE)
+
+
+def verify(full: bool = False) -> Verification:
+    """
+    Check the audit hash chain and checkpoints for tampering.
+
+    Verification resumes from the last checkpoint a previous run verified, so
+    routine checks only read rows logged since then; ``full`` re-verifies
+    the whole history. Segments written before chaining was introduced are
+    skipped. A mismatching row is reported and checking continues from its
+    stored chain value, so each edit is reported once.
+    """
+    flush()
+    key = _chain_key()
+    result = Verification()
+    with _writer._io_lock:  # Hold off rotation and appends while reading
+        state = None if full else _load_verified(key, result)
+        result.resumed_from = state
+        checkpoints = _load_checkpoints()
+        entries = load_index()
+        files = [(int(entry["seq"]), AUDIT_LOG_DIR / str(entry["file"])) for entry in entries]
+        if LOG_FILE.exists():
+            files.append(((int(entries[-1]["seq"]) if entries else 0) + 1, LOG_FILE))
+
+        previous = str(state["chain"]) if state else ""
+        chained = state is not None
+        verified = None
+        for seq, path in files:
+            if state and seq < int(state["seq"]):
+                continue
+            if not path.exists():
+                result.problems.append(f"{path.name} is missing")
+                continue
+            with path.open("rb") as handle:
+                if _read_header(handle) != HEADER:
+                    if chained:
+                        result.problems.append(f"{path.name} has no chain column")
+                    continue  # Plain segment from before rows were chained
+                chained = True
+                row = 0
+                if state and seq == int(state["seq"]):
+                    handle.seek(int(state["offset"]))
+                    row = int(state["row"])
+                for offset, fields in _iter_records(handle):
+                    row += 1
+                    result.rows += 1
+                    stored = fields[-1] if len(fields) == len(HEADER) else ""
+                    if not hmac.compare_digest(_chain(key, previous, fields[:-1]), stored):
+                        result.problems.append(f"{path.name} row {row}: chain mismatch")
+                    previous = stored
+                    checkpoint = checkpoints.pop((seq, row), None)
+                    if checkpoint is None:
+                        continue
+                    if checkpoint["chain"] != stored or checkpoint["offset"] != offset:
+                        result.problems.append(f"{path.name} row {row}: does not match checkpoint")
+                    elif result.ok:
+                        verified = {"seq": seq, "row": row, "offset": offset, "chain": stored}
+
+        # Checkpoints never reached vouch for rows that have since disappeared
+        position = (int(state["seq"]), int(state["row"])) if state else (0, 0)
+        for seq, row in sorted(checkpoints):
+            if (seq, row) > position:
+                result.problems.append(f"segment {seq} row {row}: checkpointed row is missing")
+
+        if verified and result.ok:
+            _save_verified(key, verified)
+    return result
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line audit query and verification; matching rows are written to stdout as CSV."""
+    parser = argparse.ArgumentParser(description="Query or verify the audit log.")
+    parser.add_argument("--patient", help="patient name (case-insensitive)")
+    parser.add_argument("--action", help="action, e.g. secure_delete")
+    parser.add_argument("--file", help="file path or file name")
+    parser.add_argument("--since", help="inclusive start, e.g. 2026-07-01")
+    parser.add_argument("--until", help="exclusive end, e.g. 2026-10-01")
+    parser.add_argument("--verify", action="store_true", help="check the log for tampering instead of querying")
+    parser.add_argument("--full", action="store_true", help="with --verify, re-check the whole history")
+    args = parser.parse_args(argv)
+
+    if args.verify:
+        result = verify(args.full)
+        for problem in result.problems:
+            print(f"PROBLEM {problem}")
+        print(f"Verified {result.rows} rows" + (" since the last checkpoint" if result.resumed_from else ""))
+        return 0 if result.ok else 1
+
+    writer = csv.writer(sys.stdout)
+    writer.writerow(HEADER)
+    for row in query(args.patient, args.action, args.file, args.since, args.until):
+        writer.writerow([row.get(column) or "" for column in HEADER])
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,416 @@
+"""
+Offline benchmarks for the hot paths, with comparison against a stored baseline.
+
+Synthetic fixtures (multi-hour filler-heavy transcripts, large template
+sets, tens of thousands of transcription files, long WAV recordings) are
+generated in a scratch data directory, and Google Cloud is replaced by
+in-process fakes, so no network or real patient data is involved:
+
+    python benchmark.py --output results.json
+    python benchmark.py --baseline results.json        # exit code 1 on regression
+    python benchmark.py --scale 0.1 --only clean       # quick partial run
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+# Words per minute of dictation used to size the synthetic transcripts
+WORDS_PER_MINUTE = 150
+FILLER_RATE = 0.12
+VOCABULARY = (
+    "patient presents with intermittent chest pain radiating to the left arm denies shortness of breath "
+    "history of hypertension hyperlipidemia and type two diabetes currently taking metformin lisinopril "
+    "atorvastatin blood pressure heart rate respiratory rate temperature within normal limits abdomen soft "
+    "nontender lungs clear to auscultation bilaterally assessment and plan follow up in two weeks"
+).split()
+FILLERS = ("um", "uh", "er", "ah", "you know", "like", "I mean", "sort of")
+
+# Default fixture sizes at --scale 1
+TRANSCRIPT_HOURS = 3
+TEMPLATE_COUNT = 500
+TRANSCRIPTION_FILES = 20_000
+RECORDING_MINUTES = 60
+AUDIT_ROWS = 20_000
+DELETE_FILE_MB = 64
+
+
+@dataclass
+class Case:
+    """One benchmark: ``run(setup())`` is timed, ``setup`` is not."""
+
+    name: str
+    run: Callable[[Any], Any]
+    setup: Callable[[], Any] = lambda: None
+    repeat: int = 5
+
+
+@dataclass
+class Fixtures:
+    root: Path
+    scale: float
+    transcript: str = ""
+    templates: List[Path] = field(default_factory=list)
+    recording: Optional[Path] = None
+
+
+# Fixtures -----------------------------------------------------------------------
+def _scaled(value: float, scale: float, minimum: int = 1) -> int:
+    return max(minimum, int(value * scale))
+
+
+def make_transcript(minutes: float, seed: int = 1) -> str:
+    """Dictation-like text with fillers, wrapped into sentences and paragraphs."""
+    rng = random.Random(seed)
+    words: List[str] = []
+    for index in range(int(minutes * WORDS_PER_MINUTE)):
+        words.append(rng.choice(FILLERS) if rng.random() < FILLER_RATE else rng.choice(VOCABULARY))
+        if index % 17 == 16:
+            words[-1] += "."
+        if index % 170 == 169:
+            words[-1] += "\n"
+    return " ".join(words)
+
+
+def make_templates(directory: Path, count: int, seed: int = 2) -> List[Path]:
+    rng = random.Random(seed)
+    directory.mkdir(parents=True, exist_ok=True)
+    sections = ("HISTORY", "EXAM", "ASSESSMENT", "PLAN", "MEDICATIONS", "ALLERGIES")
+    paths = []
+    for index in range(count):
+        lines = ["PATIENT: {{PATIENT}}   DOB: {{DOB}}   DATE: {{DATE}}", ""]
+        for section in rng.sample(sections, k=4):
+            lines.append(f"{section}:")
+            lines.append(" ".join(rng.choice(VOCABULARY) for _ in range(rng.randint(20, 80))))
+            lines.append("")
+        lines.append("TRANSCRIPT:\n{{ TRANSCRIPT }}\n\nSigned: {{PROVIDER}}")
+        path = directory / f"template_{index:04d}.txt"
+        path.write_text("\n".join(lines), encoding="utf-8")
+        paths.append(path)
+    return paths
+
+
+def make_transcription_files(directory: Path, count: int) -> None:
+    """Plaintext files named like saved transcriptions (listing only looks at names and stats)."""
+    directory.mkdir(parents=True, exist_ok=True)
+    for index in range(count):
+        name = f"Patient_{index:06d}_19{index % 90 + 10:02d}0101_2026{index % 12 + 1:02d}01_{index % 240000:06d}.txt"
+        (directory / name).write_text("benchmark transcription\n", encoding="utf-8")
+    # Backdate the folder so the index trusts its mtime, as on a settled clinic machine
+    settled = time.time() - 60
+    os.utime(directory, (settled, settled))
+
+
+def make_recording(path: Path, minutes: float, seed: int = 3) -> Path:
+    """Speech-like bursts between pauses, written encrypted like real recordings."""
+    import numpy as np
+    import soundfile as sf
+
+    from config import SAMPLE_RATE
+    from encrypted_storage import open_file
+
+    rng = np.random.default_rng(seed)
+    block = SAMPLE_RATE * 10
+    total = int(minutes * 60 * SAMPLE_RATE)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open_file(path, "wb") as raw, sf.SoundFile(
+        raw, mode="w", samplerate=SAMPLE_RATE, channels=1, format="WAV", subtype="PCM_16"
+    ) as destination:
+        for start in range(0, total, block):
+            count = min(block, total - start)
+            t = np.arange(start, start + count) / SAMPLE_RATE
+            envelope = (np.sin(2 * np.pi * 0.15 * t) > -0.2) * (0.5 + 0.5 * np.sin(2 * np.pi * 3 * t))
+            tone = 0.3 * envelope * np.sin(2 * np.pi * (180 + 40 * np.sin(2 * np.pi * 0.5 * t)) * t)
+            destination.write((tone + rng.normal(0, 0.003, count)).astype("float32"))
+    return path
+
+
+# Fake Google Cloud --------------------------------------------------------------
+class FakeWriter:
+    def __init__(self, blob: "FakeBlob") -> None:
+        self.blob = blob
+
+    def write(self, data) -> int:
+        self.blob.size += len(data)
+        return len(data)
+
+    def __enter__(self) -> "FakeWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        return None
+
+
+class FakeBlob:
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.size = 0
+
+    def open(self, mode: str = "wb", **_options) -> FakeWriter:
+        return FakeWriter(self)
+
+    def compose(self, sources) -> None:
+        self.size = sum(source.size for source in sources)
+
+    def delete(self) -> None:
+        pass
+
+
+class FakeBucket:
+    def blob(self, name: str) -> FakeBlob:
+        return FakeBlob(name)
+
+
+class FakeStorageClient:
+    def bucket(self, _name: str) -> FakeBucket:
+        return FakeBucket()
+
+
+class FakeOperation:
+    def __init__(self, response) -> None:
+        self._response = response
+
+    def done(self) -> bool:
+        return True
+
+    def result(self, timeout=None):
+        return self._response
+
+
+class FakeSpeechClient:
+    """Answers instantly with a fixed transcript per request."""
+
+    def __init__(self) -> None:
+        from gcloud_clients import speech_types
+
+        types = speech_types()
+        result = types.SpeechRecognitionResult(
+            alternatives=[types.SpeechRecognitionAlternative(transcript="patient presents with chest pain")]
+        )
+        self._recognize = types.RecognizeResponse(results=[result])
+        self._long_running = types.LongRunningRecognizeResponse(results=[result])
+
+    def recognize(self, config=None, audio=None):
+        return self._recognize
+
+    def long_running_recognize(self, config=None, audio=None):
+        return FakeOperation(self._long_running)
+
+
+# Cases --------------------------------------------------------------------------
+def build_cases(fixtures: Fixtures) -> List[Case]:
+    import audit_logger
+    import file_manager
+    from config import RECORDINGS_DIR, TRANSCRIPTIONS_DIR
+    from encrypted_storage import open_file, write_text
+    from template_manager import apply_template, get_template
+    from transcription_cleaner import remove_filler_words
+    from transcription_index import TranscriptionIndex
+
+    scale = fixtures.scale
+    context = {"PATIENT": "Jane Doe", "DOB": "19700101", "DATE": "2026-10-17", "PROVIDER": "Dr. Smith"}
+    cases = [
+        Case("clean.remove_filler_words", lambda _: remove_filler_words(fixtures.transcript)),
+        Case(
+            "template.apply_cold",
+            lambda _: [apply_template(path, fixtures.transcript, context) for path in fixtures.templates],
+            setup=lambda: _touch_all(fixtures.templates),
+            repeat=3,
+        ),
+        Case(
+            "template.apply_warm",
+            lambda _: [apply_template(path, fixtures.transcript, context) for path in fixtures.templates],
+            setup=lambda: [get_template(path) for path in fixtures.templates],
+        ),
+    ]
+
+    def cold_index():
+        journal = fixtures.root / "bench-index.jsonl"
+        journal.unlink(missing_ok=True)
+        return TranscriptionIndex(TRANSCRIPTIONS_DIR, journal)
+
+    cases += [
+        Case("list.cold_scan", lambda index: (index.refresh(), index.page()), setup=cold_index, repeat=3),
+        Case("list.warm", lambda _: file_manager.list_transcriptions(), setup=file_manager.list_transcriptions),
+    ]
+
+    scratch = fixtures.root / "delete"
+    scratch.mkdir(exist_ok=True)
+    delete_bytes = _scaled(DELETE_FILE_MB, scale) * 1024 * 1024
+
+    def encrypted_files():
+        paths = [scratch / f"note_{index}.txt" for index in range(100)]
+        for path in paths:
+            write_text(path, fixtures.transcript[:20_000])
+        return paths
+
+    def plaintext_file():
+        path = scratch / "legacy.wav"
+        with path.open("wb") as handle:
+            handle.write(os.urandom(delete_bytes))
+        return path
+
+    cases += [
+        Case("secure_delete.shred_100", lambda paths: [file_manager.secure_delete(path) for path in paths], setup=encrypted_files),
+        Case("secure_delete.overwrite", file_manager.secure_delete, setup=plaintext_file, repeat=3),
+    ]
+
+    rows = _scaled(AUDIT_ROWS, scale)
+
+    def audit_burst(_):
+        for index in range(rows):
+            audit_logger.log("benchmark", f"file_{index}.txt", "Jane Doe", "synthetic row")
+        audit_logger.flush()
+
+    cases.append(Case("audit.log_flush", audit_burst, repeat=3))
+
+    if fixtures.recording is not None:
+        import gcloud_clients
+        import gcloud_transcriber
+
+        gcloud_clients.configure(speech_client=FakeSpeechClient(), storage_client=FakeStorageClient())
+        source = fixtures.recording
+
+        def staged_copy():
+            # A re-encrypted copy with its own key, since the pipeline deletes what it uploads
+            target = RECORDINGS_DIR / "bench_upload.wav"
+            with open_file(source) as reader, open_file(target, "wb") as writer:
+                shutil.copyfileobj(reader, writer, 1024 * 1024)
+            return target
+
+        cases += [
+            Case("upload.upload_and_transcribe", gcloud_transcriber.upload_and_transcribe, setup=staged_copy, repeat=3),
+            Case("upload.transcribe_recording", gcloud_transcriber.transcribe_recording, setup=staged_copy, repeat=3),
+        ]
+    return cases
+
+
+def _touch_all(paths: List[Path]) -> None:
+    """Bump mtimes so every template is re-read and recompiled."""
+    now = time.time_ns()
+    for offset, path in enumerate(paths):
+        os.utime(path, ns=(now + offset, now + offset))
+
+
+# Runner -------------------------------------------------------------------------
+def _wanted(group: str, only: List[str]) -> bool:
+    """Whether any case of ``group`` (e.g. "list") was selected with --only."""
+    return not only or any(prefix.split(".")[0] == group or group.startswith(prefix) for prefix in only)
+
+
+def run_case(case: Case) -> Dict[str, Any]:
+    """Time ``case.repeat`` runs after one untimed warm-up run."""
+    case.run(case.setup())
+    timings = []
+    for _ in range(case.repeat):
+        argument = case.setup()
+        start = time.perf_counter()
+        case.run(argument)
+        timings.append(time.perf_counter() - start)
+    return {
+        "median": statistics.median(timings),
+        "min": min(timings),
+        "runs": [round(value, 6) for value in timings],
+    }
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """
+    Return a message for each case more than ``tolerance`` slower than baseline.
+
+    Best-of-N times are compared, as they are the least affected by other
+    load on the machine.
+    """
+    if baseline.get("scale") != results.get("scale"):
+        return [f"baseline was recorded at scale {baseline.get('scale')}, not {results.get('scale')}"]
+    regressions = []
+    for name, result in results["cases"].items():
+        previous = baseline.get("cases", {}).get(name)
+        if not previous:
+            continue
+        ratio = result["min"] / max(previous["min"], 1e-9)
+        result["baseline_ratio"] = round(ratio, 3)
+        if ratio > 1 + tolerance:
+            regressions.append(f"{name}: {result['min']:.4f}s vs {previous['min']:.4f}s baseline ({ratio:.2f}x)")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the transcription hot paths offline.")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply every fixture size (default 1)")
+    parser.add_argument("--only", action="append", default=[], help="run cases whose name starts with this")
+    parser.add_argument("--output", type=Path, help="write results as JSON (use as a later --baseline)")
+    parser.add_argument("--baseline", type=Path, help="compare against a previous --output file")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown vs baseline (default 0.25)")
+    parser.add_argument("--keep", action="store_true", help="keep the scratch data directory")
+    args = parser.parse_args(argv)
+
+    # Point every data directory at scratch space before the app modules read config
+    root = Path(tempfile.mkdtemp(prefix="transcriber-bench-"))
+    os.environ["TRANSCRIBER_DATA_DIR"] = str(root)
+    try:
+        fixtures = Fixtures(root=root, scale=args.scale)
+        print("Generating fixtures…", file=sys.stderr)
+        fixtures.transcript = make_transcript(TRANSCRIPT_HOURS * 60 * args.scale)
+        if _wanted("template", args.only):
+            fixtures.templates = make_templates(root / "templates", _scaled(TEMPLATE_COUNT, args.scale))
+        if _wanted("list", args.only):
+            from config import TRANSCRIPTIONS_DIR
+
+            make_transcription_files(TRANSCRIPTIONS_DIR, _scaled(TRANSCRIPTION_FILES, args.scale))
+        if _wanted("upload", args.only):
+            from config import RECORDINGS_DIR
+
+            fixtures.recording = make_recording(root / "fixtures" / "recording.wav", RECORDING_MINUTES * args.scale)
+            RECORDINGS_DIR.mkdir(parents=True, exist_ok=True)
+
+        results: Dict[str, Any] = {
+            "created": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "scale": args.scale,
+            "cases": {},
+        }
+        for case in build_cases(fixtures):
+            if args.only and not any(case.name.startswith(prefix) for prefix in args.only):
+                continue
+            result = run_case(case)
+            results["cases"][case.name] = result
+            print(f"{case.name:<32} median {result['median']:9.4f}s   min {result['min']:9.4f}s", file=sys.stderr)
+
+        regressions: List[str] = []
+        if args.baseline:
+            regressions = compare(results, json.loads(args.baseline.read_text(encoding="utf-8")), args.tolerance)
+            for message in regressions:
+                print(f"REGRESSION {message}", file=sys.stderr)
+        output = json.dumps(results, indent=2)
+        if args.output:
+            args.output.write_text(output + "\n", encoding="utf-8")
+        else:
+            print(output)
+        return 1 if regressions else 0
+    finally:
+        import audit_logger
+
+        audit_logger.shutdown()
+        if args.keep:
+            print(f"Scratch data kept in {root}", file=sys.stderr)
+        else:
+            shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -2,28 +2,171 @@
 
 from __future__ import annotations
 
+import os
 from pathlib import Path
 
 # Base paths
 BASE_DIR = Path(__file__).resolve().parent
-TRANSCRIPTIONS_DIR = BASE_DIR / "transcriptions"
-RECORDINGS_DIR = BASE_DIR / "recordings"
-AUDIT_LOG_DIR = BASE_DIR / "audit_logs"
+# Records, logs and keys are kept under DATA_DIR (next to the application
+# unless TRANSCRIBER_DATA_DIR points elsewhere, e.g. for benchmark runs)
+DATA_DIR = Path(os.environ.get("TRANSCRIBER_DATA_DIR") or BASE_DIR)
+TRANSCRIPTIONS_DIR = DATA_DIR / "transcriptions"
+RECORDINGS_DIR = DATA_DIR / "recordings"
+AUDIT_LOG_DIR = DATA_DIR / "audit_logs"
 TEMPLATES_DIR = BASE_DIR / "templates"
+QUEUE_DIR = DATA_DIR / "queue"
+INDEX_DIR = DATA_DIR / "index"
+KEYSTORE_DIR = DATA_DIR / "keystore"
+METRICS_DIR = DATA_DIR / "metrics"
+CACHE_DIR = DATA_DIR / "cache"
 
 # Google Cloud
 GCS_BUCKET = "transcribe_bucket9788"
 LANGUAGE_CODE = "en-US"
 GCS_MODEL = "medical_conversation"
+# Audio is transcoded before upload: "FLAC" (lossless, roughly half the size
+# of the WAV), "OGG_OPUS" (lossy, smallest) or "LINEAR16" (upload WAV as-is)
+UPLOAD_ENCODING = "FLAC"
+# Uploads are resumable and sent in GCS_CHUNK_SIZE pieces (a multiple of
+# 256 KiB), each retried on failure. Files above GCS_COMPOSITE_THRESHOLD are
+# split into GCS_COMPOSITE_PARTS parts (max 32) uploaded in parallel and
+# composed server-side.
+GCS_CHUNK_SIZE = 8 * 1024 * 1024
+GCS_COMPOSITE_THRESHOLD = 64 * 1024 * 1024
+GCS_COMPOSITE_PARTS = 8
+# HTTP connections kept open in the shared storage client's pool
+GCS_HTTP_POOL_SIZE = 16
+# Long-running operations are polled adaptively: starting at
+# POLL_INITIAL_SEC and backing off by POLL_BACKOFF up to POLL_INTERVAL_SEC,
+# tightening again around the expected finish (audio length x factor).
 POLL_INTERVAL_SEC = 5
+POLL_INITIAL_SEC = 0.25
+POLL_BACKOFF = 1.5
+POLL_ESTIMATE_FACTOR = 0.3
+
+# Chunked transcription: long recordings are split at quiet points and the
+# segments recognized in parallel. Segment + overlap must stay under the
+# 60 s limit of synchronous recognition.
+CHUNKED_MIN_DURATION_SEC = 120
+SEGMENT_LENGTH_SEC = 50
+SEGMENT_OVERLAP_SEC = 2
+SILENCE_SEARCH_SEC = 5
+TRANSCRIBE_MAX_WORKERS = 4
+
+# Voice activity detection: before upload, frames of VAD_FRAME_SEC are
+# classed as speech when louder than the noise floor by VAD_THRESHOLD_DB
+# (and above VAD_MIN_LEVEL_DB dBFS), widened by VAD_PADDING_SEC. Pauses
+# longer than VAD_MIN_SILENCE_SEC are shortened to VAD_KEEP_SILENCE_SEC, so
+# less audio is uploaded and recognized.
+VAD_ENABLED = True
+VAD_FRAME_SEC = 0.03
+VAD_THRESHOLD_DB = 10.0
+VAD_MIN_LEVEL_DB = -55.0
+VAD_PADDING_SEC = 0.3
+VAD_MIN_SILENCE_SEC = 1.0
+VAD_KEEP_SILENCE_SEC = 0.4
+
+# Transcription engines in order of preference: "google" (Cloud
+# Speech-to-Text) and "local" (a Vosk model in LOCAL_MODEL_DIR run on the CPU
+# in LOCAL_WORKERS processes; needs "pip install vosk"). An engine that is
+# unreachable (checked by connecting to NETWORK_CHECK_HOST, re-checked after
+# NETWORK_CHECK_TTL_SEC) or fails with a network error is skipped.
+TRANSCRIPTION_BACKENDS = ["google", "local"]
+LOCAL_MODEL_DIR = BASE_DIR / "models" / "vosk-model-en-us"
+LOCAL_WORKERS = 1
+NETWORK_CHECK_HOST = "speech.googleapis.com"
+NETWORK_CHECK_TTL_SEC = 30
+
+# Raw transcripts are cached (encrypted) keyed by a hash of the audio and
+# the recognition settings, so sending a recording again is instant. Entries
+# expire after TRANSCRIPT_CACHE_MAX_AGE_DAYS, the least recently used are
+# evicted beyond TRANSCRIPT_CACHE_MAX_BYTES, and an entry is deleted together
+# with its recording.
+TRANSCRIPT_CACHE_ENABLED = True
+TRANSCRIPT_CACHE_MAX_BYTES = 20 * 1024 * 1024
+TRANSCRIPT_CACHE_MAX_AGE_DAYS = 7
+
+# Live streaming recognition; the API closes a stream after ~5 minutes, so
+# sessions are restarted transparently before that limit
+STREAM_SESSION_SEC = 290
+# Pauses in live dictation are not streamed (when VAD_ENABLED), except one
+# frame this often so the API does not close the stream for lack of audio
+STREAM_KEEPALIVE_SEC = 2.0
+
+# Batch transcription queue (failed jobs retry with exponential back-off)
+QUEUE_WORKERS = 2
+QUEUE_MAX_ATTEMPTS = 4
+QUEUE_RETRY_BASE_SEC = 5
+QUEUE_RETRY_MAX_SEC = 300
+# Failed jobs stay listed (and in the journal) this long, or until the
+# recording is queued again
+QUEUE_FAILED_KEEP_DAYS = 7
 
 # Audio recording defaults
 SAMPLE_RATE = 16_000
 CHANNELS = 1
 AUDIO_SUBTYPE = "PCM_16"
+# Capture path: "ring" copies device blocks into a preallocated ring buffer
+# of RECORDER_RING_SEC that the writer drains in batches once
+# RECORDER_DRAIN_SEC of audio is buffered; "queue" hands each block over
+# through a queue as separate arrays.
+RECORDER_CAPTURE = "ring"
+RECORDER_RING_SEC = 30.0
+RECORDER_DRAIN_SEC = 0.5
+
+# Audit log buffering: rows are written by a background thread every
+# AUDIT_FLUSH_INTERVAL_SEC or once AUDIT_FLUSH_BATCH rows are pending.
+# AUDIT_FSYNC: "always" (write + fsync before log() returns), "batch"
+# (fsync after every flush) or "never" (leave it to the OS).
+AUDIT_FLUSH_INTERVAL_SEC = 1.0
+AUDIT_FLUSH_BATCH = 100
+AUDIT_FSYNC = "batch"
+# The active audit_log.csv is rotated into numbered segments each UTC day
+# (when AUDIT_ROTATE_DAILY) or once it reaches AUDIT_ROTATE_BYTES; rotated
+# segments are summarized in audit_index.jsonl for fast queries.
+AUDIT_ROTATE_BYTES = 16 * 1024 * 1024
+AUDIT_ROTATE_DAILY = True
+# Each audit row carries a truncated HMAC chaining it to the previous row;
+# every AUDIT_CHECKPOINT_ROWS rows the chain position is checkpointed so
+# verification can resume from the last verified checkpoint.
+AUDIT_CHAIN_BYTES = 16
+AUDIT_CHECKPOINT_ROWS = 1000
+
+# Stage timings (record, upload, recognize, clean, template, save, delete)
+# are appended to metrics/metrics.jsonl; percentiles cover the last
+# METRICS_WINDOW timings per stage. A non-zero METRICS_PORT also serves them
+# in Prometheus text format at http://127.0.0.1:<port>/metrics.
+METRICS_ENABLED = True
+METRICS_WINDOW = 1000
+METRICS_PORT = 0
+# Timings are buffered and written every METRICS_FLUSH_INTERVAL_SEC; the file
+# is rotated into numbered metrics-NNNNNN.jsonl files at METRICS_ROTATE_BYTES
+# and only the newest METRICS_KEEP_FILES of those are kept.
+METRICS_FLUSH_INTERVAL_SEC = 5.0
+METRICS_ROTATE_BYTES = 4 * 1024 * 1024
+METRICS_KEEP_FILES = 4
+
+# The file list fetches transcriptions in pages of this size as it scrolls
+FILE_LIST_PAGE_SIZE = 200
+# Long transcripts are put into the editor this many characters per event
+# loop turn, so the window keeps responding while they load
+EDITOR_INSERT_CHUNK_CHARS = 32_000
+# Words recognized with less confidence than this (0..1) are highlighted in
+# the editor, when the transcript has word timings
+LOW_CONFIDENCE_THRESHOLD = 0.6
+# Maximum transcriptions returned by a full-text search
+SEARCH_RESULT_LIMIT = 500
 
 # Security / deletion
 SECURE_OVERWRITE_PASSES = 3
+# Plaintext files are overwritten in blocks of this size from one reused buffer
+SECURE_OVERWRITE_BLOCK_SIZE = 1024 * 1024
+# Transcriptions and recordings are written encrypted (AES-256-GCM, one key
+# per file, in chunks of ENCRYPTION_CHUNK_SIZE bytes); deleting an encrypted
+# file destroys its key instead of overwriting it. Plaintext files from
+# before encryption was enabled stay readable.
+ENCRYPT_AT_REST = True
+ENCRYPTION_CHUNK_SIZE = 64 * 1024
 
 # Transcription cleaning - filler words to remove
 FILLER_WORDS = [
@@ -0,0 +1,179 @@
+"""Persistent background queue for secure deletions."""
+
+from __future__ import annotations
+
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from audit_logger import log
+from config import QUEUE_DIR
+from file_manager import secure_delete
+
+JOURNAL_FILE = QUEUE_DIR / "deletions.jsonl"
+
+StatusCallback = Optional[Callable[[str], None]]
+
+
+@dataclass
+class DeletionJob:
+    """One file waiting to be securely deleted."""
+
+    path: str
+    patient: str = ""
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    done: bool = False
+    error: str = ""
+    updated: float = field(default_factory=time.time)
+
+    @property
+    def label(self) -> str:
+        return Path(self.path).name
+
+
+class DeletionQueue:
+    """
+    Single background worker that securely deletes files in submission order.
+
+    Every job is journaled (and fsynced) before ``submit`` returns, and only
+    marked done after ``secure_delete`` has removed and audited the file, so
+    a deletion interrupted by closing the app is started again by the next
+    ``start``. Overwrite progress is reported through ``status_cb``.
+    """
+
+    def __init__(
+        self,
+        status_cb: StatusCallback = None,
+        on_complete: Optional[Callable[[DeletionJob], None]] = None,
+        journal_path: Path = JOURNAL_FILE,
+    ) -> None:
+        self.status_cb = status_cb
+        self.on_complete = on_complete
+        self.journal_path = journal_path
+        self._jobs: Dict[str, DeletionJob] = {}
+        self._ready: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._thread: Optional[threading.Thread] = None
+
+    # Lifecycle ----------------------------------------------------------------
+    def start(self) -> None:
+        """Replay the journal, requeue unfinished deletions and start the worker."""
+        with self._lock:
+            self._jobs = {job_id: job for job_id, job in self._load().items() if not job.done}
+            self._compact_locked()
+            for job in self._jobs.values():
+                self._ready.put(job.id)
+        self._thread = threading.Thread(target=self._work, name="secure-delete", daemon=True)
+        self._thread.start()
+
+    def stop(self, wait: bool = True) -> None:
+        if self._thread:
+            self._ready.put(None)
+            if wait:
+                self._thread.join()
+            self._thread = None
+
+    def join(self) -> None:
+        """Block until every submitted deletion has finished or failed."""
+        with self._idle:
+            self._idle.wait_for(lambda: all(job.done or job.error for job in self._jobs.values()))
+
+    # Public API ---------------------------------------------------------------
+    def submit(self, path: Path, patient: str = "") -> DeletionJob:
+        job = DeletionJob(path=str(path), patient=patient)
+        with self._lock:
+            self._record_locked(job)
+            self._jobs[job.id] = job
+        log("secure_delete_queued", path, patient, f"Queued for secure deletion ({job.id})")
+        self._ready.put(job.id)
+        return job
+
+    def pending(self) -> List[DeletionJob]:
+        with self._lock:
+            return [DeletionJob(**asdict(job)) for job in self._jobs.values() if not job.done]
+
+    # Worker -------------------------------------------------------------------
+    def _status(self, message: str) -> None:
+        if self.status_cb:
+            self.status_cb(message)
+
+    def _work(self) -> None:
+        while True:
+            job_id = self._ready.get()
+            if job_id is None:
+                return
+            with self._lock:
+                job = self._jobs.get(job_id)
+            if job is None or job.done:
+                continue
+            self._run(job)
+
+    def _run(self, job: DeletionJob) -> None:
+        reported = -1
+
+        def progress(written: int, total: int) -> None:
+            nonlocal reported
+            percent = written * 100 // max(total, 1)
+            if percent != reported:
+                reported = percent
+                self._status(f"Deleting {job.label}… {percent}%")
+
+        try:
+            secure_delete(Path(job.path), job.patient, progress)
+        except Exception as exc:  # The worker must outlive any one failed deletion
+            # Left unfinished in the journal, so it is retried on the next start
+            with self._lock:
+                job.error = str(exc) or type(exc).__name__
+                self._record_locked(job)
+                self._idle.notify_all()
+            log("secure_delete_failed", job.path, job.patient, f"Deletion {job.id} failed: {job.error}")
+            self._status(f"Could not delete {job.label}: {job.error}")
+            return
+        with self._lock:
+            job.done = True
+            self._record_locked(job)
+            del self._jobs[job.id]
+            self._idle.notify_all()
+        self._status(f"Deleted {job.label}")
+        if self.on_complete:
+            self.on_complete(job)
+
+    # Journal ------------------------------------------------------------------
+    def _load(self) -> Dict[str, DeletionJob]:
+        jobs: Dict[str, DeletionJob] = {}
+        if not self.journal_path.exists():
+            return jobs
+        with self.journal_path.open("r", encoding="utf-8") as handle:
+            for line in handle:
+                try:
+                    job = DeletionJob(**json.loads(line))
+                except (ValueError, TypeError):
+                    continue  # Torn write from an interrupted append
+                jobs[job.id] = job
+        return jobs
+
+    def _record_locked(self, job: DeletionJob) -> None:
+        job.updated = time.time()
+        self.journal_path.parent.mkdir(parents=True, exist_ok=True)
+        with self.journal_path.open("a", encoding="utf-8") as handle:
+            handle.write(json.dumps(asdict(job)) + "\n")
+            handle.flush()
+            os.fsync(handle.fileno())
+
+    def _compact_locked(self) -> None:
+        self.journal_path.parent.mkdir(parents=True, exist_ok=True)
+        temp = self.journal_path.with_suffix(".tmp")
+        with temp.open("w", encoding="utf-8") as handle:
+            for job in self._jobs.values():
+                job.error = ""
+                handle.write(json.dumps(asdict(job)) + "\n")
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(temp, self.journal_path)
@@ -0,0 +1,426 @@
+"""Chunked AES-GCM encryption at rest with per-file keys."""
+
+from __future__ import annotations
+
+import argparse
+import io
+import os
+import shutil
+import struct
+import sys
+from pathlib import Path
+from typing import BinaryIO, List, Optional, Union
+
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+
+from config import ENCRYPT_AT_REST, ENCRYPTION_CHUNK_SIZE, KEYSTORE_DIR
+
+MAGIC = b"TXE1"
+# magic | chunk size | file id | plaintext length | header nonce | header tag
+HEADER = struct.Struct(">4sI16sQ12s16s")
+NONCE_BYTES = 12
+TAG_BYTES = 16
+MASTER_KEY_FILE = KEYSTORE_DIR / "master.key"
+# Prefix of a master key file protected with Windows DPAPI (otherwise the file is the raw key)
+DPAPI_MAGIC = b"TXDPAPI1"
+
+
+class EncryptedFileError(OSError):
+    """An encrypted file is corrupt, was tampered with or its key is gone."""
+
+
+# Keystore -----------------------------------------------------------------------
+def _write_private(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    descriptor = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(descriptor, "wb") as handle:
+        handle.write(data)
+        handle.flush()
+        os.fsync(handle.fileno())
+
+
+def _dpapi(data: bytes, protect: bool) -> bytes:
+    """Protect or unprotect ``data`` with Windows DPAPI for the current user account."""
+    import ctypes
+
+    class Blob(ctypes.Structure):
+        _fields_ = [("size", ctypes.c_uint32), ("data", ctypes.POINTER(ctypes.c_char))]
+
+    buffer = ctypes.create_string_buffer(data, len(data))
+    source = Blob(len(data), ctypes.cast(buffer, ctypes.POINTER(ctypes.c_char)))
+    result = Blob()
+    crypt32 = ctypes.windll.crypt32  # type: ignore[attr-defined]
+    function = crypt32.CryptProtectData if protect else crypt32.CryptUnprotectData
+    ui_forbidden = 0x1
+    if not function(ctypes.byref(source), None, None, None, None, ui_forbidden, ctypes.byref(result)):
+        raise ctypes.WinError()  # type: ignore[attr-defined]
+    try:
+        return ctypes.string_at(result.data, result.size)
+    finally:
+        ctypes.windll.kernel32.LocalFree(result.data)  # type: ignore[attr-defined]
+
+
+def _seal(key: bytes) -> bytes:
+    return DPAPI_MAGIC + _dpapi(key, protect=True) if os.name == "nt" else key
+
+
+def _unseal(stored: bytes) -> bytes:
+    if stored.startswith(DPAPI_MAGIC):
+        return _dpapi(stored[len(DPAPI_MAGIC):], protect=False)
+    return stored
+
+
+def _master_secret() -> bytes:
+    """
+    The key that wraps every per-file key (and from which ``derive_key`` keys come).
+
+    On Windows it is stored protected by DPAPI, so the file alone (e.g. a
+    copied disk or SSD spare blocks) is useless without the user's Windows
+    logon; elsewhere it is a private (0600) plain file.
+    """
+    try:
+        _write_private(MASTER_KEY_FILE, _seal(AESGCM.generate_key(bit_length=256)))
+    except FileExistsError:
+        pass
+    stored = MASTER_KEY_FILE.read_bytes()
+    key = _unseal(stored)
+    if os.name == "nt" and not stored.startswith(DPAPI_MAGIC):
+        # Key from before DPAPI protection: protect it from now on
+        temp = MASTER_KEY_FILE.with_suffix(".tmp")
+        temp.unlink(missing_ok=True)
+        _write_private(temp, _seal(key))
+        os.replace(temp, MASTER_KEY_FILE)
+    return key
+
+
+def _master_key() -> AESGCM:
+    return AESGCM(_master_secret())
+
+
+def derive_key(purpose: str, length: int = 32) -> bytes:
+    """
+    A secret key for ``purpose`` (e.g. "audit-chain"), derived from the master key.
+
+    Nothing is stored beside the data it protects: the key is recomputed
+    (HKDF-SHA256) from the keystore's master key whenever it is needed.
+    """
+    kdf = HKDF(algorithm=hashes.SHA256(), length=length, salt=None, info=f"transcriber/{purpose}".encode("utf-8"))
+    return kdf.derive(_master_secret())
+
+
+def _key_path(file_id: bytes) -> Path:
+    return KEYSTORE_DIR / f"{file_id.hex()}.key"
+
+
+def _create_file_key(file_id: bytes) -> bytes:
+    """Generate a data key for a new file and store it wrapped by the master key."""
+    key = AESGCM.generate_key(bit_length=256)
+    nonce = os.urandom(NONCE_BYTES)
+    _write_private(_key_path(file_id), nonce + _master_key().encrypt(nonce, key, file_id))
+    return key
+
+
+def _load_file_key(file_id: bytes) -> bytes:
+    try:
+        wrapped = _key_path(file_id).read_bytes()
+    except FileNotFoundError:
+        raise EncryptedFileError(f"Key for file {file_id.hex()} not found (file was shredded?)") from None
+    try:
+        return _master_key().decrypt(wrapped[:NONCE_BYTES], wrapped[NONCE_BYTES:], file_id)
+    except InvalidTag:
+        raise EncryptedFileError(f"Key for file {file_id.hex()} is corrupt") from None
+
+
+def _destroy_file_key(file_id: bytes) -> None:
+    path = _key_path(file_id)
+    try:
+        size = path.stat().st_size
+        with path.open("r+b") as handle:
+            handle.write(os.urandom(size))
+            handle.flush()
+            os.fsync(handle.fileno())
+        path.unlink()
+    except FileNotFoundError:
+        pass
+
+
+def _read_file_id(path: Path) -> Optional[bytes]:
+    """Return the file id of an encrypted file, or None if it is missing or plaintext."""
+    try:
+        with path.open("rb") as handle:
+            header = handle.read(HEADER.size)
+    except FileNotFoundError:
+        return None
+    if len(header) != HEADER.size or not header.startswith(MAGIC):
+        return None
+    return HEADER.unpack(header)[2]
+
+
+# Encrypted file -----------------------------------------------------------------
+class EncryptedFile(io.RawIOBase):
+    """
+    Seekable, random-access file encrypted in fixed-size chunks.
+
+    Each ENCRYPTION_CHUNK_SIZE chunk is sealed with AES-256-GCM under the
+    file's own key, a fresh random nonce and the file id plus chunk index as
+    associated data, so chunks cannot be altered, reordered or moved between
+    files. The plaintext length lives in an authenticated header, so
+    truncation is detected too. Only the chunk being read or written is held
+    in memory, so arbitrarily long recordings stream in constant space.
+
+    ``mode`` is "rb", "r+b" or "wb" (create); the header is brought up to
+    date by ``flush`` and ``close``.
+    """
+
+    def __init__(self, path: Union[str, Path], mode: str = "rb") -> None:
+        super().__init__()
+        if mode not in ("rb", "r+b", "wb"):
+            raise ValueError(f"Unsupported mode {mode!r}")
+        self.path = Path(path)
+        self.mode = mode
+        self._pos = 0
+        self._index = -1  # Chunk currently held in _chunk
+        self._chunk = bytearray()
+        self._dirty = False
+        self._raw: Optional[BinaryIO] = None
+        try:
+            replaced = _read_file_id(self.path) if mode == "wb" else None
+            self._raw = self.path.open("w+b" if mode == "wb" else mode)
+            if mode == "wb":
+                self._chunk_size = ENCRYPTION_CHUNK_SIZE
+                self._file_id = os.urandom(16)
+                self._aead = AESGCM(_create_file_key(self._file_id))
+                self._length = 0
+                self._write_header()
+                if replaced:
+                    _destroy_file_key(replaced)  # The overwritten contents' key is no longer needed
+            else:
+                self._read_header()
+        except BaseException:
+            if self._raw:
+                self._raw.close()
+            super().close()  # Nothing to flush
+            raise
+
+    @property
+    def name(self) -> str:
+        return str(self.path)
+
+    @property
+    def file_id(self) -> bytes:
+        return self._file_id
+
+    # Header -------------------------------------------------------------------
+    def _header_aad(self) -> bytes:
+        return MAGIC + struct.pack(">I16sQ", self._chunk_size, self._file_id, self._length)
+
+    def _write_header(self) -> None:
+        nonce = os.urandom(NONCE_BYTES)
+        tag = self._aead.encrypt(nonce, b"", self._header_aad())
+        self._raw.seek(0)
+        self._raw.write(HEADER.pack(MAGIC, self._chunk_size, self._file_id, self._length, nonce, tag))
+
+    def _read_header(self) -> None:
+        data = self._raw.read(HEADER.size)
+        if len(data) != HEADER.size or not data.startswith(MAGIC):
+            raise EncryptedFileError(f"{self.path.name} is not an encrypted file")
+        _magic, self._chunk_size, self._file_id, self._length, nonce, tag = HEADER.unpack(data)
+        self._aead = AESGCM(_load_file_key(self._file_id))
+        try:
+            self._aead.decrypt(nonce, tag, self._header_aad())
+        except InvalidTag:
+            raise EncryptedFileError(f"{self.path.name}: header failed authentication") from None
+
+    # Chunks -------------------------------------------------------------------
+    def _record_offset(self, index: int) -> int:
+        return HEADER.size + index * (NONCE_BYTES + self._chunk_size + TAG_BYTES)
+
+    def _chunk_aad(self, index: int) -> bytes:
+        return self._file_id + struct.pack(">Q", index)
+
+    def _load(self, index: int) -> None:
+        if index == self._index:
+            return
+        self._store()
+        start = index * self._chunk_size
+        size = min(self._chunk_size, self._length - start)
+        if size <= 0:
+            self._chunk = bytearray()
+        else:
+            self._raw.seek(self._record_offset(index))
+            record = self._raw.read(NONCE_BYTES + size + TAG_BYTES)
+            try:
+                plain = self._aead.decrypt(record[:NONCE_BYTES], record[NONCE_BYTES:], self._chunk_aad(index))
+            except InvalidTag:
+                raise EncryptedFileError(f"{self.path.name}: chunk {index} failed authentication") from None
+            self._chunk = bytearray(plain)
+        self._index = index
+
+    def _store(self) -> None:
+        if not self._dirty:
+            return
+        nonce = os.urandom(NONCE_BYTES)
+        sealed = self._aead.encrypt(nonce, bytes(self._chunk), self._chunk_aad(self._index))
+        self._raw.seek(self._record_offset(self._index))
+        self._raw.write(nonce + sealed)
+        self._dirty = False
+
+    # RawIOBase ----------------------------------------------------------------
+    def readable(self) -> bool:
+        return True
+
+    def writable(self) -> bool:
+        return self.mode != "rb"
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        # Fill the whole buffer across chunk boundaries; callers such as
+        # libsndfile treat a short read as end of file
+        view = memoryview(buffer).cast("B")
+        filled = 0
+        while filled < len(view) and self._pos < self._length:
+            index, start = divmod(self._pos, self._chunk_size)
+            self._load(index)
+            count = min(len(view) - filled, len(self._chunk) - start)
+            view[filled : filled + count] = self._chunk[start : start + count]
+            filled += count
+            self._pos += count
+        return filled
+
+    def write(self, data) -> int:
+        if not self.writable():
+            raise io.UnsupportedOperation("File not open for writing")
+        if self._pos > self._length:
+            # Seeked past the end: fill the gap so every earlier chunk is complete
+            target, self._pos = self._pos, self._length
+            while self._pos < target:
+                self.write(bytes(min(self._chunk_size, target - self._pos)))
+        view = memoryview(data).cast("B")
+        total = len(view)
+        while view:
+            index, start = divmod(self._pos, self._chunk_size)
+            self._load(index)
+            count = min(self._chunk_size - start, len(view))
+            self._chunk[start : start + count] = view[:count]
+            self._dirty = True
+            view = view[count:]
+            self._pos += count
+            self._length = max(self._length, self._pos)
+        return total
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self._pos + offset
+        elif whence == io.SEEK_END:
+            position = self._length + offset
+        else:
+            raise ValueError(f"Invalid whence {whence}")
+        if position < 0:
+            raise ValueError("Negative seek position")
+        self._pos = position
+        return position
+
+    def tell(self) -> int:
+        return self._pos
+
+    def flush(self) -> None:
+        """Encrypt the pending chunk and update the header, making the data so far readable."""
+        if not self.closed and self.writable():
+            self._store()
+            self._write_header()
+            self._raw.flush()
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        try:
+            super().close()  # Flushes first
+        finally:
+            if self._raw:
+                self._raw.close()
+
+
+# Helpers ------------------------------------------------------------------------
+def is_encrypted(path: Path) -> bool:
+    try:
+        with path.open("rb") as handle:
+            return handle.read(len(MAGIC)) == MAGIC
+    except FileNotFoundError:
+        return False
+
+
+def open_file(path: Path, mode: str = "rb") -> BinaryIO:
+    """
+    Open a data file for binary I/O, decrypting or encrypting transparently.
+
+    New files ("wb") are encrypted when ENCRYPT_AT_REST is set; existing
+    files are read according to what they are, so plaintext files written
+    before encryption was enabled stay readable.
+    """
+    if mode == "wb":
+        return EncryptedFile(path, "wb") if ENCRYPT_AT_REST else path.open("wb")
+    return EncryptedFile(path, mode) if is_encrypted(path) else path.open(mode)
+
+
+def plain_size(path: Path) -> int:
+    """Size of the decrypted contents."""
+    with open_file(path) as handle:
+        return handle.seek(0, io.SEEK_END)
+
+
+def read_text(path: Path) -> str:
+    with open_file(path) as handle:
+        return handle.read().decode("utf-8")
+
+
+def write_text(path: Path, content: str) -> None:
+    with open_file(path, "wb") as handle:
+        handle.write(content.encode("utf-8"))
+
+
+def shred(path: Path) -> bool:
+    """
+    Crypto-shred an encrypted file: overwrite and delete its key, then unlink it.
+
+    The file is then unreadable through the filesystem and its ciphertext
+    needs no overwrite passes. An SSD may still hold old copies of the
+    wrapped key in spare blocks; those only open with the master key, which
+    is DPAPI-protected on Windows but a plain file on other systems. Returns
+    False, leaving the file alone, if it is not encrypted.
+    """
+    file_id = _read_file_id(path)
+    if file_id is None:
+        return False
+    _destroy_file_key(file_id)
+    try:
+        path.unlink()
+    except FileNotFoundError:
+        pass
+    return True
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Write the decrypted contents of an encrypted file to stdout or a file."""
+    parser = argparse.ArgumentParser(description="Decrypt a transcription or recording.")
+    parser.add_argument("source", type=Path)
+    parser.add_argument("-o", "--output", type=Path, help="write here instead of stdout")
+    args = parser.parse_args(argv)
+
+    with open_file(args.source) as source:
+        if args.output:
+            with args.output.open("wb") as destination:
+                shutil.copyfileobj(source, destination, ENCRYPTION_CHUNK_SIZE)
+        else:
+            shutil.copyfileobj(source, sys.stdout.buffer, ENCRYPTION_CHUNK_SIZE)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -4,23 +4,39 @@ from __future__ import annotations
 
 import os
 import re
-import secrets
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Iterable, List
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 
 from audit_logger import log
 from config import (
+    FILE_LIST_PAGE_SIZE,
     RECORDINGS_DIR,
+    SEARCH_RESULT_LIMIT,
+    SECURE_OVERWRITE_BLOCK_SIZE,
     SECURE_OVERWRITE_PASSES,
     TRANSCRIPTIONS_DIR,
 )
+from encrypted_storage import read_text, shred, write_text
+from metrics import timed
+from structured_transcript import WordTimings, sidecar_path
+from transcript_cache import forget_source
+from transcription_index import TranscriptionEntry, TranscriptionIndex
+from transcription_search import SearchIndex
 
 for directory in (TRANSCRIPTIONS_DIR, RECORDINGS_DIR):
     directory.mkdir(parents=True, exist_ok=True)
 
 SANITIZE_PATTERN = re.compile(r"[^A-Za-z0-9_-]+")
 
+# Called with (bytes written, total bytes) while a file is overwritten
+DeleteProgressCallback = Optional[Callable[[int, int], None]]
+
+_index = TranscriptionIndex()
+_search = SearchIndex()
+
 
 def sanitize_component(value: str) -> str:
     cleaned = SANITIZE_PATTERN.sub("_", value.strip())
@@ -34,39 +50,101 @@ def generate_filename(patient: str, dob: str) -> Path:
     return TRANSCRIPTIONS_DIR / f"{safe_patient}_{safe_dob}_{timestamp}.txt"
 
 
+def _is_indexed(path: Path) -> bool:
+    return path.suffix == ".txt" and path.resolve().parent == TRANSCRIPTIONS_DIR.resolve()
+
+
 def list_transcriptions() -> List[Path]:
-    files = list(TRANSCRIPTIONS_DIR.glob("*.txt"))
-    files.sort(key=lambda path: path.stat().st_mtime, reverse=True)
-    return files
+    _index.refresh()
+    return [entry.path for entry in _index.page()]
+
+
+def transcription_page(offset: int = 0, limit: int = FILE_LIST_PAGE_SIZE) -> Tuple[List[TranscriptionEntry], int]:
+    """Return one page of transcriptions, newest first, and the total count."""
+    if offset == 0:
+        _index.refresh()
+    return _index.page(offset, limit), _index.count()
+
+
+def search_transcriptions(query: str, limit: int = SEARCH_RESULT_LIMIT) -> List[Path]:
+    """Return transcriptions containing every word of ``query``, best matches first."""
+    paths = [TRANSCRIPTIONS_DIR / name for name in _search.search(query, limit)]
+    log("search_transcriptions", TRANSCRIPTIONS_DIR, "", f"Full-text search returned {len(paths)} files")
+    return paths
 
 
-def save_transcription(path: Path, content: str) -> None:
-    path.write_text(content, encoding="utf-8")
+def reindex_search() -> int:
+    """Index transcriptions added or changed outside the app and purge removed ones."""
+    _index.refresh()
+    return _search.reconcile(_index.page(), load_transcription)
+
+
+@timed("save")
+def save_transcription(path: Path, content: str, words: Optional[WordTimings] = None) -> None:
+    """Save a transcription, plus its word timings as an encrypted ``.words`` sidecar when given."""
+    write_text(path, content)
+    if words is not None:
+        words.save(sidecar_path(path))
+    if _is_indexed(path):
+        _index.update(path)
+        _search.add(path, content)
     log("save_transcription", path, "", "Saved transcription")
 
 
 def load_transcription(path: Path) -> str:
-    return path.read_text(encoding="utf-8")
+    return read_text(path)
 
 
-def secure_delete(file_path: Path, patient: str = "") -> None:
-    if not file_path.exists():
-        return
+def _overwrite(file_path: Path, progress: DeleteProgressCallback = None) -> None:
+    """
+    Overwrite a file SECURE_OVERWRITE_PASSES times with random data, then unlink it.
+
+    Random data is an AES-CTR keystream under a fresh key per pass, generated
+    block by block into one reused buffer, so memory use is constant and
+    generation is much faster than the OS CSPRNG.
+    """
     size = file_path.stat().st_size
     if size > 0:
+        block = min(SECURE_OVERWRITE_BLOCK_SIZE, size)
+        zeros = memoryview(bytes(block))
+        buffer = bytearray(block + 15)  # update_into needs room for one extra AES block
+        random_block = memoryview(buffer)
+        written = 0
         with file_path.open("r+b") as handle:
             for _ in range(SECURE_OVERWRITE_PASSES):
+                keystream = Cipher(algorithms.AES(os.urandom(32)), modes.CTR(os.urandom(16))).encryptor()
                 handle.seek(0)
-                handle.write(secrets.token_bytes(size))
+                remaining = size
+                while remaining:
+                    count = min(block, remaining)
+                    keystream.update_into(zeros[:count], buffer)
+                    handle.write(random_block[:count])
+                    remaining -= count
+                    written += count
+                    if progress:
+                        progress(written, size * SECURE_OVERWRITE_PASSES)
                 handle.flush()
                 os.fsync(handle.fileno())
-    try:
-        file_path.unlink()
-    except FileNotFoundError:
+    file_path.unlink()
+
+
+@timed("secure_delete")
+def secure_delete(file_path: Path, patient: str = "", progress: DeleteProgressCallback = None) -> None:
+    """Delete a file unrecoverably: crypto-shred it if encrypted, otherwise overwrite it."""
+    forget_source(file_path)  # A cached transcript must not outlive its recording
+    if file_path.suffix == ".txt" and sidecar_path(file_path).exists():
+        secure_delete(sidecar_path(file_path), patient)
+    if not file_path.exists():
         return
-    log(
-        "secure_delete",
-        file_path,
-        patient,
-        f"Overwritten {SECURE_OVERWRITE_PASSES} passes and deleted",
-    )
+    if shred(file_path):
+        details = "File key destroyed (crypto-shredded) and deleted"
+    else:
+        try:
+            _overwrite(file_path, progress)
+        except FileNotFoundError:
+            return
+        details = f"Overwritten {SECURE_OVERWRITE_PASSES} passes and deleted"
+    if _is_indexed(file_path):
+        _index.remove(file_path)
+        _search.remove(file_path)
+    log("secure_delete", file_path, patient, details)
@@ -0,0 +1,76 @@
+"""Lazily constructed, shared Google Cloud clients."""
+
+from __future__ import annotations
+
+import os
+import threading
+from typing import Any, Optional
+
+from config import GCS_HTTP_POOL_SIZE
+
+_lock = threading.Lock()
+_speech_client: Any = None
+_storage_client: Any = None
+
+
+def speech_types():
+    """Return ``google.cloud.speech_v1.types``, importing it on first use."""
+    from google.cloud.speech_v1 import types
+
+    return types
+
+
+def get_speech_client():
+    """Return the shared Speech client, creating it (and its gRPC channel) on first use."""
+    global _speech_client
+    if _speech_client is None:
+        with _lock:
+            if _speech_client is None:
+                from google.cloud import speech
+
+                _speech_client = speech.SpeechClient()
+    return _speech_client
+
+
+def get_storage_client():
+    """Return the shared Storage client, backed by a pooled HTTP session."""
+    global _storage_client
+    if _storage_client is None:
+        with _lock:
+            if _storage_client is None:
+                _storage_client = _build_storage_client()
+    return _storage_client
+
+
+def _build_storage_client():
+    from google.cloud import storage
+
+    if os.environ.get("STORAGE_EMULATOR_HOST"):
+        return storage.Client()  # Emulator: anonymous credentials, default transport
+
+    import google.auth
+    from google.auth.transport.requests import AuthorizedSession
+    from requests.adapters import HTTPAdapter
+
+    credentials, project = google.auth.default()
+    session = AuthorizedSession(credentials)
+    # Parallel chunk/part uploads each need their own connection
+    adapter = HTTPAdapter(pool_connections=GCS_HTTP_POOL_SIZE, pool_maxsize=GCS_HTTP_POOL_SIZE)
+    session.mount("https://", adapter)
+    return storage.Client(project=project, credentials=credentials, _http=session)
+
+
+def configure(speech_client: Optional[Any] = None, storage_client: Optional[Any] = None) -> None:
+    """Install replacement clients (fakes, emulators); ``None`` leaves a client unchanged."""
+    global _speech_client, _storage_client
+    with _lock:
+        if speech_client is not None:
+            _speech_client = speech_client
+        if storage_client is not None:
+            _storage_client = storage_client
+
+
+def warm_up() -> None:
+    """Construct both clients now, e.g. from a background thread after startup."""
+    get_speech_client()
+    get_storage_client()
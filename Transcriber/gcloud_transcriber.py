@@ -2,26 +2,68 @@
 
 from __future__ import annotations
 
+import asyncio
+import io
+import math
+import re
+import string
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 from pathlib import Path
-from typing import Callable, Optional
+from typing import TYPE_CHECKING, Callable, Iterator, List, Optional, Sequence, Tuple
 
-from google.cloud import speech, storage
-from google.cloud.speech_v1 import types
+import numpy as np
+import soundfile as sf
 
 from audit_logger import log
 from config import (
+    CHUNKED_MIN_DURATION_SEC,
     GCS_BUCKET,
+    GCS_CHUNK_SIZE,
+    GCS_COMPOSITE_PARTS,
+    GCS_COMPOSITE_THRESHOLD,
     GCS_MODEL,
     LANGUAGE_CODE,
+    POLL_BACKOFF,
+    POLL_ESTIMATE_FACTOR,
+    POLL_INITIAL_SEC,
     POLL_INTERVAL_SEC,
     SAMPLE_RATE,
+    SEGMENT_LENGTH_SEC,
+    SEGMENT_OVERLAP_SEC,
+    SILENCE_SEARCH_SEC,
+    TRANSCRIBE_MAX_WORKERS,
+    UPLOAD_ENCODING,
+    VAD_ENABLED,
 )
+from encrypted_storage import open_file, plain_size
+from file_manager import secure_delete
+from gcloud_clients import get_speech_client, get_storage_client, speech_types
+from metrics import span, timed
+from structured_transcript import Transcript, WordTimings, words_of
+from voice_activity import TimeMap, trim_silence
+
+if TYPE_CHECKING:
+    from google.cloud.speech_v1 import types
 
 SpeechStatusCallback = Optional[Callable[[str], None]]
 
-speech_client = speech.SpeechClient()
-storage_client = storage.Client()
+# Energy frame used when looking for a quiet cut point
+SILENCE_FRAME_SEC = 0.02
+# Longest run of words compared when removing overlap duplicates
+OVERLAP_MAX_WORDS = 20
+
+_WORD_PATTERN = re.compile(r"\S+")
+
+# soundfile (format, subtype, suffix) used to produce each upload encoding
+UPLOAD_FORMATS = {
+    "LINEAR16": ("WAV", "PCM_16", ".wav"),
+    "FLAC": ("FLAC", "PCM_16", ".flac"),
+    "OGG_OPUS": ("OGG", "OPUS", ".ogg"),
+}
+ENCODE_BLOCK_FRAMES = 65_536
 
 
 def _set_status(callback: SpeechStatusCallback, message: str) -> None:
@@ -29,46 +71,502 @@ def _set_status(callback: SpeechStatusCallback, message: str) -> None:
         callback(message)
 
 
-def upload_and_transcribe(audio_path: Path, patient: str = "", status_cb: SpeechStatusCallback = None) -> str:
-    """Upload an audio file, run transcription, return the transcript text."""
-    if not audio_path.exists():
-        raise FileNotFoundError(audio_path)
-
-    bucket = storage_client.bucket(GCS_BUCKET)
-    blob = bucket.blob(audio_path.name)
-
-    _set_status(status_cb, "Uploading…")
-    blob.upload_from_filename(str(audio_path))
-    log("gcs_upload", audio_path, patient, "Uploaded to GCS")
-
-    gcs_uri = f"gs://{GCS_BUCKET}/{audio_path.name}"
-    audio = types.RecognitionAudio(uri=gcs_uri)
-    config = types.RecognitionConfig(
-        encoding=types.RecognitionConfig.AudioEncoding.LINEAR16,
-        sample_rate_hertz=SAMPLE_RATE,
+def recognition_config(
+    encoding: str = UPLOAD_ENCODING, sample_rate: int = SAMPLE_RATE, channels: int = 1
+) -> types.RecognitionConfig:
+    """Recognition settings for audio with the given encoding, sample rate and channel count."""
+    types = speech_types()
+    return types.RecognitionConfig(
+        encoding=getattr(types.RecognitionConfig.AudioEncoding, encoding),
+        sample_rate_hertz=sample_rate,
+        audio_channel_count=channels,
         language_code=LANGUAGE_CODE,
         model=GCS_MODEL,
         enable_automatic_punctuation=True,
+        enable_word_time_offsets=True,
+        enable_word_confidence=True,
     )
 
+
+def encode_for_upload(audio_path: Path, encoding: str = UPLOAD_ENCODING) -> Path:
+    """
+    Transcode a recording into the upload encoding, block by block.
+
+    Returns ``audio_path`` itself for LINEAR16; otherwise a sibling file with
+    the codec's suffix (encrypted at rest like the recording) that the
+    caller must securely delete after upload. If encoding fails, the partial
+    copy is securely deleted before the error propagates.
+    """
+    file_format, subtype, suffix = UPLOAD_FORMATS[encoding]
+    if encoding == "LINEAR16":
+        return audio_path
+    target = audio_path.with_suffix(suffix)
+    try:
+        with open_file(audio_path) as raw_source, open_file(target, "wb") as raw_target:
+            with sf.SoundFile(raw_source) as source, sf.SoundFile(
+                raw_target,
+                mode="w",
+                samplerate=source.samplerate,
+                channels=source.channels,
+                format=file_format,
+                subtype=subtype,
+            ) as destination:
+                for block in source.blocks(blocksize=ENCODE_BLOCK_FRAMES, dtype="int16"):
+                    destination.write(block)
+    except BaseException:
+        secure_delete(target)  # Never leave a partial copy of the recording behind
+        raise
+    return target
+
+
+def audio_duration(audio_path: Path) -> float:
+    """Length of a (possibly encrypted) recording in seconds."""
+    with open_file(audio_path) as raw:
+        return sf.info(raw).duration
+
+
+def audio_format(audio_path: Path) -> Tuple[int, int]:
+    """Sample rate and channel count of a (possibly encrypted) recording."""
+    with open_file(audio_path) as raw:
+        info = sf.info(raw)
+    return info.samplerate, info.channels
+
+
+def _seconds(duration) -> float:
+    """Seconds of a proto Duration (a timedelta in current client versions)."""
+    if hasattr(duration, "total_seconds"):
+        return duration.total_seconds()
+    return duration.seconds + duration.nanos / 1e9
+
+
+def _collect_transcript(response, offset: float = 0.0) -> Transcript:
+    """Best alternative of each result, one per line, with its words timed from ``offset``."""
+    lines: List[str] = []
+    words = WordTimings()
+    for result in response.results:
+        for alternative in result.alternatives[:1]:
+            if not alternative.transcript.strip():
+                continue
+            lines.append(alternative.transcript.strip())
+            words.new_line()
+            for info in alternative.words:
+                words.append(
+                    info.word,
+                    offset + _seconds(info.start_time),
+                    offset + _seconds(info.end_time),
+                    info.confidence or math.nan,
+                )
+    return Transcript("\n".join(lines), words)
+
+
+# Uploads -----------------------------------------------------------------------
+class _UploadProgress:
+    """Thread-safe byte counter that reports whole-percent progress."""
+
+    def __init__(self, total: int, status_cb: SpeechStatusCallback) -> None:
+        self.total = max(total, 1)
+        self.sent = 0
+        self._reported = -1
+        self._status_cb = status_cb
+        self._lock = threading.Lock()
+
+    def add(self, count: int) -> None:
+        with self._lock:
+            self.sent += count
+            percent = min(100, self.sent * 100 // self.total)
+            if percent == self._reported:
+                return
+            self._reported = percent
+            message = f"Uploading… {percent}% ({self.sent / 1e6:.1f}/{self.total / 1e6:.1f} MB)"
+        _set_status(self._status_cb, message)
+
+
+def _upload_range(blob, path: Path, offset: int, length: int, progress: _UploadProgress) -> None:
+    """
+    Resumable upload of ``length`` bytes of ``path`` from ``offset``; each chunk is retried.
+
+    Encrypted files are decrypted on the fly, so plaintext never touches the disk.
+    """
+    from google.cloud.storage.retry import DEFAULT_RETRY
+
+    with open_file(path) as source, blob.open(
+        "wb", chunk_size=GCS_CHUNK_SIZE, retry=DEFAULT_RETRY, ignore_flush=True
+    ) as writer:
+        source.seek(offset)
+        remaining = length
+        while remaining > 0:
+            block = source.read(min(GCS_CHUNK_SIZE, remaining))
+            if not block:
+                break
+            writer.write(block)
+            remaining -= len(block)
+            progress.add(len(block))
+
+
+def upload_file(path: Path, blob_name: Optional[str] = None, status_cb: SpeechStatusCallback = None, bucket=None):
+    """
+    Upload ``path`` to GCS with byte-level progress and return the blob.
+
+    Small files go up as one chunked resumable upload. Files larger than
+    GCS_COMPOSITE_THRESHOLD are split into parts uploaded concurrently and
+    composed into the final object. ``bucket`` may be a fake exposing the
+    ``blob``/``open``/``compose``/``delete`` subset; the real client also
+    honours STORAGE_EMULATOR_HOST for a local emulator.
+    """
+    bucket = bucket or get_storage_client().bucket(GCS_BUCKET)
+    blob = bucket.blob(blob_name or path.name)
+    size = plain_size(path)
+    progress = _UploadProgress(size, status_cb)
+
+    parts = min(GCS_COMPOSITE_PARTS, 32)
+    if size <= GCS_COMPOSITE_THRESHOLD or parts < 2:
+        _upload_range(blob, path, 0, size, progress)
+        return blob
+
+    part_size = math.ceil(math.ceil(size / parts) / GCS_CHUNK_SIZE) * GCS_CHUNK_SIZE
+    ranges = [(offset, min(part_size, size - offset)) for offset in range(0, size, part_size)]
+    part_blobs = [bucket.blob(f"{blob.name}.part{index:02d}") for index in range(len(ranges))]
+    try:
+        with ThreadPoolExecutor(max_workers=len(ranges)) as executor:
+            futures = [
+                executor.submit(_upload_range, part, path, offset, length, progress)
+                for part, (offset, length) in zip(part_blobs, ranges)
+            ]
+            for future in futures:
+                future.result()
+        blob.compose(part_blobs)
+    finally:
+        for part in part_blobs:
+            try:
+                part.delete()
+            except Exception:  # pragma: no cover - part never created
+                pass
+    return blob
+
+
+def poll_delays(estimate_sec: Optional[float] = None) -> Iterator[float]:
+    """
+    Yield adaptive wait intervals for polling a long-running operation.
+
+    Waits start at POLL_INITIAL_SEC and back off by POLL_BACKOFF up to
+    POLL_INTERVAL_SEC. Given an estimate of the job duration, the waits are
+    clipped to land on the expected finish, after which the back-off restarts
+    from the short interval so a completed job is noticed promptly.
+    """
+    delay = POLL_INITIAL_SEC
+    elapsed = 0.0
+    target = estimate_sec
+    while True:
+        wait = delay if target is None else min(delay, max(target - elapsed, POLL_INITIAL_SEC))
+        elapsed += wait
+        yield wait
+        if target is not None and elapsed >= target:
+            target = None
+            delay = POLL_INITIAL_SEC
+        else:
+            delay = min(delay * POLL_BACKOFF, POLL_INTERVAL_SEC)
+
+
+def _estimate_recognition_sec(audio_path: Path) -> Optional[float]:
+    try:
+        return audio_duration(audio_path) * POLL_ESTIMATE_FACTOR
+    except RuntimeError:
+        return None
+
+
+def _stage_audio(audio_path: Path, patient: str, status_cb: SpeechStatusCallback):
+    """Encode and upload the recording to GCS and return its blob."""
+    if not audio_path.exists():
+        raise FileNotFoundError(audio_path)
+
+    if UPLOAD_ENCODING != "LINEAR16":
+        _set_status(status_cb, "Encoding…")
+    with span("encode"):
+        upload_path = encode_for_upload(audio_path)
+    try:
+        _set_status(status_cb, "Uploading…")
+        with span("upload"):
+            blob = upload_file(upload_path, status_cb=status_cb)
+        log("gcs_upload", audio_path, patient, f"Uploaded to GCS as {upload_path.name} ({UPLOAD_ENCODING})")
+    finally:
+        if upload_path != audio_path:
+            secure_delete(upload_path, patient)
+    return blob
+
+
+def _start_recognition(blob, audio_path: Path, status_cb: SpeechStatusCallback):
+    gcs_uri = f"gs://{GCS_BUCKET}/{blob.name}"
+    audio = speech_types().RecognitionAudio(uri=gcs_uri)
+    config = recognition_config(UPLOAD_ENCODING, *audio_format(audio_path))
     _set_status(status_cb, "Transcribing…")
-    operation = speech_client.long_running_recognize(config=config, audio=audio)
+    return get_speech_client().long_running_recognize(config=config, audio=audio)
 
-    while not operation.done():
-        time.sleep(POLL_INTERVAL_SEC)
-        _set_status(status_cb, "Transcribing…")
 
+def _finish_recognition(operation, blob, patient: str, status_cb: SpeechStatusCallback) -> str:
     _set_status(status_cb, "Processing result…")
     response = operation.result()
-
-    transcript = "\n".join(
-        alternative.transcript.strip()
-        for result in response.results
-        for alternative in result.alternatives[:1]
-        if alternative.transcript.strip()
-    )
+    transcript = _collect_transcript(response)
 
     blob.delete()
-    log("gcs_delete", audio_path.name, patient, "Deleted blob after transcription")
+    log("gcs_delete", blob.name, patient, "Deleted blob after transcription")
     _set_status(status_cb, "Completed")
     return transcript
+
+
+def upload_and_transcribe(audio_path: Path, patient: str = "", status_cb: SpeechStatusCallback = None) -> str:
+    """Upload an audio file, run transcription, return the transcript text."""
+    blob = _stage_audio(audio_path, patient, status_cb)
+    with span("recognize"):
+        operation = _start_recognition(blob, audio_path, status_cb)
+
+        delays = poll_delays(_estimate_recognition_sec(audio_path))
+        while not operation.done():
+            time.sleep(next(delays))
+            _set_status(status_cb, "Transcribing…")
+
+        return _finish_recognition(operation, blob, patient, status_cb)
+
+
+# Asynchronous API --------------------------------------------------------------
+async def wait_for_operation(
+    operation,
+    estimate_sec: Optional[float] = None,
+    status_cb: SpeechStatusCallback = None,
+) -> None:
+    """Wait for a long-running operation without blocking a thread between polls."""
+    delays = poll_delays(estimate_sec)
+    while not await asyncio.to_thread(operation.done):
+        await asyncio.sleep(next(delays))
+        _set_status(status_cb, "Transcribing…")
+
+
+async def upload_and_transcribe_async(
+    audio_path: Path, patient: str = "", status_cb: SpeechStatusCallback = None
+) -> str:
+    """Asynchronous ``upload_and_transcribe``; many calls can share one event loop."""
+    blob = await asyncio.to_thread(_stage_audio, audio_path, patient, status_cb)
+    with span("recognize"):
+        operation = await asyncio.to_thread(_start_recognition, blob, audio_path, status_cb)
+        await wait_for_operation(operation, _estimate_recognition_sec(audio_path), status_cb)
+        return await asyncio.to_thread(_finish_recognition, operation, blob, patient, status_cb)
+
+
+# Chunked transcription ---------------------------------------------------------
+def _quietest_offset(window: np.ndarray, frame_len: int) -> int:
+    """Return the sample offset of the centre of the lowest-energy frame in ``window``."""
+    usable = (len(window) // frame_len) * frame_len
+    if usable == 0:
+        return len(window)
+    frames = window[:usable].reshape(-1, frame_len * window.shape[1])
+    energy = np.einsum("ij,ij->i", frames, frames)
+    return int(np.argmin(energy)) * frame_len + frame_len // 2
+
+
+def plan_segments(
+    audio_path: Path,
+    segment_sec: float = SEGMENT_LENGTH_SEC,
+    overlap_sec: float = SEGMENT_OVERLAP_SEC,
+    search_sec: float = SILENCE_SEARCH_SEC,
+) -> Tuple[int, List[Tuple[int, int]]]:
+    """
+    Split a recording into overlapping segments, cutting at quiet points.
+
+    Each cut is placed at the lowest-energy frame in the ``search_sec`` before
+    the nominal segment end; every segment after the first also starts
+    ``overlap_sec`` early so words on the cut are heard twice.
+
+    Returns:
+        The sample rate and a list of ``(start, stop)`` frame ranges
+    """
+    with open_file(audio_path) as raw, sf.SoundFile(raw) as source:
+        rate = source.samplerate
+        total = source.frames
+        segment_frames = max(1, int(segment_sec * rate))
+        overlap_frames = int(overlap_sec * rate)
+        search_frames = int(search_sec * rate)
+        frame_len = max(1, int(SILENCE_FRAME_SEC * rate))
+
+        bounds: List[Tuple[int, int]] = []
+        start = 0
+        while start < total:
+            target = start + segment_frames
+            if target >= total:
+                end = total
+            else:
+                window_start = max(start + 1, target - search_frames)
+                source.seek(window_start)
+                window = source.read(target - window_start, dtype="float32", always_2d=True)
+                end = window_start + _quietest_offset(window, frame_len)
+            bounds.append((max(0, start - overlap_frames), end))
+            start = end
+    return rate, bounds
+
+
+def _segment_audio(audio_path: Path, start: int, stop: int) -> bytes:
+    """Read one segment and return it encoded in the upload encoding, in memory."""
+    file_format, subtype, _suffix = UPLOAD_FORMATS[UPLOAD_ENCODING]
+    with open_file(audio_path) as raw, sf.SoundFile(raw) as source:
+        source.seek(start)
+        data = source.read(stop - start, dtype="int16", always_2d=True)
+        rate = source.samplerate
+    buffer = io.BytesIO()
+    sf.write(buffer, data, rate, format=file_format, subtype=subtype)
+    return buffer.getvalue()
+
+
+def _normalize_word(word: str) -> str:
+    return word.lower().strip(string.punctuation)
+
+
+def _overlap_words(previous: str, following: str, max_words: int = OVERLAP_MAX_WORDS) -> Tuple[int, int]:
+    """Number of leading words of ``following`` that repeat the tail of ``previous``, and where they end."""
+    tail = [_normalize_word(word) for word in previous.split()[-max_words:]]
+    matches = list(islice(_WORD_PATTERN.finditer(following), max_words))
+    head = [_normalize_word(match.group()) for match in matches]
+    for size in range(min(len(tail), len(head)), 0, -1):
+        if tail[-size:] == head[:size]:
+            return size, matches[size - 1].end()
+    return 0, 0
+
+
+def stitch_segments(transcripts: Sequence[str]) -> Transcript:
+    """
+    Join per-segment transcripts in order, removing duplicates from the overlaps.
+
+    When every segment carries word timings, the result carries them too,
+    with the duplicated words dropped the same way.
+    """
+    stitched: List[str] = []
+    words: Optional[WordTimings] = WordTimings()
+    previous = ""
+    for transcript in transcripts:
+        segment_words = words_of(transcript)
+        text = transcript.strip()
+        skip = 0
+        if previous:
+            skip, end = _overlap_words(previous, text)
+            text = text[end:].lstrip()
+        if words is not None:
+            if segment_words is None:
+                words = None
+            else:
+                words.extend(segment_words, skip)
+        if text:
+            stitched.append(text)
+            previous = text
+    return Transcript("\n".join(stitched), words)
+
+
+def transcribe_chunked(
+    audio_path: Path,
+    patient: str = "",
+    status_cb: SpeechStatusCallback = None,
+    client=None,
+    max_workers: int = TRANSCRIBE_MAX_WORKERS,
+) -> str:
+    """
+    Transcribe a long recording as overlapping segments recognized in parallel.
+
+    Segments are short enough for synchronous recognition, so audio is sent
+    inline and nothing is staged in GCS. ``client`` may be any object with a
+    Speech-compatible ``recognize(config=..., audio=...)`` method.
+    """
+    if not audio_path.exists():
+        raise FileNotFoundError(audio_path)
+    client = client or get_speech_client()
+    types = speech_types()
+
+    _set_status(status_cb, "Splitting recording…")
+    rate, bounds = plan_segments(audio_path)
+    _rate, channels = audio_format(audio_path)
+    config = recognition_config(UPLOAD_ENCODING, rate, channels)
+    total = len(bounds)
+    completed = 0
+    lock = threading.Lock()
+
+    def _run(segment: Tuple[int, int]) -> Transcript:
+        nonlocal completed
+        audio = types.RecognitionAudio(content=_segment_audio(audio_path, *segment))
+        transcript = _collect_transcript(client.recognize(config=config, audio=audio), segment[0] / rate)
+        with lock:
+            completed += 1
+            _set_status(status_cb, f"Transcribing… ({completed}/{total} segments)")
+        return transcript
+
+    _set_status(status_cb, f"Transcribing… (0/{total} segments)")
+    log("chunked_transcribe", audio_path, patient, f"Recognizing {total} segments inline")
+    with span("recognize_chunked"), ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        transcripts = list(executor.map(_run, bounds))
+
+    _set_status(status_cb, "Processing result…")
+    transcript = stitch_segments(transcripts)
+    _set_status(status_cb, "Completed")
+    return transcript
+
+
+@timed("vad_trim")
+def trim_recording(
+    audio_path: Path, patient: str = "", status_cb: SpeechStatusCallback = None
+) -> Tuple[Path, Optional[TimeMap]]:
+    """
+    Drop long silences before upload when VAD_ENABLED.
+
+    Returns the path to recognize (a temporary ``.vad.wav`` next to the
+    recording, or the recording itself when there was little to trim) and the
+    TimeMap back to the original recording's timeline.
+    """
+    if not VAD_ENABLED:
+        return audio_path, None
+    _set_status(status_cb, "Trimming silence…")
+    target = audio_path.with_name(f"{audio_path.stem}.vad.wav")
+    time_map = trim_silence(audio_path, target)
+    if time_map is None:
+        return audio_path, None
+    original = time_map.original_frames / time_map.samplerate
+    kept = time_map.kept_frames / time_map.samplerate
+    log("vad_trim", audio_path, patient, f"Trimmed silence: {kept:.1f} s of {original:.1f} s kept")
+    return target, time_map
+
+
+def _on_original_timeline(transcript: str, time_map: Optional[TimeMap]) -> str:
+    """Map word offsets in a transcript of trimmed audio back to the original recording."""
+    words = words_of(transcript)
+    if words is not None and time_map is not None:
+        words.remap(time_map.to_original)
+    return transcript
+
+
+@timed("transcribe")
+def transcribe_recording(audio_path: Path, patient: str = "", status_cb: SpeechStatusCallback = None) -> str:
+    """Transcribe a recording, using the chunked pipeline for long recordings."""
+    if not audio_path.exists():
+        raise FileNotFoundError(audio_path)
+    speech_path, time_map = trim_recording(audio_path, patient, status_cb)
+    try:
+        if audio_duration(speech_path) > CHUNKED_MIN_DURATION_SEC:
+            transcript = transcribe_chunked(speech_path, patient, status_cb)
+        else:
+            transcript = upload_and_transcribe(speech_path, patient, status_cb)
+        return _on_original_timeline(transcript, time_map)
+    finally:
+        if speech_path != audio_path:
+            secure_delete(speech_path, patient)
+
+
+async def transcribe_recording_async(
+    audio_path: Path, patient: str = "", status_cb: SpeechStatusCallback = None
+) -> str:
+    """Asynchronous ``transcribe_recording``."""
+    if not audio_path.exists():
+        raise FileNotFoundError(audio_path)
+    with span("transcribe"):
+        speech_path, time_map = await asyncio.to_thread(trim_recording, audio_path, patient, status_cb)
+        try:
+            if audio_duration(speech_path) > CHUNKED_MIN_DURATION_SEC:
+                transcript = await asyncio.to_thread(transcribe_chunked, speech_path, patient, status_cb)
+            else:
+                transcript = await upload_and_transcribe_async(speech_path, patient, status_cb)
+            return _on_original_timeline(transcript, time_map)
+        finally:
+            if speech_path != audio_path:
+                await asyncio.to_thread(secure_delete, speech_path, patient)
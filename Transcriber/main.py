@@ -2,40 +2,193 @@
 
 from __future__ import annotations
 
+import time
+
+_PROCESS_START = time.perf_counter()
+
+import argparse
+import importlib
+import multiprocessing
 import threading
 import tkinter as tk
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
 from tkinter import messagebox, ttk
-from typing import Optional
+from typing import TYPE_CHECKING, Callable, Iterator, List, Optional, Sequence, Tuple
 
+import audit_logger
+import metrics
 from audio_recorder import AudioRecorder
+from config import EDITOR_INSERT_CHUNK_CHARS, LOW_CONFIDENCE_THRESHOLD, METRICS_PORT, SAMPLE_RATE
+from deletion_queue import DeletionQueue
 from file_manager import (
     generate_filename,
-    list_transcriptions,
     load_transcription,
+    reindex_search,
     save_transcription,
-    secure_delete,
+    search_transcriptions,
+    transcription_page,
 )
-from gcloud_transcriber import upload_and_transcribe
+from structured_transcript import WordTimings, load_words, words_of
 from template_manager import apply_template, load_templates
-from transcription_cleaner import remove_filler_words
+from transcription_cleaner import clean_words, remove_filler_words
+from virtual_list import PageFetcher, VirtualListbox
 
+if TYPE_CHECKING:
+    from streaming_transcriber import StreamingTranscriber
+    from transcription_queue import TranscriptionJob, TranscriptionQueue
+
+# Modules pulling in numpy/soundfile/gRPC; imported in the background once the window is up
+BACKEND_MODULES = ("gcloud_transcriber", "transcription_backends", "streaming_transcriber", "transcription_queue")
+
+
+class StartupTimer:
+    """Milestones (ms since main.py started importing) and step durations for --startup-report."""
 
-class TranscriberApp(tk.Tk):
     def __init__(self) -> None:
+        self.milestones: List[Tuple[str, float]] = []
+        self.steps: List[Tuple[str, float]] = []
+
+    def mark(self, name: str) -> None:
+        self.milestones.append((name, (time.perf_counter() - _PROCESS_START) * 1000))
+
+    @contextmanager
+    def step(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.steps.append((name, (time.perf_counter() - started) * 1000))
+
+    def report(self) -> str:
+        lines = ["Startup milestones (ms):"]
+        lines += [f"  {name:<32}{elapsed:10.1f}" for name, elapsed in self.milestones]
+        lines.append("Startup steps (ms):")
+        lines += [f"  {name:<32}{elapsed:10.1f}" for name, elapsed in self.steps]
+        return "\n".join(lines)
+
+
+class TranscriberApp(tk.Tk):
+    def __init__(self, timer: Optional[StartupTimer] = None, exit_when_ready: bool = False) -> None:
         super().__init__()
         self.title("Medical Transcriber")
         self.geometry("1100x700")
 
+        self.timer = timer or StartupTimer()
+        self._exit_when_ready = exit_when_ready
         self.recorder = AudioRecorder()
         self.current_recording: Optional[Path] = None
         self.current_transcription_file: Optional[Path] = None
         self.templates = load_templates()
-        self._transcribe_thread: Optional[threading.Thread] = None
-        self.file_listing: list[Path] = []
+        self._transcribe_future: Optional[Future] = None
+        self._live: Optional[StreamingTranscriber] = None
+        self._search_query = ""
+        self._editor_generation = 0  # Bumped to cancel an unfinished chunked insert
+        self._editor_filled = 0  # Generation whose insert has finished
+        self._words: Optional[WordTimings] = None  # Word timings of the transcript in the editor
+        self._loading: Optional[Path] = None
+        self.transcription_queue: Optional[TranscriptionQueue] = None
+        self._backends_loaded = False
+        self.startup_error: Optional[str] = None  # Why the transcription backends could not load
+        # Transcriptions are read and written off the Tk thread, one at a time
+        self._file_io = ThreadPoolExecutor(max_workers=1, thread_name_prefix="file-io")
+        # Files are deleted in the background; unfinished deletions resume on restart
+        self.deletions = DeletionQueue(
+            status_cb=self.set_status,
+            on_complete=lambda _job: self.after(0, self._reload_file_list),
+        )
+        self.deletions.start()
+        self._metrics_server = metrics.get_metrics().serve(METRICS_PORT) if METRICS_PORT else None
+
+        with self.timer.step("build UI"):
+            self._build_ui()
+        with self.timer.step("list transcriptions"):
+            self.refresh_file_list()
+        self.after_idle(self._on_first_draw)
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+
+    # Startup ------------------------------------------------------------------
+    def _on_first_draw(self) -> None:
+        self.timer.mark("window shown")
+        threading.Thread(target=self._load_backends, name="backend-loader", daemon=True).start()
+
+    def _load_backends(self) -> None:
+        try:
+            for name in BACKEND_MODULES:
+                with self.timer.step(f"import {name}"):
+                    importlib.import_module(name)
+        except Exception as exc:  # e.g. a missing or broken dependency
+            self.after(0, self._on_backends_failed, f"{type(exc).__name__}: {exc}")
+            return
+        self.after(0, self._on_backends_ready)
+
+        import gcloud_clients
+
+        try:
+            with self.timer.step("create Google clients"):
+                gcloud_clients.warm_up()
+        except Exception as exc:  # pragma: no cover - missing credentials
+            self.set_status(f"Google Cloud unavailable: {exc}")
 
-        self._build_ui()
-        self.refresh_file_list()
+        # Pick up transcriptions changed while the app was closed
+        try:
+            with self.timer.step("update search index"):
+                reindex_search()
+        except Exception as exc:  # pragma: no cover - unreadable index or files
+            self.set_status(f"Search index not updated: {exc}")
+        self.after(0, self._on_startup_done)
+
+    def _on_backends_ready(self) -> None:
+        from transcription_queue import QueueLockedError, TranscriptionQueue
+
+        transcription_queue = TranscriptionQueue(
+            status_cb=self.set_status,
+            on_complete=self._on_queued_job_done,
+        )
+        try:
+            transcription_queue.start()
+            self.transcription_queue = transcription_queue
+        except QueueLockedError as exc:
+            self.set_status(f"Batch queue unavailable: {exc}")
+        self._backends_loaded = True
+        self.timer.mark("backends ready")
+
+    def _on_backends_failed(self, error: str) -> None:
+        self.startup_error = error
+        self.set_status(f"Transcription unavailable: {error}")
+        self.timer.mark("backends failed")
+        self._on_startup_done()
+
+    def _on_startup_done(self) -> None:
+        """All background startup work (imports, client warm-up, reindex) has finished."""
+        self.timer.mark("startup complete")
+        if self._exit_when_ready:
+            print(self.timer.report())
+            if self.startup_error:
+                print(f"Startup failed: {self.startup_error}")
+            self.destroy()
+
+    def _on_close(self) -> None:
+        if self.recorder.is_recording:
+            self.recorder.stop()
+        if self.transcription_queue:
+            self.transcription_queue.stop(wait=False)  # Unfinished jobs resume from the journal
+        self.deletions.stop(wait=False)
+        self._file_io.shutdown(wait=True)  # Let a save in progress finish
+        if self._metrics_server:
+            self._metrics_server.shutdown()
+        audit_logger.shutdown()
+        self.destroy()
+
+    def _backends_ready(self) -> bool:
+        if self.startup_error:
+            messagebox.showerror("Transcription unavailable", f"Transcription could not start:\n{self.startup_error}")
+            return False
+        if not self._backends_loaded:
+            messagebox.showinfo("Starting", "Still starting up, please try again in a moment.")
+            return False
+        return True
 
     # UI setup -----------------------------------------------------------------
     def _build_ui(self) -> None:
@@ -53,67 +206,238 @@ class TranscriberApp(tk.Tk):
         ttk.Label(top, text="Template").grid(row=0, column=4, sticky="w")
         self.template_var = tk.StringVar()
         template_choices = list(self.templates.keys())
-        self.template_combo = ttk.Combobox(top, textvariable=self.template_var, values=template_choices, state="readonly")
+        self.template_combo = ttk.Combobox(
+            top,
+            textvariable=self.template_var,
+            values=template_choices,
+            state="readonly",
+            postcommand=self._refresh_templates,
+        )
         self.template_combo.grid(row=0, column=5, padx=5)
 
+        self.live_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(top, text="Live transcription", variable=self.live_var).grid(row=0, column=6, padx=5)
+
         self.status_var = tk.StringVar(value="Idle")
-        ttk.Label(top, textvariable=self.status_var).grid(row=0, column=6, padx=5)
+        ttk.Label(top, textvariable=self.status_var).grid(row=0, column=7, padx=5)
 
         button_row = ttk.Frame(top)
-        button_row.grid(row=1, column=0, columnspan=7, pady=(10, 0))
+        button_row.grid(row=1, column=0, columnspan=8, pady=(10, 0))
 
         ttk.Button(button_row, text="Record", command=self.start_record).grid(row=0, column=0, padx=5)
         ttk.Button(button_row, text="Stop", command=self.stop_record).grid(row=0, column=1, padx=5)
         ttk.Button(button_row, text="Send to Google", command=self.trigger_transcription).grid(row=0, column=2, padx=5)
-        ttk.Button(button_row, text="Delete Recording", command=self.delete_recording).grid(row=0, column=3, padx=5)
-        ttk.Button(button_row, text="Save", command=self.save_current_transcription).grid(row=0, column=4, padx=5)
-        ttk.Button(button_row, text="Clean Transcription", command=self.clean_transcription).grid(row=0, column=5, padx=5)
-        ttk.Button(button_row, text="Delete Transcription", command=self.delete_transcription).grid(row=0, column=6, padx=5)
+        ttk.Button(button_row, text="Queue Recording", command=self.queue_recording).grid(row=0, column=3, padx=5)
+        ttk.Button(button_row, text="Delete Recording", command=self.delete_recording).grid(row=0, column=4, padx=5)
+        ttk.Button(button_row, text="Save", command=self.save_current_transcription).grid(row=0, column=5, padx=5)
+        ttk.Button(button_row, text="Clean Transcription", command=self.clean_transcription).grid(row=0, column=6, padx=5)
+        ttk.Button(button_row, text="Delete Transcription", command=self.delete_transcription).grid(row=0, column=7, padx=5)
 
         body = ttk.Frame(self, padding=10)
         body.pack(fill="both", expand=True)
 
         left = ttk.Frame(body, width=250)
         left.pack(side="left", fill="y")
-        ttk.Label(left, text="Transcriptions").pack(anchor="w")
-        self.file_listbox = tk.Listbox(left)
-        self.file_listbox.pack(fill="both", expand=True, pady=(5, 0))
-        self.file_listbox.bind("<<ListboxSelect>>", self.load_selected_file)
+        self.file_count_var = tk.StringVar(value="Transcriptions")
+        ttk.Label(left, textvariable=self.file_count_var).pack(anchor="w")
+        search_row = ttk.Frame(left)
+        search_row.pack(fill="x", pady=(5, 0))
+        self.search_var = tk.StringVar()
+        search_entry = ttk.Entry(search_row, textvariable=self.search_var)
+        search_entry.pack(side="left", fill="x", expand=True)
+        search_entry.bind("<Return>", lambda _event: self.search_files())
+        ttk.Button(search_row, text="Search", command=self.search_files).pack(side="left", padx=(5, 0))
+        ttk.Button(search_row, text="Clear", command=self.refresh_file_list).pack(side="left", padx=(5, 0))
+        self.file_list: VirtualListbox[Path] = VirtualListbox(
+            left,
+            fetch=lambda _offset, _limit: ([], 0),
+            label=lambda path: path.name,
+            on_select=self.load_selected_file,
+            executor=self._file_io,  # Directory rescans and searches stay off the Tk thread
+            on_total=self._show_file_count,
+        )
+        self.file_list.pack(fill="both", expand=True, pady=(5, 0))
 
         right = ttk.Frame(body)
         right.pack(side="right", fill="both", expand=True)
         ttk.Label(right, text="Transcription Editor").pack(anchor="w")
         self.text_editor = tk.Text(right, wrap="word")
         self.text_editor.pack(fill="both", expand=True, pady=(5, 0))
+        self.text_editor.tag_configure("interim", foreground="gray")
+        self.text_editor.tag_configure("low_confidence", background="#fff2a8")
+        self.text_editor.bind("<ButtonRelease-1>", self._show_word_time)
+
+    def _refresh_templates(self) -> None:
+        """Pick up templates added or removed while the app is running."""
+        self.templates = load_templates()
+        self.template_combo.configure(values=list(self.templates.keys()))
 
     # Status helpers -----------------------------------------------------------
     def set_status(self, message: str) -> None:
         self.after(0, lambda: self.status_var.set(message))
 
+    # Editor -------------------------------------------------------------------
+    def _set_editor_text(
+        self, text: str, on_done: Optional[Callable[[], None]] = None, words: Optional[WordTimings] = None
+    ) -> None:
+        """
+        Replace the editor contents, EDITOR_INSERT_CHUNK_CHARS at a time.
+
+        Each chunk goes in from its own event loop callback so the window keeps
+        redrawing; the editor is read-only until the last chunk is in, and a
+        newer call abandons an unfinished one. ``words`` are the text's word
+        timings, used to highlight low-confidence words once it is all in.
+        """
+        self._editor_generation += 1
+        self._words = words
+        generation = self._editor_generation
+        self.text_editor.configure(state="normal")
+        self.text_editor.delete("1.0", tk.END)
+
+        def insert(start: int) -> None:
+            if generation != self._editor_generation:
+                return
+            end = start + EDITOR_INSERT_CHUNK_CHARS
+            self.text_editor.configure(state="normal")
+            self.text_editor.insert(tk.END, text[start:end])
+            if end < len(text):
+                self.text_editor.configure(state="disabled")
+                self.after(1, insert, end)
+                return
+            self._editor_filled = generation
+            self._highlight_words()
+            if on_done:
+                on_done()
+
+        insert(0)
+
+    def _editor_busy(self) -> bool:
+        """True (after telling the user) while the editor is still being filled."""
+        if self._editor_filled == self._editor_generation:
+            return False
+        messagebox.showinfo("Please wait", "The transcription is still loading into the editor.")
+        return True
+
+    def _highlight_words(self) -> None:
+        """Mark words recognized with less than LOW_CONFIDENCE_THRESHOLD confidence."""
+        self.text_editor.tag_remove("low_confidence", "1.0", tk.END)
+        if self._words is None:
+            return
+        low = self._words.low_confidence(LOW_CONFIDENCE_THRESHOLD)
+        if not low:
+            return
+        offsets = self._words.locate(self.text_editor.get("1.0", "end-1c"))
+        ranges: List[str] = []
+        for index in low:
+            if offsets[index] >= 0:
+                end = offsets[index] + len(self._words.words[index])
+                ranges += [f"1.0+{offsets[index]}c", f"1.0+{end}c"]
+        if ranges:
+            self.text_editor.tag_add("low_confidence", *ranges)
+
+    def _show_word_time(self, _event=None) -> None:
+        """Show where in the recording the clicked word was spoken, and how confidently."""
+        if self._words is None:
+            return
+        position = len(self.text_editor.get("1.0", "insert"))
+        offsets = self._words.locate(self.text_editor.get("1.0", "end-1c"))
+        for index, start in enumerate(offsets):
+            if 0 <= start <= position <= start + len(self._words.words[index]):
+                word = self._words[index]
+                minutes, seconds = divmod(word.start, 60)
+                message = f"“{word.text}” at {int(minutes)}:{seconds:04.1f} in the recording"
+                if word.confidence == word.confidence:  # NaN when the engine gave no confidence
+                    message += f" (confidence {word.confidence:.0%})"
+                self.status_var.set(message)
+                return
+
     # Recording controls -------------------------------------------------------
     def start_record(self) -> None:
+        if self.live_var.get() and not self._backends_ready():
+            return
         try:
-            self.current_recording = self.recorder.start()
+            if self.live_var.get():
+                self._start_live()
+            on_audio = self._live.feed if self._live else None
+            self.current_recording = self.recorder.start(on_audio)
+            if self._live:
+                self._live.audio_path = self.current_recording
             self.set_status(f"Recording → {self.current_recording.name}")
         except Exception as exc:  # pragma: no cover - UI interaction
+            if self._live:
+                self._live.stop()
+                self._live = None
             messagebox.showerror("Recording Error", str(exc))
 
     def stop_record(self) -> None:
         recording = self.recorder.stop()
         if recording:
-            self.set_status("Recording stopped")
+            stats = self.recorder.stats
+            if stats.lost_audio:
+                lost = stats.dropped_frames / SAMPLE_RATE
+                self.set_status(f"Recording stopped - audio lost ({stats.overruns + stats.dropouts} dropouts, {lost:.1f}s)")
+            else:
+                self.set_status("Recording stopped")
+        if self._live:
+            live, self._live = self._live, None
+            threading.Thread(target=self._finish_live, args=(live,), daemon=True).start()
+
+    # Live transcription -------------------------------------------------------
+    def _start_live(self) -> None:
+        from streaming_transcriber import StreamingTranscriber
+
+        self._set_editor_text("")
+        self.current_transcription_file = None
+        self._live = StreamingTranscriber(
+            on_final=lambda text: self.after(0, self._show_live_final, text),
+            on_interim=lambda text: self.after(0, self._show_live_interim, text),
+            patient=self.patient_var.get().strip(),
+            status_cb=self.set_status,
+        )
+        self._live.start()
+
+    def _clear_interim(self) -> None:
+        ranges = self.text_editor.tag_ranges("interim")
+        if ranges:
+            self.text_editor.delete(ranges[0], ranges[-1])
+
+    def _show_live_final(self, text: str) -> None:
+        self._clear_interim()
+        prefix = "\n" if self.text_editor.get("1.0", "end-1c") else ""
+        self.text_editor.insert(tk.END, prefix + text)
+        self.text_editor.see(tk.END)
+
+    def _show_live_interim(self, text: str) -> None:
+        self._clear_interim()
+        if text:
+            prefix = "\n" if self.text_editor.get("1.0", "end-1c") else ""
+            self.text_editor.insert(tk.END, prefix + text, "interim")
+            self.text_editor.see(tk.END)
+
+    def _finish_live(self, live: StreamingTranscriber) -> None:
+        transcript = live.stop()
+        if live.error:
+            error = str(live.error)
+            self.after(0, lambda: messagebox.showerror("Live Transcription Error", error))
+            return
+        self._show_transcript(transcript, live.patient)
 
     def delete_recording(self) -> None:
         if not self.current_recording:
             return
-        secure_delete(self.current_recording, self.patient_var.get())
+        self.deletions.submit(self.current_recording, self.patient_var.get())
         self.current_recording = None
-        self.set_status("Recording deleted")
 
     # Transcription workflow ---------------------------------------------------
     def trigger_transcription(self) -> None:
-        if self._transcribe_thread and self._transcribe_thread.is_alive():
-            messagebox.showinfo("In Progress", "Transcription already running.")
+        if not self._backends_ready():
+            return
+        if self._transcribe_future and not self._transcribe_future.done():
+            if messagebox.askyesno(
+                "In Progress",
+                "Transcription already running.\n\nAdd this recording to the batch queue instead?",
+            ):
+                self.queue_recording()
             return
         if not self.current_recording or not self.current_recording.exists():
             messagebox.showerror("No recording", "Please record audio first.")
@@ -123,21 +447,28 @@ class TranscriberApp(tk.Tk):
             messagebox.showerror("Missing info", "Patient name is required before transcription.")
             return
 
-        self._transcribe_thread = threading.Thread(
-            target=self._run_transcription,
-            args=(self.current_recording, patient),
-            daemon=True,
+        from transcription_backends import submit_transcription
+
+        self._transcribe_future = submit_transcription(
+            self.current_recording,
+            patient,
+            self.set_status,
+            on_done=lambda future: self._on_transcription_done(future, patient),
         )
-        self._transcribe_thread.start()
 
-    def _run_transcription(self, recording: Path, patient: str) -> None:
+    def _on_transcription_done(self, future: Future, patient: str) -> None:
         try:
-            transcript = upload_and_transcribe(recording, patient, self.set_status)
+            transcript = future.result()
         except Exception as exc:  # pragma: no cover - API failure
-            self.after(0, lambda: messagebox.showerror("Transcription Error", str(exc)))
+            error = str(exc)
+            self.after(0, lambda: messagebox.showerror("Transcription Error", error))
             self.set_status("Transcription failed")
             return
 
+        self._show_transcript(transcript, patient)
+
+    def _show_transcript(self, transcript: str, patient: str) -> None:
+        """Apply the selected template and replace the editor contents."""
         template_name = self.template_var.get()
         template = self.templates.get(template_name)
         context = {"PATIENT": patient, "DOB": self.dob_var.get().strip()}
@@ -147,15 +478,46 @@ class TranscriberApp(tk.Tk):
             final_text = transcript
 
         def update_editor() -> None:
-            self.text_editor.delete("1.0", tk.END)
-            self.text_editor.insert(tk.END, final_text)
             self.current_transcription_file = None  # New transcription, not from file
-            self.set_status("Transcription ready")
+            self._set_editor_text(
+                final_text, on_done=lambda: self.set_status("Transcription ready"), words=words_of(transcript)
+            )
 
         self.after(0, update_editor)
 
+    def queue_recording(self) -> None:
+        """Hand the current recording to the batch queue and free the recorder."""
+        if not self._backends_ready() or self._editor_busy():
+            return
+        if self.transcription_queue is None:
+            messagebox.showerror(
+                "Queue unavailable",
+                "The batch queue is in use by another Transcriber process.\n"
+                "Use \"Send to Google\", or close the other process and restart.",
+            )
+            return
+        if not self.current_recording or not self.current_recording.exists():
+            messagebox.showerror("No recording", "Please record audio first.")
+            return
+        patient = self.patient_var.get().strip()
+        if not patient:
+            messagebox.showerror("Missing info", "Patient name is required before transcription.")
+            return
+        self.transcription_queue.submit(
+            self.current_recording,
+            patient,
+            self.dob_var.get().strip(),
+            self.template_var.get(),
+        )
+        self.current_recording = None
+
+    def _on_queued_job_done(self, _job: TranscriptionJob) -> None:
+        self.after(0, self._reload_file_list)
+
     # File management ----------------------------------------------------------
     def save_current_transcription(self) -> None:
+        if self._editor_busy():
+            return  # Saving now would store a truncated transcript
         patient = self.patient_var.get().strip()
         dob = self.dob_var.get().strip()
         if not patient or not dob:
@@ -166,47 +528,105 @@ class TranscriberApp(tk.Tk):
             messagebox.showerror("Empty", "Transcription text is empty.")
             return
         path = generate_filename(patient, dob)
-        save_transcription(path, content)
+        recording, self.current_recording = self.current_recording, None
+        self.set_status(f"Saving {path.name}…")
+        future = self._file_io.submit(save_transcription, path, content, self._words)
+        future.add_done_callback(lambda done: self.after(0, self._on_saved, done, path, patient, recording))
+
+    def _on_saved(self, future: Future, path: Path, patient: str, recording: Optional[Path]) -> None:
+        try:
+            future.result()
+        except OSError as exc:
+            self.current_recording = self.current_recording or recording
+            messagebox.showerror("Save failed", str(exc))
+            self.set_status("Save failed")
+            return
         self.current_transcription_file = path  # Track newly saved file
-        self.refresh_file_list()
-        self.after(0, lambda: self.set_status(f"Saved {path.name}"))
-        # Securely delete recording post-save
-        if self.current_recording:
-            secure_delete(self.current_recording, patient)
-            self.current_recording = None
+        self._reload_file_list()
+        self.set_status(f"Saved {path.name}")
+        # Securely delete recording post-save, in the background
+        if recording:
+            self.deletions.submit(recording, patient)
 
-    def refresh_file_list(self) -> None:
-        self.file_listbox.delete(0, tk.END)
-        self.file_listing = list_transcriptions()
-        for path in self.file_listing:
-            self.file_listbox.insert(tk.END, path.name)
+    def _index_page(self, offset: int, limit: int) -> Tuple[Sequence[Path], int]:
+        entries, total = transcription_page(offset, limit)
+        return [entry.path for entry in entries], total
+
+    def _show_listing(self, fetch: PageFetcher, query: str = "") -> None:
+        self._search_query = query
+        self.file_count_var.set("Search results (searching…)" if query else "Transcriptions (loading…)")
+        self.file_list.set_source(fetch)
 
-    def load_selected_file(self, _event=None) -> None:
-        selection = self.file_listbox.curselection()
-        if not selection:
+    def _show_file_count(self, total: int) -> None:
+        label = "Search results" if self._search_query else "Transcriptions"
+        self.file_count_var.set(f"{label} ({total})")
+
+    def refresh_file_list(self) -> None:
+        """Show all transcriptions, newest first; pages are fetched as the list scrolls."""
+        self.search_var.set("")
+        self._show_listing(self._index_page)
+
+    def _reload_file_list(self) -> None:
+        """Pick up saved or deleted files without losing the search or scroll position."""
+        self.file_list.refresh()  # The first page rescans the folder or reruns the search
+
+    def _search_page(self, query: str) -> PageFetcher:
+        """Fetch pages of search results; the search runs again whenever the first page is fetched."""
+        results: List[Path] = []
+
+        def fetch(offset: int, limit: int) -> Tuple[Sequence[Path], int]:
+            nonlocal results
+            if offset == 0:
+                results = search_transcriptions(query)
+            return results[offset : offset + limit], len(results)
+
+        return fetch
+
+    def search_files(self) -> None:
+        """Replace the file list with transcriptions containing every search word."""
+        query = self.search_var.get().strip()
+        if not query:
+            self.refresh_file_list()
             return
-        index = selection[0]
+        self._show_listing(self._search_page(query), query)
+
+    def load_selected_file(self, path: Path) -> None:
+        """Read the transcription (and any word timings) in the background, then stream it into the editor."""
+        self._loading = path
+        self.set_status(f"Loading {path.name}…")
+        future = self._file_io.submit(lambda: (load_transcription(path), load_words(path)))
+        future.add_done_callback(lambda done: self.after(0, self._show_loaded_file, done, path))
+
+    def _show_loaded_file(self, future: Future, path: Path) -> None:
+        if path != self._loading:
+            return  # Another file was clicked meanwhile
+        self._loading = None
         try:
-            path = self.file_listing[index]
-        except IndexError:
+            content, words = future.result()
+        except OSError as exc:
+            messagebox.showerror("Load failed", f"Could not open {path.name}:\n{exc}")
+            self.set_status("Load failed")
             return
-        content = load_transcription(path)
-        self.text_editor.delete("1.0", tk.END)
-        self.text_editor.insert(tk.END, content)
-        self.current_transcription_file = path  # Track loaded file
-        self.set_status(f"Loaded {path.name}")
+        self.current_transcription_file = None
+
+        def loaded() -> None:
+            self.current_transcription_file = path  # Track loaded file
+            self.set_status(f"Loaded {path.name}")
+
+        self._set_editor_text(content, on_done=loaded, words=words)
 
     def clean_transcription(self) -> None:
         """Remove filler words from the current transcription text."""
+        if self._editor_busy():
+            return
         content = self.text_editor.get("1.0", tk.END)
         if not content.strip():
             messagebox.showinfo("Empty", "No transcription text to clean.")
             return
         
         cleaned = remove_filler_words(content)
-        self.text_editor.delete("1.0", tk.END)
-        self.text_editor.insert(tk.END, cleaned)
-        self.set_status("Transcription cleaned")
+        words = clean_words(self._words) if self._words is not None else None
+        self._set_editor_text(cleaned, on_done=lambda: self.set_status("Transcription cleaned"), words=words)
 
     def delete_transcription(self) -> None:
         """Securely delete the currently loaded transcription file."""
@@ -224,21 +644,30 @@ class TranscriberApp(tk.Tk):
             return
         
         patient = self.patient_var.get().strip() or "unknown"
-        secure_delete(self.current_transcription_file, patient)
+        # Deleted in the background; the file list refreshes once it is gone
+        self.deletions.submit(self.current_transcription_file, patient)
         self.current_transcription_file = None
         
         # Clear editor
-        self.text_editor.delete("1.0", tk.END)
-        
-        # Refresh file list
-        self.refresh_file_list()
-        self.set_status(f"Deleted {filename}")
-
-
-def main() -> None:
-    app = TranscriberApp()
+        self._set_editor_text("")
+        self.set_status(f"Deleting {filename}…")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Medical Transcriber")
+    parser.add_argument(
+        "--startup-report",
+        action="store_true",
+        help="print startup timings once fully loaded, then exit",
+    )
+    args = parser.parse_args()
+    timer = StartupTimer()
+    timer.mark("modules imported")
+    app = TranscriberApp(timer, exit_when_ready=args.startup_report)
     app.mainloop()
+    return 1 if app.startup_error else 0
 
 
 if __name__ == "__main__":
-    main()
+    multiprocessing.freeze_support()  # Local transcription workers in the frozen executable
+    raise SystemExit(main())
@@ -0,0 +1,303 @@
+"""Pipeline timing: spans, per-stage percentiles and a Prometheus text endpoint."""
+
+from __future__ import annotations
+
+import argparse
+import atexit
+import functools
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Deque, Dict, Iterable, Iterator, List, Optional, TextIO, TypeVar
+
+from config import (
+    METRICS_DIR,
+    METRICS_ENABLED,
+    METRICS_FLUSH_INTERVAL_SEC,
+    METRICS_KEEP_FILES,
+    METRICS_ROTATE_BYTES,
+    METRICS_WINDOW,
+)
+
+METRICS_FILE = METRICS_DIR / "metrics.jsonl"
+QUANTILES = (0.5, 0.9, 0.99)
+
+F = TypeVar("F", bound=Callable)
+
+
+def percentile(ordered: List[float], quantile: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return 0.0
+    rank = min(len(ordered) - 1, max(0, math.ceil(quantile * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def summarize(durations: Iterable[float]) -> Dict[str, float]:
+    ordered = sorted(durations)
+    summary = {f"p{int(q * 100)}": percentile(ordered, q) for q in QUANTILES}
+    summary["max"] = ordered[-1] if ordered else 0.0
+    return summary
+
+
+def history_files(path: Path = METRICS_FILE) -> List[Path]:
+    """Rotated metrics files kept beside ``path``, oldest first, then ``path`` itself."""
+    return sorted(path.parent.glob(f"{path.stem}-*{path.suffix}")) + [path]
+
+
+@dataclass
+class StageStats:
+    """Totals since start plus the most recent durations of one stage."""
+
+    window: int
+    count: int = 0
+    total: float = 0.0
+    failures: int = 0
+    recent: Deque[float] = field(default_factory=deque)
+
+    def add(self, seconds: float, ok: bool) -> None:
+        self.count += 1
+        self.total += seconds
+        if not ok:
+            self.failures += 1
+        self.recent.append(seconds)
+        if len(self.recent) > self.window:
+            self.recent.popleft()
+
+
+class Metrics:
+    """
+    Collects stage timings in memory and appends each one to a JSON-lines file.
+
+    Percentiles are computed over the last ``window`` timings of each stage,
+    so they describe current behaviour; the files keep the recent history
+    for ``python metrics.py``. Writes are buffered and flushed every
+    ``flush_interval`` seconds (and by ``close``); the file is rotated at
+    ``rotate_bytes`` and only ``keep_files`` rotated files are kept, so disk
+    use stays bounded however busy the pipeline is. Timings carry no
+    patient data.
+    """
+
+    def __init__(
+        self,
+        path: Path = METRICS_FILE,
+        window: int = METRICS_WINDOW,
+        enabled: bool = METRICS_ENABLED,
+        flush_interval: float = METRICS_FLUSH_INTERVAL_SEC,
+        rotate_bytes: int = METRICS_ROTATE_BYTES,
+        keep_files: int = METRICS_KEEP_FILES,
+    ) -> None:
+        self.path = path
+        self.window = window
+        self.enabled = enabled
+        self.flush_interval = flush_interval
+        self.rotate_bytes = rotate_bytes
+        self.keep_files = keep_files
+        self._stages: Dict[str, StageStats] = {}
+        self._lock = threading.Lock()
+        self._handle: Optional[TextIO] = None
+        self._flushed = time.monotonic()
+
+    def observe(self, stage: str, seconds: float, ok: bool = True) -> None:
+        if not self.enabled:
+            return
+        record = {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "stage": stage,
+            "seconds": round(seconds, 6),
+            "ok": ok,
+        }
+        with self._lock:
+            stats = self._stages.get(stage)
+            if stats is None:
+                stats = self._stages[stage] = StageStats(self.window)
+            stats.add(seconds, ok)
+            try:
+                if self._handle is None:
+                    self.path.parent.mkdir(parents=True, exist_ok=True)
+                    self._handle = self.path.open("a", encoding="utf-8")
+                self._handle.write(json.dumps(record) + "\n")
+                if time.monotonic() - self._flushed >= self.flush_interval:
+                    self._flush_locked()
+            except OSError:
+                pass  # Timing must never break the pipeline
+
+    def flush(self) -> None:
+        """Write buffered timings to the file now."""
+        with self._lock:
+            try:
+                self._flush_locked()
+            except OSError:
+                pass
+
+    def close(self) -> None:
+        with self._lock:
+            try:
+                self._flush_locked()
+            except OSError:
+                pass
+            if self._handle:
+                self._handle.close()
+                self._handle = None
+
+    def _flush_locked(self) -> None:
+        self._flushed = time.monotonic()
+        if self._handle is None:
+            return
+        self._handle.flush()
+        if self.path.stat().st_size >= self.rotate_bytes:
+            self._rotate_locked()
+
+    def _rotate_locked(self) -> None:
+        """Move the file to the next numbered one and drop the oldest beyond ``keep_files``."""
+        self._handle.close()
+        self._handle = None
+        rotated = history_files(self.path)[:-1]
+        seq = int(rotated[-1].stem.rsplit("-", 1)[-1]) + 1 if rotated else 1
+        target = self.path.with_name(f"{self.path.stem}-{seq:06d}{self.path.suffix}")
+        os.replace(self.path, target)
+        rotated.append(target)
+        for old in rotated[: max(0, len(rotated) - self.keep_files)]:
+            old.unlink(missing_ok=True)
+
+    @contextmanager
+    def span(self, stage: str) -> Iterator[None]:
+        """Time the enclosed block; exceptions are recorded as failures and re-raised."""
+        start = time.perf_counter()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            self.observe(stage, time.perf_counter() - start, ok)
+
+    def timed(self, stage: str) -> Callable[[F], F]:
+        """Decorator form of ``span``."""
+
+        def decorate(func: F) -> F:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(stage):
+                    return func(*args, **kwargs)
+
+            return wrapper  # type: ignore[return-value]
+
+        return decorate
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            stages = {name: (stats.count, stats.total, stats.failures, list(stats.recent)) for name, stats in self._stages.items()}
+        result: Dict[str, Dict[str, float]] = {}
+        for name, (count, total, failures, recent) in sorted(stages.items()):
+            result[name] = {"count": count, "sum": total, "failures": failures, **summarize(recent)}
+        return result
+
+    def prometheus_text(self) -> str:
+        """Render the summaries in the Prometheus text exposition format."""
+        summary = self.summary()
+        lines = [
+            "# HELP transcriber_stage_seconds Duration of transcription pipeline stages.",
+            "# TYPE transcriber_stage_seconds summary",
+        ]
+        for stage, values in summary.items():
+            for quantile in QUANTILES:
+                value = values[f"p{int(quantile * 100)}"]
+                lines.append(f'transcriber_stage_seconds{{stage="{stage}",quantile="{quantile}"}} {value:.6f}')
+            lines.append(f'transcriber_stage_seconds_sum{{stage="{stage}"}} {values["sum"]:.6f}')
+            lines.append(f'transcriber_stage_seconds_count{{stage="{stage}"}} {values["count"]}')
+        lines += [
+            "# HELP transcriber_stage_failures_total Pipeline stages that raised an error.",
+            "# TYPE transcriber_stage_failures_total counter",
+        ]
+        for stage, values in summary.items():
+            lines.append(f'transcriber_stage_failures_total{{stage="{stage}"}} {values["failures"]}')
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+        """Serve ``/metrics`` from a daemon thread; call ``shutdown()`` on the result to stop."""
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:  # noqa: N802 - http.server naming
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.prometheus_text().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args) -> None:
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+        return server
+
+
+_metrics = Metrics()
+atexit.register(_metrics.close)
+
+
+def get_metrics() -> Metrics:
+    return _metrics
+
+
+def observe(stage: str, seconds: float, ok: bool = True) -> None:
+    _metrics.observe(stage, seconds, ok)
+
+
+def span(stage: str):
+    return _metrics.span(stage)
+
+
+def timed(stage: str) -> Callable[[F], F]:
+    return _metrics.timed(stage)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Print per-stage percentiles from the metrics files."""
+    parser = argparse.ArgumentParser(description="Summarize transcription pipeline timings.")
+    parser.add_argument("--since", help="only timings at or after this ISO date/time (UTC)")
+    parser.add_argument("--file", type=Path, default=METRICS_FILE)
+    args = parser.parse_args(argv)
+
+    durations: Dict[str, List[float]] = {}
+    failures: Dict[str, int] = {}
+    for path in history_files(args.file):
+        if not path.exists():
+            continue
+        with path.open("r", encoding="utf-8") as handle:
+            for line in handle:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if args.since and record["timestamp"] < args.since:
+                    continue
+                durations.setdefault(record["stage"], []).append(record["seconds"])
+                if not record.get("ok", True):
+                    failures[record["stage"]] = failures.get(record["stage"], 0) + 1
+
+    print(f"{'stage':<20} {'count':>7} {'p50':>9} {'p90':>9} {'p99':>9} {'max':>9} {'failed':>7}")
+    for stage, values in sorted(durations.items()):
+        summary = summarize(values)
+        print(
+            f"{stage:<20} {len(values):>7} {summary['p50']:>9.3f} {summary['p90']:>9.3f}"
+            f" {summary['p99']:>9.3f} {summary['max']:>9.3f} {failures.get(stage, 0):>7}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
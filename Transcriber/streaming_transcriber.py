@@ -0,0 +1,139 @@
+"""Live streaming recognition fed directly from the audio recorder."""
+
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Iterator, List, Optional
+
+import numpy as np
+
+from audit_logger import log
+from config import CHANNELS, SAMPLE_RATE, STREAM_SESSION_SEC, VAD_ENABLED
+from gcloud_clients import get_speech_client, speech_types
+from gcloud_transcriber import SpeechStatusCallback, recognition_config
+from voice_activity import SpeechGate
+
+if TYPE_CHECKING:
+    from google.cloud.speech_v1 import types
+
+TextCallback = Optional[Callable[[str], None]]
+
+
+def _set_status(callback: SpeechStatusCallback, message: str) -> None:
+    if callback:
+        callback(message)
+
+
+class StreamingTranscriber:
+    """
+    Stream recorder blocks into streaming recognition while recording.
+
+    Pass ``feed`` as the recorder's ``on_audio`` callback. Finalized
+    utterances are reported through ``on_final`` and the current interim
+    hypothesis through ``on_interim``. ``client`` may be any object with a
+    Speech-compatible ``streaming_recognize(config=..., requests=...)``
+    method, which keeps the feature testable without the network. With
+    VAD_ENABLED long pauses are not streamed (see SpeechGate); the recording
+    on disk is unaffected.
+    """
+
+    def __init__(
+        self,
+        on_final: TextCallback = None,
+        on_interim: TextCallback = None,
+        audio_path: Optional[Path] = None,
+        patient: str = "",
+        status_cb: SpeechStatusCallback = None,
+        client=None,
+    ) -> None:
+        self.on_final = on_final
+        self.on_interim = on_interim
+        self.audio_path = audio_path
+        self.patient = patient
+        self.status_cb = status_cb
+        self.error: Optional[Exception] = None
+        self._client = client
+        self._audio: "queue.Queue[Optional[bytes]]" = queue.Queue()
+        self._finals: List[str] = []
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+        self._gate = SpeechGate(SAMPLE_RATE) if VAD_ENABLED else None
+
+    @property
+    def transcript(self) -> str:
+        return "\n".join(self._finals)
+
+    def start(self) -> None:
+        if self._thread:
+            raise RuntimeError("Streaming already started")
+        self._thread = threading.Thread(target=self._run, name="streaming-recognition", daemon=True)
+        self._thread.start()
+        log("stream_start", self.audio_path or "", self.patient, "Live streaming recognition started")
+
+    def feed(self, block) -> None:
+        """Queue one float32 recorder block as 16-bit PCM."""
+        if self._gate is not None:
+            block = self._gate.filter(block)
+            if not len(block):
+                return
+        pcm = (np.clip(block, -1.0, 1.0) * 32767).astype("<i2")
+        self._audio.put(pcm.tobytes())
+
+    def stop(self) -> str:
+        """Flush the remaining audio, wait for the last results and return the transcript."""
+        self._audio.put(None)
+        if self._thread:
+            self._thread.join()
+        log("stream_stop", self.audio_path or "", self.patient, "Live streaming recognition finished")
+        return self.transcript
+
+    def _requests(self) -> Iterator[types.StreamingRecognizeRequest]:
+        """Yield queued audio until stopped or the session nears the API limit."""
+        types = speech_types()
+        deadline = time.monotonic() + STREAM_SESSION_SEC
+        while time.monotonic() < deadline:
+            try:
+                chunk = self._audio.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if chunk is None:
+                self._closed = True
+                return
+            yield types.StreamingRecognizeRequest(audio_content=chunk)
+
+    def _run(self) -> None:
+        client = self._client or get_speech_client()
+        config = recognition_config("LINEAR16", SAMPLE_RATE, CHANNELS)
+        streaming_config = speech_types().StreamingRecognitionConfig(config=config, interim_results=True)
+        _set_status(self.status_cb, "Live transcription…")
+        try:
+            while not self._closed:
+                responses = client.streaming_recognize(config=streaming_config, requests=self._requests())
+                for response in responses:
+                    self._handle(response)
+        except Exception as exc:  # pragma: no cover - API failure
+            self.error = exc
+            _set_status(self.status_cb, "Live transcription failed")
+            # Keep draining so a dead stream does not accumulate audio until stop()
+            while not self._closed and self._audio.get() is not None:
+                pass
+
+    def _handle(self, response) -> None:
+        interim: List[str] = []
+        for result in response.results:
+            if not result.alternatives:
+                continue
+            text = result.alternatives[0].transcript.strip()
+            if not text:
+                continue
+            if result.is_final:
+                self._finals.append(text)
+                if self.on_final:
+                    self.on_final(text)
+            else:
+                interim.append(text)
+        if self.on_interim:
+            self.on_interim(" ".join(interim))
@@ -0,0 +1,220 @@
+"""Word-level timings and confidences kept alongside transcript text."""
+
+from __future__ import annotations
+
+import math
+import struct
+import sys
+from array import array
+from bisect import bisect_right
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from encrypted_storage import open_file
+
+SIDECAR_SUFFIX = ".words"
+_MAGIC = b"TXW2"
+_HEADER = struct.Struct("<4sII")
+# Characters searched ahead for the next word when aligning with edited text
+ALIGN_WINDOW_CHARS = 200
+
+
+class Word(NamedTuple):
+    text: str
+    start: float  # Seconds into the original recording
+    end: float
+    confidence: float  # 0..1, NaN when the engine gave none
+
+
+class WordTimings:
+    """
+    Words of a transcript with start/end offsets and confidences.
+
+    Stored as parallel float32 arrays (12 bytes per word plus the word text),
+    so an hour of dictation costs well under a megabyte in memory and on
+    disk. Times are seconds into the original recording, after mapping back
+    through any silence trimming. ``line_starts`` holds the index of the
+    first word of each transcript line, so line-based processing (such as
+    filler removal) can treat the words exactly like the text.
+    """
+
+    __slots__ = ("words", "starts", "ends", "confidences", "line_starts")
+
+    def __init__(self) -> None:
+        self.words: List[str] = []
+        self.starts = array("f")
+        self.ends = array("f")
+        self.confidences = array("f")
+        self.line_starts = array("I")
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def __getitem__(self, index: int) -> Word:
+        return Word(self.words[index], self.starts[index], self.ends[index], self.confidences[index])
+
+    def __iter__(self) -> Iterator[Word]:
+        for index in range(len(self.words)):
+            yield self[index]
+
+    def new_line(self) -> None:
+        """Start a new transcript line with the next appended word."""
+        if not self.line_starts or self.line_starts[-1] != len(self.words):
+            self.line_starts.append(len(self.words))
+
+    def lines(self) -> Iterator[Tuple[int, int]]:
+        """``(start, stop)`` word index ranges of each line."""
+        starts = [start for start in self.line_starts if start < len(self.words)]
+        if not starts or starts[0] != 0:
+            starts.insert(0, 0)
+        for index, start in enumerate(starts):
+            yield start, starts[index + 1] if index + 1 < len(starts) else len(self.words)
+
+    def append(self, text: str, start: float, end: float, confidence: float = math.nan) -> None:
+        self.words.append(text)
+        self.starts.append(start)
+        self.ends.append(end)
+        self.confidences.append(confidence)
+
+    def extend(self, other: WordTimings, skip: int = 0) -> None:
+        """Append ``other``'s words as new lines, leaving out its first ``skip`` (e.g. a segment overlap)."""
+        base = len(self.words)
+        for start, stop in other.lines():
+            position = base + max(0, start - skip)
+            if stop > skip and (not self.line_starts or self.line_starts[-1] != position):
+                self.line_starts.append(position)
+        self.words.extend(other.words[skip:])
+        self.starts.extend(other.starts[skip:])
+        self.ends.extend(other.ends[skip:])
+        self.confidences.extend(other.confidences[skip:])
+
+    def select(self, keep: Iterable[int]) -> WordTimings:
+        """A copy with only the words at the given indexes (in order); lines left empty disappear."""
+        selected = WordTimings()
+        line = -1
+        for index in keep:
+            word_line = bisect_right(self.line_starts, index)
+            if word_line != line:
+                selected.new_line()
+                line = word_line
+            selected.append(self.words[index], self.starts[index], self.ends[index], self.confidences[index])
+        return selected
+
+    def remap(self, convert: Callable[[float], float]) -> None:
+        """Convert every offset in place (e.g. ``TimeMap.to_original``)."""
+        self.starts = array("f", map(convert, self.starts))
+        self.ends = array("f", map(convert, self.ends))
+
+    def low_confidence(self, threshold: float) -> List[int]:
+        """Indexes of words recognized with confidence below ``threshold``."""
+        return [index for index, value in enumerate(self.confidences) if value < threshold]
+
+    def at_time(self, seconds: float) -> Optional[int]:
+        """Index of the word spoken at (or last before) ``seconds`` into the recording."""
+        index = bisect_right(self.starts, seconds) - 1
+        return index if index >= 0 else None
+
+    def locate(self, text: str) -> List[int]:
+        """
+        Character offset of each word in ``text`` (-1 where it was not found).
+
+        Words are matched in order, each searched for only a short way past
+        the previous match, so text that was cleaned, wrapped in a template or
+        lightly edited still lines up; words removed from the text are skipped.
+        """
+        offsets: List[int] = []
+        # Until the first word is found (e.g. after a long template header) search the whole text
+        position = max(0, text.find(" ".join(self.words[:3])))
+        matched = False
+        for word in self.words:
+            limit = position + ALIGN_WINDOW_CHARS + len(word) if matched else len(text)
+            found = text.find(word, position, limit)
+            offsets.append(found)
+            if found >= 0:
+                position = found + len(word)
+                matched = True
+        return offsets
+
+    # Serialization ------------------------------------------------------------
+    def to_bytes(self) -> bytes:
+        arrays = [self.starts, self.ends, self.confidences, self.line_starts]
+        if sys.byteorder == "big":
+            arrays = [array(values.typecode, values) for values in arrays]
+            for values in arrays:
+                values.byteswap()
+        text = "\n".join(self.words).encode("utf-8")
+        header = _HEADER.pack(_MAGIC, len(self.words), len(self.line_starts))
+        return header + b"".join(values.tobytes() for values in arrays) + text
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> WordTimings:
+        magic, count, lines = _HEADER.unpack_from(data)
+        if magic != _MAGIC:
+            raise ValueError("Not a word timings file")
+        timings = cls()
+        offset = _HEADER.size
+        for name, typecode, length in (
+            ("starts", "f", count),
+            ("ends", "f", count),
+            ("confidences", "f", count),
+            ("line_starts", "I", lines),
+        ):
+            values = array(typecode)
+            values.frombytes(data[offset : offset + length * values.itemsize])
+            if sys.byteorder == "big":
+                values.byteswap()
+            setattr(timings, name, values)
+            offset += length * values.itemsize
+        text = data[offset:].decode("utf-8")
+        timings.words = text.split("\n") if count else []
+        if len(timings.words) != count or len(timings.line_starts) != lines:
+            raise ValueError("Truncated word timings file")
+        return timings
+
+    def save(self, path: Path) -> None:
+        with open_file(path, "wb") as handle:
+            handle.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path: Path) -> WordTimings:
+        with open_file(path) as handle:
+            return cls.from_bytes(handle.read())
+
+    def __reduce__(self):
+        # Pickled in the compact form, e.g. when returned from a worker process
+        return (WordTimings.from_bytes, (self.to_bytes(),))
+
+
+class Transcript(str):
+    """Transcript text that may carry the WordTimings it was recognized with."""
+
+    words: Optional[WordTimings]
+
+    def __new__(cls, text: str, words: Optional[WordTimings] = None) -> Transcript:
+        transcript = super().__new__(cls, text)
+        transcript.words = words if words else None
+        return transcript
+
+    def __reduce__(self):
+        return (Transcript, (str(self), self.words))
+
+
+def words_of(transcript: str) -> Optional[WordTimings]:
+    """The word timings of ``transcript``, if it carries any."""
+    return transcript.words if isinstance(transcript, Transcript) else None
+
+
+def sidecar_path(transcription: Path) -> Path:
+    """Where the word timings of a saved transcription are kept."""
+    return transcription.with_suffix(SIDECAR_SUFFIX)
+
+
+def load_words(transcription: Path) -> Optional[WordTimings]:
+    """Word timings saved next to ``transcription``; None if there are none or they are unreadable."""
+    path = sidecar_path(transcription)
+    if not path.exists():
+        return None
+    try:
+        return WordTimings.load(path)
+    except (OSError, ValueError, struct.error):
+        return None
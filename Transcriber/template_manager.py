@@ -2,30 +2,100 @@
 
 from __future__ import annotations
 
+import itertools
 import re
+import threading
 from pathlib import Path
-from typing import Dict, Mapping
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
 
 from config import TEMPLATES_DIR
+from metrics import timed
 
 PLACEHOLDER_PATTERN = re.compile(r"{{\s*([A-Z0-9_]+)\s*}}")
 
 
+class CompiledTemplate:
+    """A template parsed once into alternating literal text and placeholder keys."""
+
+    def __init__(self, text: str) -> None:
+        literals: List[str] = []
+        keys: List[str] = []
+        position = 0
+        for match in PLACEHOLDER_PATTERN.finditer(text):
+            literals.append(text[position : match.start()])
+            keys.append(match.group(1))
+            position = match.end()
+        literals.append(text[position:])
+        self.literals: Tuple[str, ...] = tuple(literals)
+        self.keys: Tuple[str, ...] = tuple(keys)
+
+    def render(self, transcript: str, context: Mapping[str, str] | None = None) -> str:
+        """Fill the placeholders; unknown keys render as empty text."""
+        replacements = dict(context or {})
+        replacements.setdefault("TRANSCRIPT", transcript)
+        parts = [self.literals[0]]
+        for key, literal in zip(self.keys, self.literals[1:]):
+            parts.append(replacements.get(key, ""))
+            parts.append(literal)
+        return "".join(parts)
+
+
+_compiled: Dict[Path, Tuple[int, int, CompiledTemplate]] = {}
+_listing: Tuple[int, Dict[str, Path]] = (-1, {})
+_lock = threading.Lock()
+
+
+def get_template(template_path: Path) -> CompiledTemplate:
+    """Return the compiled template, re-reading the file only when its mtime or size changed."""
+    stat = template_path.stat()
+    with _lock:
+        cached = _compiled.get(template_path)
+        if cached and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+            return cached[2]
+    template = CompiledTemplate(template_path.read_text(encoding="utf-8"))
+    with _lock:
+        _compiled[template_path] = (stat.st_mtime_ns, stat.st_size, template)
+    return template
+
+
 def load_templates() -> Dict[str, Path]:
-    """Return a mapping of template name to file path."""
-    if not TEMPLATES_DIR.exists():
+    """Return a mapping of template name to file path, re-listed when the folder changes."""
+    global _listing
+    try:
+        mtime = TEMPLATES_DIR.stat().st_mtime_ns
+    except FileNotFoundError:
         return {}
-    return {path.stem: path for path in TEMPLATES_DIR.glob("*.txt")}
+    with _lock:
+        if _listing[0] != mtime:
+            _listing = (mtime, {path.stem: path for path in TEMPLATES_DIR.glob("*.txt")})
+        return dict(_listing[1])
 
 
+@timed("template")
 def apply_template(template_path: Path, transcript: str, context: Mapping[str, str] | None = None) -> str:
     """Merge transcript + optional context into the chosen template."""
-    raw = template_path.read_text(encoding="utf-8")
-    replacements = dict(context or {})
-    replacements.setdefault("TRANSCRIPT", transcript)
+    return get_template(template_path).render(transcript, context)
+
 
-    def _replace(match: re.Match[str]) -> str:
-        key = match.group(1)
-        return replacements.get(key, "")
+def render_many(
+    template_path: Path,
+    transcripts: Iterable[str],
+    contexts: Optional[Iterable[Mapping[str, str] | None]] = None,
+) -> Iterator[str]:
+    """
+    Render many transcripts into one template, e.g. to re-template archived notes.
 
-    return PLACEHOLDER_PATTERN.sub(_replace, raw)
+    The template is checked and compiled once for the whole batch. ``contexts``
+    supplies per-transcript placeholders (PATIENT, DOB, ...) in the same order
+    and must have one entry per transcript; results are yielded lazily.
+    """
+    template = get_template(template_path)
+    if contexts is None:
+        for transcript in transcripts:
+            yield template.render(transcript, None)
+        return
+    missing = object()
+    for transcript, context in itertools.zip_longest(transcripts, contexts, fillvalue=missing):
+        if transcript is missing or context is missing:
+            raise ValueError("render_many needs exactly one context per transcript")
+        yield template.render(transcript, context)
@@ -0,0 +1,18 @@
+"""Run the tests against the modules in Transcriber/, with all data kept in a temporary folder."""
+
+from __future__ import annotations
+
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+# Set before config is first imported: every data folder lives under DATA_DIR
+DATA_DIR = tempfile.mkdtemp(prefix="transcriber-tests-")
+os.environ["TRANSCRIBER_DATA_DIR"] = DATA_DIR
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def pytest_unconfigure(config) -> None:
+    shutil.rmtree(DATA_DIR, ignore_errors=True)
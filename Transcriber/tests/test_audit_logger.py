@@ -0,0 +1,81 @@
+"""Audit log: tamper evidence of the hash chain and recovery from failed writes."""
+
+from __future__ import annotations
+
+import csv
+import io
+import os
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+
+import audit_logger
+from config import AUDIT_LOG_DIR
+
+
+def test_row_rewritten_without_key_fails_verify() -> None:
+    audit_logger.log("save_transcription", "note.txt", "Jane Doe", "Saved transcription")
+    audit_logger.log("secure_delete", "note.txt", "Jane Doe", "Overwritten 3 passes and deleted")
+    audit_logger.shutdown()  # Write the rows and release the active file
+    assert audit_logger.verify(full=True).ok
+
+    # Someone who can edit the audit folder can read every file in it, but not the key
+    readable = b"".join(path.read_bytes() for path in AUDIT_LOG_DIR.iterdir() if path.is_file())
+    assert audit_logger._chain_key() not in readable
+
+    # Rewrite a row and re-chain every row with the best key they can get
+    with audit_logger.LOG_FILE.open("r", newline="", encoding="utf-8") as handle:
+        header, *rows = list(csv.reader(handle))
+    rows[0][3] = "John Roe"
+    guessed = os.urandom(32)
+    previous = ""
+    for row in rows:
+        row[-1] = previous = audit_logger._chain(guessed, previous, row[:-1])
+    output = io.StringIO()
+    csv.writer(output).writerows([header, *rows])
+    audit_logger.LOG_FILE.write_bytes(output.getvalue().encode("utf-8"))
+
+    result = audit_logger.verify(full=True)
+    assert not result.ok
+    assert any("row 1: chain mismatch" in problem for problem in result.problems)
+
+
+def _wait_for(condition, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_failed_flush_keeps_rows_and_retries(tmp_path: Path, monkeypatch) -> None:
+    path = tmp_path / "audit_log.csv"
+    writer = audit_logger.AuditWriter(path, flush_interval=0.05, fsync="batch")
+    real_fsync = os.fsync
+    failed = []
+
+    def fsync(descriptor: int) -> None:
+        if not failed:
+            failed.append(descriptor)
+            raise OSError(28, "No space left on device")
+        real_fsync(descriptor)
+
+    monkeypatch.setattr(os, "fsync", fsync)
+    timestamp = datetime.now(timezone.utc).isoformat()
+    with pytest.warns(RuntimeWarning, match="will retry"):
+        writer.write([timestamp, "save_transcription", "a.txt", "", ""])
+        _wait_for(lambda: writer.error is not None)
+    writer.write([timestamp, "save_transcription", "b.txt", "", ""])
+    _wait_for(lambda: writer.error is None and not writer._pending)
+    assert writer._thread.is_alive()
+    writer.close()
+
+    with path.open("r", newline="", encoding="utf-8") as handle:
+        rows = list(csv.DictReader(handle))
+    assert [row["file"] for row in rows] == ["a.txt", "b.txt"]
+    previous = ""
+    for row in rows:
+        fields = [row[column] for column in audit_logger.HEADER[:-1]]
+        assert row["chain"] == audit_logger._chain(audit_logger._chain_key(), previous, fields)
+        previous = row["chain"]
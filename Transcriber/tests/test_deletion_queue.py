@@ -0,0 +1,48 @@
+"""The secure-deletion worker keeps going after a failed job."""
+
+from __future__ import annotations
+
+import json
+import threading
+from pathlib import Path
+
+import audit_logger
+import deletion_queue
+from deletion_queue import DeletionQueue
+
+
+def test_failed_deletion_does_not_stop_later_ones(tmp_path: Path, monkeypatch) -> None:
+    broken = tmp_path / "broken.txt"
+    healthy = tmp_path / "healthy.txt"
+    broken.write_text("corrupt sidecar")
+    healthy.write_text("transcript")
+    real_delete = deletion_queue.secure_delete
+
+    def secure_delete(path: Path, patient: str = "", progress=None) -> None:
+        if path == broken:
+            raise ValueError("Not a word timings file")
+        real_delete(path, patient, progress)
+
+    monkeypatch.setattr(deletion_queue, "secure_delete", secure_delete)
+    journal = tmp_path / "deletions.jsonl"
+    deletions = DeletionQueue(journal_path=journal)
+    deletions.start()
+    try:
+        failed = deletions.submit(broken, "Jane Doe")
+        deleted = deletions.submit(healthy, "Jane Doe")
+        waiter = threading.Thread(target=deletions.join, daemon=True)
+        waiter.start()
+        waiter.join(10)
+        assert not waiter.is_alive(), "the worker stopped after the failed deletion"
+    finally:
+        deletions.stop()
+
+    assert broken.exists() and not healthy.exists()
+    assert [job.id for job in deletions.pending()] == [failed.id]
+    assert deletions.pending()[0].error == "Not a word timings file"
+    # Journaled as unfinished, so the next start retries it
+    records = [json.loads(line) for line in journal.read_text(encoding="utf-8").splitlines()]
+    assert [record for record in records if record["id"] == failed.id][-1]["done"] is False
+    assert [record for record in records if record["id"] == deleted.id][-1]["done"] is True
+    actions = [row["action"] for row in audit_logger.query(file=str(broken))]
+    assert "secure_delete_failed" in actions
@@ -0,0 +1,235 @@
+"""Content-addressed cache of raw transcripts, encrypted at rest."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Mapping, Optional, Set
+
+from config import (
+    CACHE_DIR,
+    TRANSCRIPT_CACHE_MAX_AGE_DAYS,
+    TRANSCRIPT_CACHE_MAX_BYTES,
+)
+from encrypted_storage import open_file, read_text, write_text
+from structured_transcript import Transcript, WordTimings, words_of
+
+MANIFEST_FILE = CACHE_DIR / "manifest.jsonl"
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def audio_digest(audio_path: Path) -> str:
+    """SHA-256 of the recording's decrypted contents (so re-encrypted copies match)."""
+    digest = hashlib.sha256()
+    with open_file(audio_path) as handle:
+        for block in iter(lambda: handle.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def audio_samplerate(audio_path: Path) -> int:
+    import soundfile as sf
+
+    with open_file(audio_path) as raw:
+        return sf.info(raw).samplerate
+
+
+def cache_key(digest: str, config: Mapping[str, object]) -> str:
+    """Key for one recording recognized with one configuration (engine, model, language, rate)."""
+    settings = json.dumps(dict(config), sort_keys=True)
+    return hashlib.sha256(f"{digest}\n{settings}".encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CacheEntry:
+    """One cached transcript and the recordings it was made from."""
+
+    key: str
+    size: int
+    sources: List[str] = field(default_factory=list)
+    created: float = field(default_factory=time.time)
+    used: float = field(default_factory=time.time)
+
+
+class TranscriptCache:
+    """
+    Raw transcripts keyed by audio content and recognition settings.
+
+    Entries are written with ``write_text`` (encrypted per file) and listed in
+    a JSON-lines manifest with the recordings they came from. When one of
+    those recordings is securely deleted, ``forget_source`` deletes the
+    entry too, so a transcript never outlives its audio in the cache. Entries
+    older than ``max_age`` seconds are dropped, and the least recently used
+    ones once the cache exceeds ``max_bytes``.
+    """
+
+    def __init__(
+        self,
+        directory: Path = CACHE_DIR,
+        max_bytes: int = TRANSCRIPT_CACHE_MAX_BYTES,
+        max_age: float = TRANSCRIPT_CACHE_MAX_AGE_DAYS * 86400,
+    ) -> None:
+        self.directory = directory
+        self.manifest = directory / MANIFEST_FILE.name
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._entries: Dict[str, CacheEntry] = {}
+        self._by_source: Dict[str, Set[str]] = {}  # Recording -> keys of its entries
+        self._loaded = False
+        self._lines = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.txt"
+
+    def _words_path(self, key: str) -> Path:
+        return self.directory / f"{key}.words"
+
+    # Public API ---------------------------------------------------------------
+    def get(self, key: str, source: Optional[Path] = None) -> Optional[Transcript]:
+        """Return the cached transcript (with its word timings), also recording ``source`` as one of its recordings."""
+        with self._lock:
+            self._load_locked()
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expired = time.time() - entry.created > self.max_age
+            if not expired:
+                entry.used = time.time()
+                if source is not None and str(source) not in entry.sources:
+                    entry.sources.append(str(source))
+                    self._by_source.setdefault(str(source), set()).add(key)
+                self._append_locked(asdict(entry))
+        if expired:
+            self._delete([key])
+            return None
+        try:
+            text = read_text(self._path(key))
+            words_path = self._words_path(key)
+            words = WordTimings.load(words_path) if words_path.exists() else None
+        except (OSError, ValueError):
+            self._delete([key])  # Missing or unreadable; recognize again
+            return None
+        return Transcript(text, words)
+
+    def put(self, key: str, source: Path, transcript: str) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        write_text(path, transcript)
+        size = path.stat().st_size
+        words = words_of(transcript)
+        if words is not None:
+            words.save(self._words_path(key))
+            size += self._words_path(key).stat().st_size
+        with self._lock:
+            self._load_locked()
+            entry = self._entries.get(key) or CacheEntry(key=key, size=0)
+            entry.size = size
+            entry.used = time.time()
+            if str(source) not in entry.sources:
+                entry.sources.append(str(source))
+            self._entries[key] = entry
+            self._by_source.setdefault(str(source), set()).add(key)
+            self._append_locked(asdict(entry))
+        self.evict()
+
+    def forget_source(self, source: Path) -> None:
+        """Delete every cached transcript (any engine or settings) of a recording that is being deleted."""
+        with self._lock:
+            self._load_locked()
+            keys = list(self._by_source.get(str(source), ()))
+        if keys:
+            self._delete(keys)
+
+    def evict(self) -> None:
+        """Delete expired entries, then least recently used ones above ``max_bytes``."""
+        now = time.time()
+        with self._lock:
+            self._load_locked()
+            victims = [key for key, entry in self._entries.items() if now - entry.created > self.max_age]
+            kept = sorted(
+                (entry for key, entry in self._entries.items() if key not in victims),
+                key=lambda entry: entry.used,
+            )
+            total = sum(entry.size for entry in kept)
+            for entry in kept:
+                if total <= self.max_bytes:
+                    break
+                victims.append(entry.key)
+                total -= entry.size
+        if victims:
+            self._delete(victims)
+
+    # Internals ----------------------------------------------------------------
+    def _delete(self, keys: List[str]) -> None:
+        # Imported here: file_manager imports this module to purge entries on delete
+        from file_manager import secure_delete
+
+        with self._lock:
+            removed = [self._entries.pop(key) for key in keys if key in self._entries]
+            for entry in removed:
+                for source in entry.sources:
+                    keys = self._by_source.get(source)
+                    if keys is not None:
+                        keys.discard(entry.key)
+                        if not keys:
+                            del self._by_source[source]
+                self._append_locked({"key": entry.key, "deleted": True})
+        for entry in removed:
+            secure_delete(self._path(entry.key))
+            secure_delete(self._words_path(entry.key))
+
+    def _load_locked(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        if not self.manifest.exists():
+            return
+        with self.manifest.open("r", encoding="utf-8") as handle:
+            for line in handle:
+                self._lines += 1
+                try:
+                    record = json.loads(line)
+                    if record.get("deleted"):
+                        self._entries.pop(record["key"], None)
+                    else:
+                        self._entries[record["key"]] = CacheEntry(**record)
+                except (ValueError, TypeError, KeyError):
+                    continue  # Torn write from an interrupted append
+        for entry in self._entries.values():
+            for source in entry.sources:
+                self._by_source.setdefault(source, set()).add(entry.key)
+        if self._lines > 2 * len(self._entries) + 100:
+            self._compact_locked()
+
+    def _append_locked(self, record: Dict[str, object]) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with self.manifest.open("a", encoding="utf-8") as handle:
+            handle.write(json.dumps(record) + "\n")
+        self._lines += 1
+
+    def _compact_locked(self) -> None:
+        temp = self.manifest.with_suffix(".tmp")
+        with temp.open("w", encoding="utf-8") as handle:
+            for entry in self._entries.values():
+                handle.write(json.dumps(asdict(entry)) + "\n")
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(temp, self.manifest)
+        self._lines = len(self._entries)
+
+
+_cache = TranscriptCache()
+
+
+def get_cache() -> TranscriptCache:
+    return _cache
+
+
+def forget_source(source: Path) -> None:
+    _cache.forget_source(source)
@@ -0,0 +1,421 @@
+"""Pluggable transcription engines (Google Cloud, local CPU) with automatic fallback."""
+
+from __future__ import annotations
+
+import abc
+import asyncio
+import atexit
+import importlib.util
+import json
+import math
+import socket
+import threading
+import time
+import urllib.parse
+import urllib.request
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from audit_logger import log
+from config import (
+    GCS_MODEL,
+    LANGUAGE_CODE,
+    LOCAL_MODEL_DIR,
+    LOCAL_WORKERS,
+    NETWORK_CHECK_HOST,
+    NETWORK_CHECK_TTL_SEC,
+    TRANSCRIPT_CACHE_ENABLED,
+    TRANSCRIPTION_BACKENDS,
+)
+from structured_transcript import Transcript, WordTimings
+from transcript_cache import audio_digest, audio_samplerate, cache_key, get_cache
+
+SpeechStatusCallback = Optional[Callable[[str], None]]
+TranscriptionDoneCallback = Optional[Callable[["Future[str]"], None]]
+
+# Frames fed to the local recognizer per call
+LOCAL_BLOCK_FRAMES = 8000
+
+
+class BackendUnavailableError(RuntimeError):
+    """No configured transcription backend could be reached."""
+
+
+def _set_status(callback: SpeechStatusCallback, message: str) -> None:
+    if callback:
+        callback(message)
+
+
+class TranscriptionBackend(abc.ABC):
+    """
+    One transcription engine.
+
+    ``available`` is a cheap pre-flight check; ``is_outage`` tells the
+    dispatcher whether an error means "try the next backend" (network or
+    service down) rather than a problem with the recording itself.
+    """
+
+    name = ""
+
+    def available(self) -> bool:
+        return True
+
+    def recognition_config(self) -> Dict[str, object]:
+        """Settings that change the transcript; part of the result cache key."""
+        return {"engine": self.name}
+
+    def is_outage(self, exc: BaseException) -> bool:
+        return False
+
+    @abc.abstractmethod
+    def transcribe(self, audio_path: Path, patient: str = "", status_cb: SpeechStatusCallback = None) -> str:
+        """Return the transcript of ``audio_path``."""
+
+    async def transcribe_async(
+        self, audio_path: Path, patient: str = "", status_cb: SpeechStatusCallback = None
+    ) -> str:
+        return await asyncio.to_thread(self.transcribe, audio_path, patient, status_cb)
+
+
+# Google Cloud ---------------------------------------------------------------------
+class GoogleBackend(TranscriptionBackend):
+    """Cloud Speech-to-Text through gcloud_transcriber (VAD, chunking, GCS staging)."""
+
+    name = "google"
+
+    def __init__(self, host: str = NETWORK_CHECK_HOST, ttl: float = NETWORK_CHECK_TTL_SEC) -> None:
+        self.host = host
+        self.ttl = ttl
+        self._checked = (0.0, False)
+        self._lock = threading.Lock()
+
+    def _first_hop(self) -> Tuple[str, int]:
+        """Where a connection to the Speech endpoint goes first: the HTTPS proxy, if one applies."""
+        proxy = urllib.request.getproxies().get("https")
+        if proxy and not urllib.request.proxy_bypass(self.host):
+            parsed = urllib.parse.urlsplit(proxy if "://" in proxy else f"http://{proxy}")
+            if parsed.hostname:
+                return parsed.hostname, parsed.port or (443 if parsed.scheme == "https" else 80)
+        return self.host, 443
+
+    def available(self) -> bool:
+        """
+        Whether the Speech endpoint (or the HTTPS proxy in front of it) accepts
+        a TCP connection; cached for ``ttl`` seconds. Outages the check misses
+        are still caught by ``is_outage``.
+        """
+        with self._lock:
+            checked_at, reachable = self._checked
+            if time.monotonic() - checked_at < self.ttl:
+                return reachable
+        try:
+            socket.create_connection(self._first_hop(), timeout=3).close()
+            reachable = True
+        except OSError:
+            reachable = False
+        with self._lock:
+            self._checked = (time.monotonic(), reachable)
+        return reachable
+
+    def recognition_config(self) -> Dict[str, object]:
+        return {"engine": self.name, "model": GCS_MODEL, "language": LANGUAGE_CODE}
+
+    def is_outage(self, exc: BaseException) -> bool:
+        if isinstance(exc, (ConnectionError, TimeoutError, socket.gaierror)):
+            return True
+        try:
+            from google.api_core import exceptions as api_exceptions
+            from google.auth.exceptions import TransportError
+            from requests.exceptions import ConnectionError as RequestsConnectionError
+        except ImportError:
+            return False
+        outage = isinstance(
+            exc,
+            (
+                api_exceptions.ServiceUnavailable,
+                api_exceptions.DeadlineExceeded,
+                api_exceptions.RetryError,
+                TransportError,
+                RequestsConnectionError,
+            ),
+        )
+        if outage:
+            with self._lock:
+                self._checked = (time.monotonic(), False)  # Skip straight to fallback for a while
+        return outage
+
+    def transcribe(self, audio_path: Path, patient: str = "", status_cb: SpeechStatusCallback = None) -> str:
+        from gcloud_transcriber import transcribe_recording
+
+        return transcribe_recording(audio_path, patient, status_cb)
+
+    async def transcribe_async(
+        self, audio_path: Path, patient: str = "", status_cb: SpeechStatusCallback = None
+    ) -> str:
+        from gcloud_transcriber import transcribe_recording_async
+
+        return await transcribe_recording_async(audio_path, patient, status_cb)
+
+
+# Local CPU engine -----------------------------------------------------------------
+_worker_model = None
+
+
+def _init_local_worker(model_dir: str) -> None:
+    """Load the model once per worker process; later jobs reuse it."""
+    global _worker_model
+    from vosk import Model, SetLogLevel
+
+    SetLogLevel(-1)
+    _worker_model = Model(model_dir)
+
+
+def _local_transcribe(audio_path: str) -> Transcript:
+    """Recognize a (possibly encrypted) recording in a worker process."""
+    import soundfile as sf
+    from vosk import KaldiRecognizer
+
+    from encrypted_storage import open_file
+
+    lines: List[str] = []
+    words = WordTimings()
+
+    def collect(result: str) -> None:
+        parsed = json.loads(result)
+        text = parsed.get("text", "").strip()
+        if text:
+            lines.append(text)
+            words.new_line()
+            for word in parsed.get("result", []):
+                words.append(word["word"], word["start"], word["end"], word.get("conf", math.nan))
+
+    with open_file(Path(audio_path)) as raw, sf.SoundFile(raw) as source:
+        recognizer = KaldiRecognizer(_worker_model, source.samplerate)
+        recognizer.SetWords(True)
+        for block in source.blocks(blocksize=LOCAL_BLOCK_FRAMES, dtype="int16", always_2d=True):
+            mono = block.mean(axis=1).astype("int16") if block.shape[1] > 1 else block[:, 0]
+            if recognizer.AcceptWaveform(mono.tobytes()):
+                collect(recognizer.Result())
+        collect(recognizer.FinalResult())
+    return Transcript("\n".join(lines), words)
+
+
+class LocalBackend(TranscriptionBackend):
+    """
+    Offline recognition with a Vosk model in LOCAL_MODEL_DIR.
+
+    Recognition is CPU-bound, so it runs in a pool of LOCAL_WORKERS processes
+    (each loading the model once) instead of competing with the GUI and
+    audio threads for the GIL. Install with ``pip install vosk`` and unpack a
+    model from https://alphacephei.com/vosk/models into LOCAL_MODEL_DIR.
+    """
+
+    name = "local"
+
+    def __init__(self, model_dir: Path = LOCAL_MODEL_DIR, workers: int = LOCAL_WORKERS) -> None:
+        self.model_dir = model_dir
+        self.workers = max(1, workers)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def available(self) -> bool:
+        return self.model_dir.is_dir() and importlib.util.find_spec("vosk") is not None
+
+    def recognition_config(self) -> Dict[str, object]:
+        return {"engine": self.name, "model": self.model_dir.name}
+
+    def _executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    initializer=_init_local_worker,
+                    initargs=(str(self.model_dir),),
+                )
+                atexit.register(self.shutdown)
+            return self._pool
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def transcribe(self, audio_path: Path, patient: str = "", status_cb: SpeechStatusCallback = None) -> str:
+        if not audio_path.exists():
+            raise FileNotFoundError(audio_path)
+        _set_status(status_cb, "Transcribing locally…")
+        try:
+            transcript = self._executor().submit(_local_transcribe, str(audio_path)).result()
+        except BrokenProcessPool:
+            self.shutdown()  # A worker died (e.g. the model failed to load); start afresh next time
+            raise
+        log("local_transcribe", audio_path, patient, f"Transcribed offline with {self.model_dir.name}")
+        _set_status(status_cb, "Completed")
+        return transcript
+
+    async def transcribe_async(
+        self, audio_path: Path, patient: str = "", status_cb: SpeechStatusCallback = None
+    ) -> str:
+        if not audio_path.exists():
+            raise FileNotFoundError(audio_path)
+        _set_status(status_cb, "Transcribing locally…")
+        future = self._executor().submit(_local_transcribe, str(audio_path))
+        try:
+            transcript = await asyncio.wrap_future(future)
+        except BrokenProcessPool:
+            self.shutdown()
+            raise
+        log("local_transcribe", audio_path, patient, f"Transcribed offline with {self.model_dir.name}")
+        _set_status(status_cb, "Completed")
+        return transcript
+
+
+# Dispatch -------------------------------------------------------------------------
+BACKEND_TYPES: Dict[str, Callable[[], TranscriptionBackend]] = {
+    "google": GoogleBackend,
+    "local": LocalBackend,
+}
+
+_backends: Optional[List[TranscriptionBackend]] = None
+_backends_lock = threading.Lock()
+
+
+def get_backends() -> List[TranscriptionBackend]:
+    """The backends named in TRANSCRIPTION_BACKENDS, in order of preference."""
+    global _backends
+    with _backends_lock:
+        if _backends is None:
+            unknown = [name for name in TRANSCRIPTION_BACKENDS if name not in BACKEND_TYPES]
+            if unknown:
+                raise ValueError(f"Unknown transcription backend(s): {', '.join(unknown)}")
+            _backends = [BACKEND_TYPES[name]() for name in TRANSCRIPTION_BACKENDS]
+        return list(_backends)
+
+
+def configure(backends: List[TranscriptionBackend]) -> None:
+    """Replace the configured backends (fakes for tests and benchmarks, custom engines)."""
+    global _backends
+    with _backends_lock:
+        _backends = list(backends)
+
+
+def _skip(backend: TranscriptionBackend, audio_path: Path, patient: str, status_cb: SpeechStatusCallback, reason: str) -> None:
+    log("transcribe_fallback", audio_path, patient, f"{backend.name} backend unavailable: {reason}")
+    _set_status(status_cb, f"{backend.name.capitalize()} transcription unavailable, trying next engine…")
+
+
+def _cache_keys(audio_path: Path, backends: Sequence[TranscriptionBackend]) -> Dict[str, str]:
+    """Result cache key per backend name (empty when caching is off)."""
+    if not TRANSCRIPT_CACHE_ENABLED:
+        return {}
+    digest = audio_digest(audio_path)
+    samplerate = audio_samplerate(audio_path)
+    return {
+        backend.name: cache_key(digest, {**backend.recognition_config(), "samplerate": samplerate})
+        for backend in backends
+    }
+
+
+def _cached_transcript(
+    audio_path: Path, patient: str, backend: TranscriptionBackend, keys: Dict[str, str], status_cb: SpeechStatusCallback
+) -> Optional[str]:
+    """A transcript of this exact audio made earlier by ``backend`` with its current settings."""
+    if backend.name not in keys:
+        return None
+    transcript = get_cache().get(keys[backend.name], audio_path)
+    if transcript is not None:
+        log("transcript_cache_hit", audio_path, patient, f"Reused cached {backend.name} transcript")
+        _set_status(status_cb, "Completed (cached)")
+    return transcript
+
+
+def _store(audio_path: Path, backend: TranscriptionBackend, keys: Dict[str, str], transcript: str) -> None:
+    if backend.name in keys:
+        get_cache().put(keys[backend.name], audio_path, transcript)
+
+
+def transcribe(audio_path: Path, patient: str = "", status_cb: SpeechStatusCallback = None) -> str:
+    """
+    Transcribe with the first reachable backend, falling back on outages.
+
+    A recording already transcribed by a backend with the same settings is
+    answered from the transcript cache without any recognition. A cached
+    result of a less preferred backend (e.g. made offline during an outage)
+    is only used while the backends before it are unavailable.
+    """
+    backends = get_backends()
+    keys = _cache_keys(audio_path, backends)
+    failures: List[str] = []
+    for backend in backends:
+        cached = _cached_transcript(audio_path, patient, backend, keys, status_cb)
+        if cached is not None:
+            return cached
+        if not backend.available():
+            failures.append(f"{backend.name}: unavailable")
+            continue
+        try:
+            transcript = backend.transcribe(audio_path, patient, status_cb)
+        except Exception as exc:
+            if not backend.is_outage(exc):
+                raise
+            failures.append(f"{backend.name}: {exc}")
+            _skip(backend, audio_path, patient, status_cb, str(exc))
+            continue
+        _store(audio_path, backend, keys, transcript)
+        return transcript
+    raise BackendUnavailableError("No transcription backend available (" + "; ".join(failures) + ")")
+
+
+async def transcribe_async(audio_path: Path, patient: str = "", status_cb: SpeechStatusCallback = None) -> str:
+    """Asynchronous ``transcribe``."""
+    backends = get_backends()
+    keys = await asyncio.to_thread(_cache_keys, audio_path, backends)
+    failures: List[str] = []
+    for backend in backends:
+        cached = await asyncio.to_thread(_cached_transcript, audio_path, patient, backend, keys, status_cb)
+        if cached is not None:
+            return cached
+        if not await asyncio.to_thread(backend.available):
+            failures.append(f"{backend.name}: unavailable")
+            continue
+        try:
+            transcript = await backend.transcribe_async(audio_path, patient, status_cb)
+        except Exception as exc:
+            if not backend.is_outage(exc):
+                raise
+            failures.append(f"{backend.name}: {exc}")
+            _skip(backend, audio_path, patient, status_cb, str(exc))
+            continue
+        await asyncio.to_thread(_store, audio_path, backend, keys, transcript)
+        return transcript
+    raise BackendUnavailableError("No transcription backend available (" + "; ".join(failures) + ")")
+
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+
+def _background_loop() -> asyncio.AbstractEventLoop:
+    """Return the shared event loop that waits on all outstanding transcriptions."""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="transcription-loop", daemon=True).start()
+        return _loop
+
+
+def submit_transcription(
+    audio_path: Path,
+    patient: str = "",
+    status_cb: SpeechStatusCallback = None,
+    on_done: TranscriptionDoneCallback = None,
+) -> "Future[str]":
+    """Schedule ``transcribe_async`` on the shared event loop and return its future."""
+    future = asyncio.run_coroutine_threadsafe(transcribe_async(audio_path, patient, status_cb), _background_loop())
+    if on_done:
+        future.add_done_callback(on_done)
+    return future
@@ -3,105 +3,239 @@
 from __future__ import annotations
 
 import re
-from typing import List
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING, FrozenSet, Iterable, Iterator, List, Sequence, Tuple
 
 from config import FILLER_WORDS
+from metrics import timed
 
+if TYPE_CHECKING:
+    from structured_transcript import WordTimings
 
+# Characters ignored when comparing a token against the filler list
+TOKEN_STRIP_CHARS = '.,!?;:()[]{}"\''
+# A standalone "a" directly after one of these is treated as a filler
+SENTENCE_END_CHARS = '.!?;:'
+
+_MULTI_SPACE = re.compile(r' +')
+_SPACE_BEFORE_PUNCT = re.compile(r' +([.,!?;:])')
+_END = None  # Trie key marking the end of a filler phrase
+
+
+class FillerMatcher:
+    """Token trie over a filler-word list, compiled once and reused."""
+
+    def __init__(self, filler_words: Tuple[str, ...]) -> None:
+        self._trie: dict = {}
+        self.handles_article = False
+        single: set[str] = set()
+        for filler in filler_words:
+            tokens = filler.lower().split()
+            if not tokens:
+                continue
+            if tokens == ["a"]:
+                # Standalone "a" goes through the article heuristic instead of the trie
+                self.handles_article = True
+                continue
+            node = self._trie
+            for token in tokens:
+                node = node.setdefault(token, {})
+            node[_END] = {}
+            if len(tokens) == 1:
+                single.add(tokens[0])
+        self.single_words: FrozenSet[str] = frozenset(single)
+
+    def match(self, keys: List[str], start: int) -> int:
+        """Return the token length of the longest filler starting at ``start`` (0 if none)."""
+        node = self._trie
+        longest = 0
+        for offset in range(start, len(keys)):
+            node = node.get(keys[offset])
+            if node is None:
+                break
+            if _END in node:
+                longest = offset - start + 1
+        return longest
+
+    def keep(self, words: Sequence[str]) -> List[int]:
+        """Indexes of the tokens in ``words`` that are not fillers."""
+        keys = [word.lower().strip(TOKEN_STRIP_CHARS) for word in words]
+        kept: List[int] = []
+
+        i = 0
+        count = len(words)
+        while i < count:
+            length = self.match(keys, i)
+            if length:
+                i += length
+                continue
+            if self.handles_article and keys[i] == "a":
+                # Only remove "a" at the start of a sentence or before another filler
+                # (likely a filler "a" rather than an article)
+                is_at_start = not kept or words[kept[-1]][-1] in SENTENCE_END_CHARS
+                next_is_filler = i + 1 < count and keys[i + 1] in self.single_words
+                if is_at_start or next_is_filler:
+                    i += 1
+                    continue
+            kept.append(i)
+            i += 1
+        return kept
+
+    def clean_line(self, line: str) -> str:
+        """Remove fillers from one line of text."""
+        if not line.strip():
+            return _MULTI_SPACE.sub(' ', line)
+
+        words = line.split()
+        kept = [words[index] for index in self.keep(words)]
+
+        if not kept:
+            return ''
+        cleaned_line = ' '.join(kept)
+        # Preserve trailing spacing from original line
+        if line.endswith(' ') or line.endswith('\t'):
+            cleaned_line += line[-1]
+        cleaned_line = _MULTI_SPACE.sub(' ', cleaned_line)
+        return _SPACE_BEFORE_PUNCT.sub(r'\1', cleaned_line)
+
+
+@lru_cache(maxsize=16)
+def compile_fillers(filler_words: Tuple[str, ...]) -> FillerMatcher:
+    """Return the cached matcher for a filler-word tuple."""
+    return FillerMatcher(filler_words)
+
+
+def _clean_lines(lines: Iterable[str], matcher: FillerMatcher) -> Iterator[str]:
+    """Clean lines one by one, keeping at most one empty line in a row."""
+    previous_empty = False
+    for line in lines:
+        cleaned = matcher.clean_line(line)
+        if cleaned == '':
+            if previous_empty:
+                continue
+            previous_empty = True
+        else:
+            previous_empty = False
+        yield cleaned
+
+
+def _iter_lines(chunks: Iterable[str]) -> Iterator[str]:
+    """Re-split arbitrary text chunks into lines, carrying partial lines across chunks."""
+    partial: List[str] = []
+    for chunk in chunks:
+        start = 0
+        while True:
+            newline = chunk.find('\n', start)
+            if newline < 0:
+                break
+            partial.append(chunk[start:newline])
+            yield ''.join(partial)
+            partial.clear()
+            start = newline + 1
+        if start < len(chunk):
+            partial.append(chunk[start:])
+    yield ''.join(partial)
+
+
+def _strip_stream(pieces: Iterable[str]) -> Iterator[str]:
+    """Streaming equivalent of ``str.strip`` over the concatenated pieces."""
+    started = False
+    pending = ''  # Whitespace held back until more content follows it
+    for piece in pieces:
+        if not started:
+            piece = piece.lstrip()
+            if not piece:
+                continue
+            started = True
+        stripped = piece.rstrip()
+        if stripped:
+            yield pending + stripped
+            pending = piece[len(stripped):]
+        else:
+            pending += piece
+
+
+def iter_clean(chunks: Iterable[str], filler_words: List[str] | None = None) -> Iterator[str]:
+    """
+    Remove filler words from a stream of text, yielding cleaned output.
+
+    Chunks may be lines (e.g. an open file) or arbitrary slices of text; a
+    line split across chunks is reassembled before matching, so multi-word
+    fillers straddling a chunk boundary are still removed. Memory use is
+    bounded by the longest line, not the size of the input.
+
+    Args:
+        chunks: Iterable of text chunks
+        filler_words: Optional list of filler words. If None, uses config.FILLER_WORDS
+
+    Yields:
+        Cleaned text pieces; joined, they equal ``remove_filler_words`` of the whole input
+    """
+    if filler_words is None:
+        filler_words = FILLER_WORDS
+
+    if not filler_words:
+        yield from chunks
+        return
+
+    matcher = compile_fillers(tuple(filler_words))
+    lines = _clean_lines(_iter_lines(chunks), matcher)
+    yield from _strip_stream(
+        line if index == 0 else '\n' + line for index, line in enumerate(lines)
+    )
+
+
+def clean_file(source: Path, destination: Path, filler_words: List[str] | None = None) -> None:
+    """Stream-clean ``source`` into ``destination`` without loading either into memory."""
+    with source.open("r", encoding="utf-8", newline="") as reader, destination.open(
+        "w", encoding="utf-8", newline=""
+    ) as writer:
+        for piece in iter_clean(reader, filler_words):
+            writer.write(piece)
+
+
+@timed("clean")
 def remove_filler_words(text: str, filler_words: List[str] | None = None) -> str:
     """
     Remove filler words from transcription text.
-    
+
+    The filler list is compiled into a token trie once (and cached), so the
+    text is cleaned in a single linear pass regardless of list size. See
+    ``iter_clean`` for the streaming variant.
+
     Args:
         text: The transcription text to clean
         filler_words: Optional list of filler words. If None, uses config.FILLER_WORDS
-        
+
     Returns:
         Cleaned text with filler words removed
     """
     if filler_words is None:
         filler_words = FILLER_WORDS
-    
+
     if not text or not filler_words:
         return text
-    
-    # Split into words while preserving whitespace structure
-    lines = text.split('\n')
-    cleaned_lines = []
-    
-    for line in lines:
-        if not line.strip():
-            cleaned_lines.append(line)
-            continue
-        
-        # Process each line
-        words = line.split()
-        cleaned_words = []
-        
-        i = 0
-        while i < len(words):
-            word = words[i].lower().strip('.,!?;:()[]{}"\'')
-            original_word = words[i]
-            
-            # Check if this word (or word with punctuation) matches a filler word
-            is_filler = False
-            for filler in filler_words:
-                filler_lower = filler.lower()
-                
-                # Special handling for "a" - only remove if it's standalone and not followed by a noun/article context
-                if word == "a" and filler_lower == "a":
-                    # Only remove "a" if it's at the start of the line or after punctuation
-                    # (likely a filler "a" rather than an article)
-                    prev_text = ' '.join(cleaned_words).lower() if cleaned_words else ''
-                    is_at_start = i == 0 or not prev_text or prev_text[-1] in '.!?;:'
-                    # Also check if next word suggests it's not an article (like another filler)
-                    next_is_filler = False
-                    if i < len(words) - 1:
-                        next_word_check = words[i + 1].lower().strip('.,!?;:()[]{}"\'')
-                        next_is_filler = any(next_word_check == fw.lower() for fw in filler_words if fw.lower() != "a")
-                    
-                    if is_at_start or next_is_filler:
-                        is_filler = True
-                        break
-                    # Otherwise, keep "a" as it's likely an article
-                    continue
-                
-                # Exact match (case-insensitive, ignoring punctuation)
-                if word == filler_lower:
-                    is_filler = True
-                    break
-                # Check for multi-word fillers (like "you know")
-                if ' ' in filler_lower and i < len(words) - 1:
-                    next_word = words[i + 1].lower().strip('.,!?;:()[]{}"\'')
-                    if f"{word} {next_word}" == filler_lower:
-                        is_filler = True
-                        i += 1  # Skip next word too
-                        break
-            
-            if not is_filler:
-                cleaned_words.append(original_word)
-            
-            i += 1
-        
-        # Reconstruct line with original spacing
-        if cleaned_words:
-            cleaned_line = ' '.join(cleaned_words)
-            # Preserve trailing punctuation/spacing from original line
-            if line.endswith(' ') or line.endswith('\t'):
-                cleaned_line += line[-1]
-            cleaned_lines.append(cleaned_line)
-        else:
-            # If all words were removed, keep empty line structure
-            cleaned_lines.append('')
-    
-    result = '\n'.join(cleaned_lines)
-    
-    # Clean up multiple spaces that might result from removal
-    result = re.sub(r' +', ' ', result)
-    # Clean up spaces before punctuation
-    result = re.sub(r' +([.,!?;:])', r'\1', result)
-    # Clean up multiple newlines (keep at most 2)
-    result = re.sub(r'\n{3,}', '\n\n', result)
-    
-    return result.strip()
 
+    return ''.join(iter_clean((text,), filler_words))
+
+
+def clean_words(words: WordTimings, filler_words: List[str] | None = None) -> WordTimings:
+    """
+    Remove filler words from word timings, matching ``remove_filler_words``.
+
+    Keeps a transcript's timings and confidences in step with its cleaned
+    text without recognizing the audio again. Fillers are matched line by
+    line, as in the text, so line-start rules give the same result.
+    """
+    if filler_words is None:
+        filler_words = FILLER_WORDS
+
+    if not filler_words:
+        return words
+
+    matcher = compile_fillers(tuple(filler_words))
+    kept: List[int] = []
+    for start, stop in words.lines():
+        kept.extend(start + index for index in matcher.keep(words.words[start:stop]))
+    return words.select(kept)
@@ -0,0 +1,190 @@
+"""Persistent metadata index over saved transcriptions."""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from config import INDEX_DIR, TRANSCRIPTIONS_DIR
+
+INDEX_FILE = INDEX_DIR / "transcriptions.jsonl"
+
+# <patient>_<dob>_<YYYYMMDD>_<HHMMSS>[_<job id>].txt, as written by generate_filename and the queue
+NAME_PATTERN = re.compile(r"^(?P<patient>.+)_(?P<dob>[^_]*)_(?P<date>\d{8})_(?P<time>\d{6})(?:_[0-9a-f]{8})?$")
+# Directory mtimes this recent are not trusted; a coarse clock could hide a later change
+MTIME_SETTLE_SEC = 2.0
+
+
+@dataclass
+class TranscriptionEntry:
+    """Listing metadata for one transcription file."""
+
+    name: str
+    patient: str = ""
+    dob: str = ""
+    timestamp: str = ""  # UTC save time from the file name, "YYYY-MM-DD HH:MM:SS"
+    size: int = 0
+    mtime: float = 0.0
+
+    @property
+    def path(self) -> Path:
+        return TRANSCRIPTIONS_DIR / self.name
+
+    @classmethod
+    def describe(cls, name: str, stat: os.stat_result) -> "TranscriptionEntry":
+        entry = cls(name=name, size=stat.st_size, mtime=stat.st_mtime)
+        match = NAME_PATTERN.match(name[:-4] if name.endswith(".txt") else name)
+        if match:
+            date, clock = match["date"], match["time"]
+            entry.patient = match["patient"]
+            entry.dob = match["dob"]
+            entry.timestamp = f"{date[:4]}-{date[4:6]}-{date[6:]} {clock[:2]}:{clock[2:4]}:{clock[4:]}"
+        return entry
+
+
+class TranscriptionIndex:
+    """
+    Newest-first listing of TRANSCRIPTIONS_DIR without statting every file.
+
+    Entries are kept in an append-only JSON-lines journal (upserts, deletions
+    and the directory mtime last reconciled against). ``update`` and
+    ``remove`` are called as files are saved and deleted; ``refresh`` does
+    nothing while the directory mtime is unchanged and otherwise lists names
+    only, statting just the files it has not seen before.
+    """
+
+    def __init__(self, directory: Path = TRANSCRIPTIONS_DIR, path: Path = INDEX_FILE) -> None:
+        self.directory = directory
+        self.path = path
+        self._entries: Dict[str, TranscriptionEntry] = {}
+        self._order: Optional[List[TranscriptionEntry]] = None  # Newest first, rebuilt lazily
+        self._dir_mtime = 0
+        self._lines = 0
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    # Public API ---------------------------------------------------------------
+    def refresh(self) -> bool:
+        """Reconcile with the directory; return True if entries were added or removed."""
+        with self._lock:
+            self._load_locked()
+            try:
+                stat = os.stat(self.directory)
+            except FileNotFoundError:
+                return False
+            if stat.st_mtime_ns == self._dir_mtime:
+                return False
+            # Read before listing, so a file created during the scan changes it again
+            dir_mtime = stat.st_mtime_ns if time.time() - stat.st_mtime > MTIME_SETTLE_SEC else 0
+
+            with os.scandir(self.directory) as scan:
+                names = {item.name for item in scan if item.name.endswith(".txt") and item.is_file()}
+            records: List[Dict[str, object]] = []
+            for name in self._entries.keys() - names:
+                del self._entries[name]
+                records.append({"name": name, "deleted": True})
+            for name in names - self._entries.keys():
+                try:
+                    entry = TranscriptionEntry.describe(name, os.stat(self.directory / name))
+                except FileNotFoundError:
+                    continue
+                self._entries[name] = entry
+                records.append(asdict(entry))
+            changed = bool(records)
+            if changed:
+                self._order = None
+            if dir_mtime != self._dir_mtime:
+                self._dir_mtime = dir_mtime
+                records.append({"dir_mtime": dir_mtime})
+            self._append_locked(records)
+            return changed
+
+    def update(self, path: Path) -> None:
+        """Record a file that was just written."""
+        try:
+            entry = TranscriptionEntry.describe(path.name, path.stat())
+        except FileNotFoundError:
+            return
+        with self._lock:
+            self._load_locked()
+            known = path.name in self._entries
+            self._entries[path.name] = entry
+            if self._order is not None and not known and (not self._order or entry.mtime >= self._order[0].mtime):
+                self._order.insert(0, entry)  # The usual case: a new, newest file
+            else:
+                self._order = None
+            self._append_locked([asdict(entry)])
+
+    def remove(self, path: Path) -> None:
+        """Forget a file that was deleted."""
+        with self._lock:
+            self._load_locked()
+            if self._entries.pop(path.name, None) is None:
+                return
+            self._order = None
+            self._append_locked([{"name": path.name, "deleted": True}])
+
+    def count(self) -> int:
+        with self._lock:
+            self._load_locked()
+            return len(self._entries)
+
+    def page(self, offset: int = 0, limit: Optional[int] = None) -> List[TranscriptionEntry]:
+        """Return up to ``limit`` entries (all when None), newest first, starting at ``offset``."""
+        with self._lock:
+            self._load_locked()
+            if self._order is None:
+                self._order = sorted(self._entries.values(), key=lambda entry: entry.mtime, reverse=True)
+            end = None if limit is None else offset + limit
+            return self._order[offset:end]
+
+    # Journal ------------------------------------------------------------------
+    def _load_locked(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        if not self.path.exists():
+            return
+        with self.path.open("r", encoding="utf-8") as handle:
+            for line in handle:
+                self._lines += 1
+                try:
+                    record = json.loads(line)
+                    if "dir_mtime" in record:
+                        self._dir_mtime = int(record["dir_mtime"])
+                    elif record.get("deleted"):
+                        self._entries.pop(record["name"], None)
+                    else:
+                        entry = TranscriptionEntry(**record)
+                        self._entries[entry.name] = entry
+                except (ValueError, TypeError, KeyError):
+                    continue  # Torn write from an interrupted append
+
+    def _append_locked(self, records: List[Dict[str, object]]) -> None:
+        if not records:
+            return
+        # The journal is a cache that refresh can rebuild, so it is not fsynced
+        if self._lines + len(records) > 2 * len(self._entries) + 1000:
+            self._compact_locked()
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("a", encoding="utf-8") as handle:
+            handle.writelines(json.dumps(record) + "\n" for record in records)
+        self._lines += len(records)
+
+    def _compact_locked(self) -> None:
+        """Rewrite the journal with one line per entry."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp = self.path.with_suffix(".tmp")
+        with temp.open("w", encoding="utf-8") as handle:
+            for entry in self._entries.values():
+                handle.write(json.dumps(asdict(entry)) + "\n")
+            handle.write(json.dumps({"dir_mtime": self._dir_mtime}) + "\n")
+        os.replace(temp, self.path)
+        self._lines = len(self._entries) + 1
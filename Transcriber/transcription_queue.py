@@ -0,0 +1,367 @@
+"""Persistent batch transcription queue with a worker pool."""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import IO, Callable, Dict, List, Optional
+
+from audit_logger import log
+from config import (
+    QUEUE_DIR,
+    QUEUE_FAILED_KEEP_DAYS,
+    QUEUE_MAX_ATTEMPTS,
+    QUEUE_RETRY_BASE_SEC,
+    QUEUE_RETRY_MAX_SEC,
+    QUEUE_WORKERS,
+)
+from file_manager import generate_filename, save_transcription, secure_delete
+from gcloud_transcriber import SpeechStatusCallback
+from structured_transcript import words_of
+from template_manager import apply_template, load_templates
+from transcription_backends import transcribe as transcribe_with_fallback
+
+JOURNAL_FILE = QUEUE_DIR / "jobs.jsonl"
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CLEARED = "cleared"  # A failed job superseded by queuing the same recording again
+
+Transcribe = Callable[[Path, str, SpeechStatusCallback], str]
+
+
+@dataclass
+class TranscriptionJob:
+    """One queued recording and everything needed to finish it unattended."""
+
+    audio: str
+    patient: str = ""
+    dob: str = ""
+    template: str = ""
+    output: str = ""  # Explicit transcript path; generated from patient/DOB when empty
+    delete_audio: bool = True
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    state: str = PENDING
+    attempts: int = 0
+    error: str = ""
+    updated: float = field(default_factory=time.time)
+
+    @property
+    def label(self) -> str:
+        return Path(self.audio).name
+
+
+class QueueLockedError(RuntimeError):
+    """Another process (the GUI or a command-line run) is already working through the queue."""
+
+
+class JournalLock:
+    """Exclusive lock on a file next to the journal, held while a queue runs."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._handle: Optional[IO[bytes]] = None
+
+    def acquire(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        handle = self.path.open("a+b")
+        try:
+            if os.name == "nt":
+                import msvcrt
+
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+            else:
+                import fcntl
+
+                fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError as exc:
+            handle.close()
+            raise QueueLockedError("The transcription queue is in use by another Transcriber process") from exc
+        self._handle = handle
+
+    def release(self) -> None:
+        handle, self._handle = self._handle, None
+        if handle is None:
+            return
+        if os.name == "nt":
+            import msvcrt
+
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+        handle.close()  # Also releases the flock
+
+
+def _retained(job: TranscriptionJob, now: float) -> bool:
+    """Whether a job is still worth keeping: unfinished, or recently failed."""
+    if job.state == FAILED:
+        return now - job.updated < QUEUE_FAILED_KEEP_DAYS * 86400
+    return job.state in (PENDING, RUNNING)
+
+
+class JobJournal:
+    """Append-only JSON-lines journal of job snapshots; the last line per job wins."""
+
+    def __init__(self, path: Path = JOURNAL_FILE) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+
+    def load(self) -> Dict[str, TranscriptionJob]:
+        jobs: Dict[str, TranscriptionJob] = {}
+        if not self.path.exists():
+            return jobs
+        with self.path.open("r", encoding="utf-8") as handle:
+            for line in handle:
+                try:
+                    job = TranscriptionJob(**json.loads(line))
+                except (ValueError, TypeError):
+                    continue  # Torn write from an interrupted append
+                jobs[job.id] = job
+        return jobs
+
+    def record(self, job: TranscriptionJob) -> None:
+        job.updated = time.time()
+        line = json.dumps(asdict(job)) + "\n"
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a", encoding="utf-8") as handle:
+                handle.write(line)
+                handle.flush()
+                os.fsync(handle.fileno())
+
+    def compact(self, jobs: List[TranscriptionJob]) -> List[TranscriptionJob]:
+        """Rewrite the journal with one snapshot per unfinished or recently failed job; return those."""
+        now = time.time()
+        kept = [job for job in jobs if _retained(job, now)]
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            temp = self.path.with_suffix(".tmp")
+            with temp.open("w", encoding="utf-8") as handle:
+                for job in kept:
+                    handle.write(json.dumps(asdict(job)) + "\n")
+                handle.flush()
+                os.fsync(handle.fileno())
+            os.replace(temp, self.path)
+        return kept
+
+
+class TranscriptionQueue:
+    """
+    Worker pool that transcribes, templates and saves queued recordings.
+
+    Every state change is journaled before it takes effect, so jobs that were
+    pending or running when the app closed are picked up again by ``start``.
+    Failed attempts are retried with exponential back-off up to
+    QUEUE_MAX_ATTEMPTS. Per-job progress is reported through ``status_cb``
+    with the recording name as prefix. Only one process may run the queue of
+    a journal at a time; ``start`` raises QueueLockedError otherwise.
+    """
+
+    def __init__(
+        self,
+        workers: int = QUEUE_WORKERS,
+        status_cb: SpeechStatusCallback = None,
+        on_complete: Optional[Callable[[TranscriptionJob], None]] = None,
+        transcribe: Transcribe = transcribe_with_fallback,
+        journal: Optional[JobJournal] = None,
+    ) -> None:
+        self.workers = max(1, workers)
+        self.status_cb = status_cb
+        self.on_complete = on_complete
+        self._transcribe = transcribe
+        self._journal = journal or JobJournal()
+        self._journal_lock = JournalLock(self._journal.path.with_suffix(".lock"))
+        self._jobs: Dict[str, TranscriptionJob] = {}
+        self._ready: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._threads: List[threading.Thread] = []
+
+    # Lifecycle ----------------------------------------------------------------
+    def start(self) -> None:
+        """Replay the journal, requeue interrupted jobs and start the workers."""
+        self._journal_lock.acquire()
+        with self._lock:
+            jobs = self._journal.load()
+            for job in jobs.values():
+                if job.state == RUNNING:
+                    job.state = PENDING  # Interrupted mid-flight; run it again
+            self._jobs = {job.id: job for job in self._journal.compact(list(jobs.values()))}
+            for job in self._jobs.values():
+                if job.state == PENDING:
+                    self._ready.put(job.id)
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"transcription-worker-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, wait: bool = True) -> None:
+        for _ in self._threads:
+            self._ready.put(None)
+        if wait:
+            for thread in self._threads:
+                thread.join()
+        self._threads.clear()
+        self._journal_lock.release()
+
+    def join(self) -> None:
+        """Block until no job is pending or running."""
+        with self._idle:
+            self._idle.wait_for(lambda: all(job.state in (DONE, FAILED) for job in self._jobs.values()))
+
+    # Public API ---------------------------------------------------------------
+    def submit(
+        self,
+        audio: Path,
+        patient: str = "",
+        dob: str = "",
+        template: str = "",
+        output: str = "",
+        delete_audio: bool = True,
+    ) -> TranscriptionJob:
+        job = TranscriptionJob(
+            audio=str(audio),
+            patient=patient,
+            dob=dob,
+            template=template,
+            output=output,
+            delete_audio=delete_audio,
+        )
+        with self._lock:
+            for old in [old for old in self._jobs.values() if old.audio == job.audio and old.state == FAILED]:
+                old.state = CLEARED  # Queued again; the new job replaces the failed one
+                self._journal.record(old)
+                del self._jobs[old.id]
+            self._journal.record(job)
+            self._jobs[job.id] = job
+        log("queue_submit", audio, patient, f"Queued transcription job {job.id}")
+        self._status(job, "Queued")
+        self._ready.put(job.id)
+        return job
+
+    def jobs(self) -> List[TranscriptionJob]:
+        with self._lock:
+            return [TranscriptionJob(**asdict(job)) for job in self._jobs.values()]
+
+    # Workers ------------------------------------------------------------------
+    def _status(self, job: TranscriptionJob, message: str) -> None:
+        if self.status_cb:
+            self.status_cb(f"{job.label}: {message}")
+
+    def _update(self, job: TranscriptionJob, **changes) -> None:
+        with self._lock:
+            for name, value in changes.items():
+                setattr(job, name, value)
+            self._journal.record(job)
+            self._idle.notify_all()
+
+    def _work(self) -> None:
+        while True:
+            job_id = self._ready.get()
+            if job_id is None:
+                return
+            with self._lock:
+                job = self._jobs.get(job_id)
+            if job is None or job.state != PENDING:
+                continue
+            self._run(job)
+
+    def _run(self, job: TranscriptionJob) -> None:
+        self._update(job, state=RUNNING, attempts=job.attempts + 1)
+        audio = Path(job.audio)
+        try:
+            transcript = self._transcribe(audio, job.patient, lambda message: self._status(job, message))
+            output = self._save(job, transcript)
+        except Exception as exc:  # pragma: no cover - API failure
+            self._retry_or_fail(job, exc)
+            return
+
+        if job.delete_audio:
+            try:
+                secure_delete(audio, job.patient)
+            except OSError as exc:  # pragma: no cover - transcript is already saved
+                self._status(job, f"Could not delete recording: {exc}")
+        self._update(job, state=DONE, output=str(output), error="")
+        self._status(job, f"Saved {output.name}")
+        if self.on_complete:
+            self.on_complete(job)
+
+    def _save(self, job: TranscriptionJob, transcript: str) -> Path:
+        words = words_of(transcript)
+        template = load_templates().get(job.template) if job.template else None
+        if template:
+            context = {"PATIENT": job.patient, "DOB": job.dob}
+            transcript = apply_template(template, transcript, context)
+        if job.output:
+            output = Path(job.output)
+            output.parent.mkdir(parents=True, exist_ok=True)
+        else:
+            output = generate_filename(job.patient, job.dob)
+            if output.exists():
+                # Several jobs for one patient can finish within the same second
+                output = output.with_name(f"{output.stem}_{job.id[:8]}{output.suffix}")
+        save_transcription(output, transcript, words)
+        return output
+
+    def _retry_or_fail(self, job: TranscriptionJob, exc: Exception) -> None:
+        permanent = isinstance(exc, FileNotFoundError)
+        if permanent or job.attempts >= QUEUE_MAX_ATTEMPTS:
+            self._update(job, state=FAILED, error=str(exc))
+            log("queue_failed", job.audio, job.patient, f"Job {job.id} failed after {job.attempts} attempts: {exc}")
+            self._status(job, f"Failed: {exc}")
+            return
+        delay = min(QUEUE_RETRY_BASE_SEC * 2 ** (job.attempts - 1), QUEUE_RETRY_MAX_SEC)
+        self._update(job, state=PENDING, error=str(exc))
+        self._status(job, f"Retrying in {delay:.0f}s ({exc})")
+        timer = threading.Timer(delay, self._ready.put, args=(job.id,))
+        timer.daemon = True
+        timer.start()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Headless bulk transcription of every WAV in a directory."""
+    parser = argparse.ArgumentParser(description="Bulk-transcribe a directory of WAV recordings.")
+    parser.add_argument("directory", type=Path, help="folder containing .wav recordings")
+    parser.add_argument("--patient", default="", help="patient name recorded in the audit log")
+    parser.add_argument("--dob", default="", help="patient DOB (YYYYMMDD)")
+    parser.add_argument("--template", default="", help="template name to apply")
+    parser.add_argument("--output-dir", type=Path, help="write <recording>.txt here instead of transcriptions/")
+    parser.add_argument("--workers", type=int, default=QUEUE_WORKERS)
+    parser.add_argument("--keep-audio", action="store_true", help="do not securely delete recordings afterwards")
+    args = parser.parse_args(argv)
+
+    jobs = TranscriptionQueue(workers=args.workers, status_cb=print)
+    try:
+        jobs.start()  # Resumes anything left over from an interrupted run
+    except QueueLockedError as exc:
+        print(exc)
+        return 2
+    resumed = {job.audio: job.id for job in jobs.jobs() if job.state in (PENDING, RUNNING)}
+    run = set(resumed.values())
+    for recording in sorted(args.directory.glob("*.wav")):
+        recording = recording.resolve()
+        if str(recording) in resumed:
+            continue
+        output = str(args.output_dir / f"{recording.stem}.txt") if args.output_dir else ""
+        run.add(jobs.submit(recording, args.patient, args.dob, args.template, output, not args.keep_audio).id)
+    jobs.join()
+    jobs.stop()
+
+    # Only this run's jobs decide the exit status, not failures left from earlier runs
+    failed = [job for job in jobs.jobs() if job.id in run and job.state == FAILED]
+    for job in failed:
+        print(f"FAILED {job.label}: {job.error}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
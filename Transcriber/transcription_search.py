@@ -0,0 +1,213 @@
+"""Full-text search over saved transcriptions."""
+
+from __future__ import annotations
+
+import hashlib
+import re
+import sqlite3
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from config import INDEX_DIR, SEARCH_RESULT_LIMIT
+from encrypted_storage import derive_key
+from transcription_index import TranscriptionEntry
+
+SEARCH_DB = INDEX_DIR / "search.sqlite3"
+
+TERM_PATTERN = re.compile(r"[^\W_]+")
+# Files indexed per transaction while reconciling
+RECONCILE_BATCH = 200
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL,
+    terms BLOB NOT NULL  -- Concatenated term hashes, for deleting postings by key
+);
+CREATE TABLE IF NOT EXISTS postings (
+    term BLOB NOT NULL,
+    doc INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (term, doc)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    name TEXT PRIMARY KEY,
+    value BLOB NOT NULL
+);
+"""
+TERM_BYTES = 8
+# Hashed like a term (no real term contains NUL) to tell which key built the index
+KEY_CHECK_TERM = "\0key-check"
+
+
+def tokenize(text: str) -> List[str]:
+    """Case-folded words; punctuation and underscores separate terms."""
+    return TERM_PATTERN.findall(text.casefold())
+
+
+class SearchIndex:
+    """
+    Inverted index from words to the transcriptions that contain them.
+
+    Postings live in SQLite keyed by a keyed BLAKE2b hash of each term, so
+    the database holds no readable transcript text. The hash key is derived
+    from the keystore master key and never stored beside the index, so the
+    database alone cannot be tested against a list of names or diagnoses;
+    an index built with another key is emptied and rebuilt by the next
+    ``reconcile``. Matching is on whole
+    words; a query matches notes containing every one of its words, ranked
+    by how often they occur. ``secure_delete`` is enabled, so removed
+    postings are zeroed on disk rather than left in free pages.
+    """
+
+    def __init__(self, path: Path = SEARCH_DB, key: Optional[bytes] = None) -> None:
+        self.path = path
+        self._key = key  # None: derived from the master key on first use
+        self._hasher: Optional["hashlib.blake2b"] = None
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    # Public API ---------------------------------------------------------------
+    def add(self, path: Path, content: str) -> None:
+        """Index (or re-index) one transcription."""
+        self._add_many([(path, content)])
+
+    def remove(self, path: Path) -> None:
+        """Purge a transcription's postings."""
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                self._delete_locked(connection, path.name)
+
+    def search(self, query: str, limit: int = SEARCH_RESULT_LIMIT) -> List[str]:
+        """Return names of transcriptions containing every word of ``query``, best first."""
+        terms = sorted({self._term(term) for term in tokenize(query)})
+        if not terms:
+            return []
+        placeholders = ",".join("?" * len(terms))
+        with self._lock:
+            rows = self._connect().execute(
+                f"""
+                SELECT docs.name FROM postings JOIN docs ON docs.id = postings.doc
+                WHERE postings.term IN ({placeholders})
+                GROUP BY postings.doc HAVING COUNT(*) = ?
+                ORDER BY SUM(postings.count) DESC, docs.mtime DESC
+                LIMIT ?
+                """,
+                (*terms, len(terms), limit),
+            ).fetchall()
+        return [name for (name,) in rows]
+
+    def reconcile(self, entries: Iterable[TranscriptionEntry], loader: Callable[[Path], str]) -> int:
+        """
+        Bring the index in line with the listed transcriptions.
+
+        Files that are new or whose size/mtime changed are loaded with
+        ``loader`` and indexed; postings for files no longer listed are
+        purged. Returns the number of files (re)indexed.
+        """
+        with self._lock:
+            known = {
+                name: (mtime, size)
+                for name, mtime, size in self._connect().execute("SELECT name, mtime, size FROM docs")
+            }
+        indexed = 0
+        batch: List[Tuple[Path, str]] = []
+        for entry in entries:
+            if known.pop(entry.name, None) == (entry.mtime, entry.size):
+                continue
+            try:
+                batch.append((entry.path, loader(entry.path)))
+            except (FileNotFoundError, UnicodeDecodeError):
+                continue
+            if len(batch) >= RECONCILE_BATCH:
+                indexed += self._add_many(batch)
+                batch = []
+        indexed += self._add_many(batch)
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                for name in known:
+                    self._delete_locked(connection, name)
+        return indexed
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection:
+                self._connection.close()
+                self._connection = None
+
+    # Internals ----------------------------------------------------------------
+    def _add_many(self, documents: List[Tuple[Path, str]]) -> int:
+        """Index several transcriptions in one transaction; returns how many were indexed."""
+        prepared = []
+        for path, content in documents:
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            counts = Counter(tokenize(content))
+            prepared.append((path.name, stat, {self._term(term): count for term, count in counts.items()}))
+        if not prepared:
+            return 0
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                postings = []
+                for name, stat, counts in prepared:
+                    self._delete_locked(connection, name)
+                    doc = connection.execute(
+                        "INSERT INTO docs (name, mtime, size, terms) VALUES (?, ?, ?, ?)",
+                        (name, stat.st_mtime, stat.st_size, b"".join(counts)),
+                    ).lastrowid
+                    postings.extend((term, doc, count) for term, count in counts.items())
+                # Inserting in key order keeps B-tree page writes local
+                postings.sort()
+                connection.executemany("INSERT INTO postings (term, doc, count) VALUES (?, ?, ?)", postings)
+        return len(prepared)
+
+    def _term(self, term: str) -> bytes:
+        if self._hasher is None:
+            key = self._key if self._key is not None else derive_key("search-terms")
+            self._hasher = hashlib.blake2b(key=key, digest_size=TERM_BYTES)
+        hasher = self._hasher.copy()  # Cheaper than re-keying for every term
+        hasher.update(term.encode("utf-8"))
+        return hasher.digest()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.path, check_same_thread=False)
+            connection.execute("PRAGMA secure_delete = ON")
+            connection.execute("PRAGMA synchronous = NORMAL")
+            connection.execute("PRAGMA cache_size = -32768")  # 32 MiB
+            connection.executescript(SCHEMA)
+            self._check_key(connection)
+            self._connection = connection
+        return self._connection
+
+    def _check_key(self, connection: sqlite3.Connection) -> None:
+        """Empty an index whose terms were hashed with another key (e.g. after restoring the keystore)."""
+        check = self._term(KEY_CHECK_TERM)
+        row = connection.execute("SELECT value FROM meta WHERE name = 'key_check'").fetchone()
+        if row is not None and row[0] == check:
+            return
+        with connection:
+            connection.execute("DELETE FROM postings")
+            connection.execute("DELETE FROM docs")
+            connection.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('key_check', ?)", (check,))
+
+    @staticmethod
+    def _delete_locked(connection: sqlite3.Connection, name: str) -> None:
+        row = connection.execute("SELECT id, terms FROM docs WHERE name = ?", (name,)).fetchone()
+        if row:
+            doc, terms = row
+            connection.executemany(
+                "DELETE FROM postings WHERE term = ? AND doc = ?",
+                ((terms[start : start + TERM_BYTES], doc) for start in range(0, len(terms), TERM_BYTES)),
+            )
+            connection.execute("DELETE FROM docs WHERE id = ?", (doc,))
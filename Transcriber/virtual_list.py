@@ -0,0 +1,269 @@
+"""Virtualized Tk list that only holds the visible rows and fetches pages on demand."""
+
+from __future__ import annotations
+
+import tkinter as tk
+from collections import OrderedDict
+from concurrent.futures import Executor, Future
+from tkinter import font as tkfont
+from tkinter import ttk
+from typing import Callable, Generic, List, Optional, Sequence, Set, Tuple, TypeVar
+
+from config import FILE_LIST_PAGE_SIZE
+
+T = TypeVar("T")
+
+# fetch(offset, limit) -> (items, total number of items)
+PageFetcher = Callable[[int, int], Tuple[Sequence[T], int]]
+
+# Pages kept in memory; older ones are fetched again when scrolled back to
+CACHED_PAGES = 16
+# Shown for rows whose page is still being fetched
+LOADING_LABEL = "…"
+
+
+class PageCache(Generic[T]):
+    """
+    Fixed-size pages of a (possibly huge) sequence, fetched lazily and kept LRU.
+
+    With an ``executor`` pages are fetched in the background: missing rows
+    read as None until their page arrives, and ``deliver`` is given a
+    callable that stores it (it must run that on the thread that owns the
+    cache, e.g. through Tk's ``after``). A reload keeps showing the old
+    pages until the new first page is in.
+    """
+
+    def __init__(
+        self,
+        fetch: PageFetcher,
+        page_size: int = FILE_LIST_PAGE_SIZE,
+        executor: Optional[Executor] = None,
+        deliver: Optional[Callable[[Callable[[], None]], None]] = None,
+        on_change: Optional[Callable[[], None]] = None,
+    ) -> None:
+        self.fetch = fetch
+        self.page_size = page_size
+        self.executor = executor
+        self.deliver = deliver
+        self.on_change = on_change
+        self.total = 0
+        self._pages: "OrderedDict[int, Sequence[T]]" = OrderedDict()
+        self._pending: Set[int] = set()
+        self._generation = 0
+        self.reload()
+
+    def reload(self) -> None:
+        """Fetch the first page again (also updates ``total``); other pages are dropped once it is in."""
+        self._generation += 1
+        self._pending.clear()
+        if self.executor is None:
+            self._pages.clear()
+        self._request(0)
+
+    def _request(self, number: int) -> None:
+        if self.executor is None:
+            page, total = self.fetch(number * self.page_size, self.page_size)
+            self._store(number, page, total)
+            return
+        if number in self._pending:
+            return
+        self._pending.add(number)
+        generation = self._generation
+        future = self.executor.submit(self.fetch, number * self.page_size, self.page_size)
+        future.add_done_callback(lambda done: self.deliver(lambda: self._arrived(generation, number, done)))
+
+    def _arrived(self, generation: int, number: int, future: Future) -> None:
+        if generation != self._generation:
+            return  # Superseded by a reload
+        self._pending.discard(number)
+        page, total = future.result()
+        if number == 0:
+            self._pages.clear()  # Later pages of the old listing may have shifted
+        self._store(number, page, total)
+        if self.on_change:
+            self.on_change()
+
+    def _store(self, number: int, page: Sequence[T], total: int) -> None:
+        self.total = total
+        self._pages[number] = page
+        while len(self._pages) > CACHED_PAGES:
+            self._pages.popitem(last=False)
+
+    def _page(self, number: int) -> Optional[Sequence[T]]:
+        page = self._pages.get(number)
+        if page is None:
+            self._request(number)
+            page = self._pages.get(number)  # Already there when fetched synchronously
+        else:
+            self._pages.move_to_end(number)
+        return page
+
+    def get(self, index: int) -> Optional[T]:
+        if not 0 <= index < self.total:
+            return None
+        number, offset = divmod(index, self.page_size)
+        page = self._page(number)
+        return page[offset] if page is not None and offset < len(page) else None
+
+    def window(self, start: int, count: int) -> List[Optional[T]]:
+        """Items ``start`` .. ``start + count`` (fewer at the end; None while still loading)."""
+        items: List[Optional[T]] = []
+        index = start
+        stop = min(start + count, self.total)
+        while index < stop:
+            number, offset = divmod(index, self.page_size)
+            page = self._page(number)
+            if page is None:
+                missing = min(stop, (number + 1) * self.page_size) - index
+                items.extend([None] * missing)
+                index += missing
+                continue
+            chunk = page[offset : offset + (stop - index)]
+            if not chunk:
+                break  # Listing shrank since total was read
+            items.extend(chunk)
+            index += len(chunk)
+        return items
+
+
+class VirtualListbox(ttk.Frame, Generic[T]):
+    """
+    Scrollable list whose tk.Listbox only ever contains the rows on screen.
+
+    Scrolling re-renders those rows from a PageCache, so a list of hundreds
+    of thousands of transcriptions costs the same to show and scroll as a
+    short one. ``on_select`` receives the clicked item. With an
+    ``executor`` pages are fetched off the Tk thread; ``on_total`` is called
+    with the item count whenever a fetched page changes it.
+    """
+
+    def __init__(
+        self,
+        master: tk.Misc,
+        fetch: PageFetcher,
+        label: Callable[[T], str] = str,
+        on_select: Optional[Callable[[T], None]] = None,
+        page_size: int = FILE_LIST_PAGE_SIZE,
+        executor: Optional[Executor] = None,
+        on_total: Optional[Callable[[int], None]] = None,
+    ) -> None:
+        super().__init__(master)
+        self.label = label
+        self.on_select = on_select
+        self.on_total = on_total
+        self._page_size = page_size
+        self._executor = executor
+        self._top = 0
+        self._rows = 1
+        self._selected: Optional[int] = None
+
+        self._listbox = tk.Listbox(self, exportselection=False, activestyle="none")
+        self._scrollbar = ttk.Scrollbar(self, orient="vertical", command=self._on_scrollbar)
+        self._scrollbar.pack(side="right", fill="y")
+        self._listbox.pack(side="left", fill="both", expand=True)
+        self._line_height = tkfont.nametofont(self._listbox.cget("font")).metrics("linespace") + 1
+
+        self._listbox.bind("<Configure>", self._on_resize)
+        self._listbox.bind("<<ListboxSelect>>", self._on_listbox_select)
+        self._listbox.bind("<MouseWheel>", lambda event: self.scroll(-3 if event.delta > 0 else 3))
+        self._listbox.bind("<Button-4>", lambda _event: self.scroll(-3))
+        self._listbox.bind("<Button-5>", lambda _event: self.scroll(3))
+        self._listbox.bind("<Up>", lambda _event: self._move_selection(-1))
+        self._listbox.bind("<Down>", lambda _event: self._move_selection(1))
+        self._listbox.bind("<Prior>", lambda _event: self.scroll(-self._rows) or "break")
+        self._listbox.bind("<Next>", lambda _event: self.scroll(self._rows) or "break")
+        self._listbox.bind("<Home>", lambda _event: self.scroll_to(0) or "break")
+        self._listbox.bind("<End>", lambda _event: self.scroll_to(self.total) or "break")
+
+        self._cache: PageCache[T] = self._new_cache(fetch)
+        self._render()
+
+    # Public API ---------------------------------------------------------------
+    @property
+    def total(self) -> int:
+        return self._cache.total
+
+    def set_source(self, fetch: PageFetcher) -> None:
+        """Show a different listing (e.g. search results) from the top."""
+        self._cache = self._new_cache(fetch)
+        self._top = 0
+        self._selected = None
+        self._render()
+
+    def refresh(self) -> None:
+        """Re-fetch the current listing, keeping the scroll position where possible."""
+        self._cache.reload()
+        self._selected = None
+        self._render()
+
+    def scroll(self, rows: int) -> None:
+        self.scroll_to(self._top + rows)
+
+    def scroll_to(self, index: int) -> None:
+        self._top = max(0, min(index, self.total - self._rows))
+        self._render()
+
+    def _new_cache(self, fetch: PageFetcher) -> PageCache[T]:
+        return PageCache(
+            fetch,
+            self._page_size,
+            executor=self._executor,
+            deliver=lambda apply: self.after(0, apply),
+            on_change=self._on_page_loaded,
+        )
+
+    def _on_page_loaded(self) -> None:
+        self._render()
+        if self.on_total:
+            self.on_total(self.total)
+
+    # Rendering ----------------------------------------------------------------
+    def _render(self) -> None:
+        self._top = max(0, min(self._top, self.total - self._rows))
+        items = self._cache.window(self._top, self._rows)
+        self._listbox.delete(0, tk.END)
+        if items:
+            self._listbox.insert(tk.END, *(LOADING_LABEL if item is None else self.label(item) for item in items))
+        if self._selected is not None and self._top <= self._selected < self._top + len(items):
+            self._listbox.selection_set(self._selected - self._top)
+        total = max(self.total, 1)
+        self._scrollbar.set(self._top / total, min(1.0, (self._top + self._rows) / total))
+
+    def _on_resize(self, event) -> None:
+        rows = max(1, event.height // self._line_height)
+        if rows != self._rows:
+            self._rows = rows
+            self._render()
+
+    def _on_scrollbar(self, action: str, amount: str, unit: Optional[str] = None) -> None:
+        if action == "moveto":
+            self.scroll_to(int(float(amount) * self.total))
+        elif unit == "pages":
+            self.scroll(int(amount) * self._rows)
+        else:
+            self.scroll(int(amount))
+
+    # Selection ----------------------------------------------------------------
+    def _on_listbox_select(self, _event=None) -> None:
+        selection = self._listbox.curselection()
+        if selection:
+            self._select(self._top + selection[0])
+
+    def _move_selection(self, step: int) -> str:
+        current = self._top - 1 if self._selected is None else self._selected
+        index = max(0, min(current + step, self.total - 1))
+        if index < self._top:
+            self._top = index
+        elif index >= self._top + self._rows:
+            self._top = index - self._rows + 1
+        self._select(index)
+        return "break"
+
+    def _select(self, index: int) -> None:
+        item = self._cache.get(index)
+        if item is None:
+            return
+        self._selected = index
+        self._render()
+        if self.on_select:
+            self.on_select(item)
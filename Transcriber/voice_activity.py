@@ -0,0 +1,250 @@
+"""Energy-based voice activity detection and silence trimming."""
+
+from __future__ import annotations
+
+from bisect import bisect_right
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+import soundfile as sf
+
+from config import (
+    STREAM_KEEPALIVE_SEC,
+    VAD_FRAME_SEC,
+    VAD_KEEP_SILENCE_SEC,
+    VAD_MIN_LEVEL_DB,
+    VAD_MIN_SILENCE_SEC,
+    VAD_PADDING_SEC,
+    VAD_THRESHOLD_DB,
+)
+from encrypted_storage import open_file
+
+# Percentile of frame energies taken as the background noise level
+NOISE_PERCENTILE = 10
+# Frames analysed per read when scanning a file
+ANALYSIS_BLOCK_FRAMES = 1000
+
+
+def frame_energy_db(block: np.ndarray, frame_len: int) -> np.ndarray:
+    """Mean power of each ``frame_len``-sample frame of a (samples, channels) block, in dBFS."""
+    block = np.asarray(block, dtype=np.float32)
+    if block.ndim == 1:
+        block = block[:, None]
+    frames = -(-len(block) // frame_len)
+    padded = np.zeros((frames * frame_len, block.shape[1]), dtype=np.float32)
+    padded[: len(block)] = block
+    squares = np.einsum("ij,ij->i", padded, padded).reshape(frames, frame_len).sum(axis=1)
+    counts = np.full(frames, frame_len * block.shape[1], dtype=np.float32)
+    if len(block) % frame_len:
+        counts[-1] = (len(block) % frame_len) * block.shape[1]
+    return 10.0 * np.log10(squares / counts + 1e-12)
+
+
+def voiced_frames(energy_db: np.ndarray) -> np.ndarray:
+    """Frames louder than the noise floor by VAD_THRESHOLD_DB (and above VAD_MIN_LEVEL_DB)."""
+    if not len(energy_db):
+        return np.zeros(0, dtype=bool)
+    threshold = max(float(np.percentile(energy_db, NOISE_PERCENTILE)) + VAD_THRESHOLD_DB, VAD_MIN_LEVEL_DB)
+    return energy_db > threshold
+
+
+def pad_mask(voiced: np.ndarray, padding_frames: int) -> np.ndarray:
+    """Extend every voiced run by ``padding_frames`` on both sides so word edges are kept."""
+    if padding_frames <= 0 or not voiced.any():
+        return voiced.copy()
+    window = np.ones(2 * padding_frames + 1, dtype=np.int32)
+    return np.convolve(voiced.astype(np.int32), window, mode="same") > 0
+
+
+class VoiceActivityDetector:
+    """
+    Online detector for streamed blocks.
+
+    The noise floor is the NOISE_PERCENTILE of the last ``history_sec`` of
+    frame energies, so it follows changing room noise. ``update`` returns
+    one speech decision per VAD_FRAME_SEC frame of the block.
+    """
+
+    def __init__(self, samplerate: int, history_sec: float = 30.0) -> None:
+        self.frame_len = max(1, int(VAD_FRAME_SEC * samplerate))
+        self._history = np.zeros(max(1, int(history_sec / VAD_FRAME_SEC)), dtype=np.float32)
+        self._filled = 0
+        self._next = 0
+
+    def update(self, block: np.ndarray) -> np.ndarray:
+        energy = frame_energy_db(block, self.frame_len)
+        size = len(self._history)
+        recent = energy[-size:]
+        slots = (self._next + np.arange(len(recent))) % size
+        self._history[slots] = recent
+        self._next = (self._next + len(recent)) % size
+        self._filled = min(self._filled + len(recent), size)
+        floor = float(np.percentile(self._history[: self._filled], NOISE_PERCENTILE))
+        return energy > max(floor + VAD_THRESHOLD_DB, VAD_MIN_LEVEL_DB)
+
+
+class SpeechGate:
+    """
+    Leaves long pauses out of a live stream of recorder blocks.
+
+    Like ``keep_ranges`` for files: the first VAD_MIN_SILENCE_SEC of every
+    pause is passed through whole, later silence is held back, and the last
+    VAD_PADDING_SEC of it is sent just before speech resumes so word onsets
+    survive. One frame per ``keepalive_sec`` still goes out during a pause.
+    """
+
+    def __init__(self, samplerate: int, keepalive_sec: float = STREAM_KEEPALIVE_SEC) -> None:
+        self.detector = VoiceActivityDetector(samplerate)
+        self._hangover = int(round(VAD_MIN_SILENCE_SEC / VAD_FRAME_SEC))
+        self._keepalive = max(1, int(round(keepalive_sec / VAD_FRAME_SEC)))
+        self._preroll: deque = deque(maxlen=max(1, int(round(VAD_PADDING_SEC / VAD_FRAME_SEC))))
+        self._since_voice = 0
+        self._since_sent = 0
+
+    def filter(self, block: np.ndarray) -> np.ndarray:
+        """The part of ``block`` to stream (possibly empty)."""
+        frame_len = self.detector.frame_len
+        kept: List[np.ndarray] = []
+        for index, voiced in enumerate(self.detector.update(block)):
+            frame = block[index * frame_len : (index + 1) * frame_len]
+            if voiced:
+                kept.extend(self._preroll)
+                self._preroll.clear()
+                self._since_voice = 0
+            else:
+                self._since_voice += 1
+            self._since_sent += 1
+            if self._since_voice <= self._hangover or self._since_sent >= self._keepalive:
+                kept.append(frame)
+                self._since_sent = 0
+            else:
+                self._preroll.append(frame.copy())  # Recorder blocks may be reused after the call
+        return np.concatenate(kept) if kept else block[:0]
+
+
+@dataclass
+class TimeMap:
+    """
+    Maps times in trimmed audio back to the original recording.
+
+    ``spans`` holds ``(trimmed_start, original_start, length)`` in samples for
+    each run of audio that was kept, in order.
+    """
+
+    samplerate: int
+    original_frames: int
+    spans: List[Tuple[int, int, int]] = field(default_factory=list)
+
+    @property
+    def kept_frames(self) -> int:
+        return sum(length for _, _, length in self.spans)
+
+    @property
+    def kept_ratio(self) -> float:
+        return self.kept_frames / self.original_frames if self.original_frames else 1.0
+
+    def to_original(self, seconds: float) -> float:
+        """Convert a time in the trimmed audio (e.g. a word offset) to the original recording."""
+        if not self.spans:
+            return seconds
+        sample = seconds * self.samplerate
+        index = max(0, bisect_right([start for start, _, _ in self.spans], sample) - 1)
+        trimmed_start, original_start, length = self.spans[index]
+        return (original_start + min(sample - trimmed_start, length)) / self.samplerate
+
+
+def keep_ranges(voiced: np.ndarray, frame_len: int, total: int) -> List[Tuple[int, int]]:
+    """
+    Turn a padded per-frame speech mask into sample ranges to keep.
+
+    Silences shorter than VAD_MIN_SILENCE_SEC are kept whole; longer ones
+    are shortened to VAD_KEEP_SILENCE_SEC (half kept on each side), so
+    sentence breaks survive and the recognizer still sees pauses.
+    """
+    frame_sec = VAD_FRAME_SEC
+    min_silence = int(round(VAD_MIN_SILENCE_SEC / frame_sec))
+    keep_edge = int(round(VAD_KEEP_SILENCE_SEC / frame_sec / 2))
+    # Boundaries of silent runs: +1 where silence starts, -1 where it ends
+    silent = np.concatenate(([0], (~voiced).astype(np.int8), [0]))
+    edges = np.diff(silent)
+    starts = np.flatnonzero(edges == 1)
+    stops = np.flatnonzero(edges == -1)
+
+    ranges: List[Tuple[int, int]] = []
+    position = 0
+    for start, stop in zip(starts, stops):
+        if stop - start < min_silence:
+            continue
+        # Leading/trailing silence of the whole recording is dropped entirely
+        cut_from = start + (keep_edge if start > 0 else 0)
+        cut_to = stop - (keep_edge if stop < len(voiced) else 0)
+        if cut_from > position:
+            ranges.append((position * frame_len, min(cut_from * frame_len, total)))
+        position = cut_to
+    if position < len(voiced):
+        ranges.append((position * frame_len, total))
+    return [(start, stop) for start, stop in ranges if stop > start]
+
+
+def analyze(audio_path: Path) -> Tuple[int, int, List[Tuple[int, int]]]:
+    """
+    Scan a (possibly encrypted) recording and decide which sample ranges to keep.
+
+    Only frame energies are held in memory (a few hundred KB per hour), so
+    long recordings are analysed in constant space.
+
+    Returns:
+        The sample rate, total frames and a list of ``(start, stop)`` sample ranges
+    """
+    with open_file(audio_path) as raw, sf.SoundFile(raw) as source:
+        rate = source.samplerate
+        total = source.frames
+        frame_len = max(1, int(VAD_FRAME_SEC * rate))
+        energy = [
+            frame_energy_db(block, frame_len)
+            for block in source.blocks(blocksize=frame_len * ANALYSIS_BLOCK_FRAMES, dtype="float32", always_2d=True)
+        ]
+    energy_db = np.concatenate(energy) if energy else np.zeros(0, dtype=np.float32)
+    voiced = pad_mask(voiced_frames(energy_db), int(round(VAD_PADDING_SEC / VAD_FRAME_SEC)))
+    return rate, total, keep_ranges(voiced, frame_len, total)
+
+
+def trim_silence(audio_path: Path, target: Path, min_saving: float = 0.05) -> Optional[TimeMap]:
+    """
+    Write ``audio_path`` without its long silences to ``target`` (16-bit WAV, encrypted at rest).
+
+    Returns the TimeMap for the trimmed audio, or None (writing nothing)
+    when trimming would save less than ``min_saving`` of the recording.
+    """
+    rate, total, ranges = analyze(audio_path)
+    time_map = TimeMap(rate, total)
+    position = 0
+    for start, stop in ranges:
+        time_map.spans.append((position, start, stop - start))
+        position += stop - start
+    if time_map.kept_ratio > 1.0 - min_saving:
+        return None
+
+    with open_file(audio_path) as raw_source, open_file(target, "wb") as raw_target:
+        with sf.SoundFile(raw_source) as source, sf.SoundFile(
+            raw_target,
+            mode="w",
+            samplerate=rate,
+            channels=source.channels,
+            format="WAV",
+            subtype="PCM_16",
+        ) as destination:
+            block_frames = int(rate * 10)
+            for start, stop in ranges:
+                source.seek(start)
+                remaining = stop - start
+                while remaining > 0:
+                    data = source.read(min(block_frames, remaining), dtype="int16", always_2d=True)
+                    if not len(data):
+                        break
+                    destination.write(data)
+                    remaining -= len(data)
+    return time_map